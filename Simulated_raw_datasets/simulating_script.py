@@ -1,12 +1,10 @@
+import argparse
+import os
 import pandas as pd
 import numpy as np
 import random
 from datetime import datetime, timedelta
 
-# Set random seed for reproducibility
-random.seed(42)
-np.random.seed(42)
-
 
 # some categorical input values
 categories = ["health", "nutrition", "medical", "bodybuilding", "sports"]
@@ -18,72 +16,292 @@ products = {"Protein Powder": 1200, "Omega 3": 850, "Multivitamins": 500, "Energ
 num_influencers = 25 #numbers taken for now
 num_posts = 40
 num_users = 1000
+events_per_post = 10 #tracking rows generated per post
+tracking_block = 100_000 #tracking rows drawn from one RNG stream, so output does not depend on the chunk size
+num_campaigns = 5
+
+first_names = ['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan',
+               'Ananya', 'Diya', 'Isha', 'Jhanvi', 'Myra', 'Saanvi', 'Sara', 'Tanya', 'Zara', 'Kiara']
+last_names = ['Sharma', 'Verma', 'Mishra', 'Reddy', 'Patel', 'Gupta', 'Mehta', 'Kapoor', 'Joshi', 'Desai']
+
+influencer_columns = ["influencer_id", "name", "category", "gender", "follower_count", "platform"]
+post_columns = ["post_id", "influencer_id", "platform", "date", "URL", "caption", "reach", "likes", "comments"]
+tracking_columns = ["source", "campaign", "post_id", "influencer_id", "user_id", "product", "date", "orders", "revenue"]
+payout_columns = ["influencer_id", "basis", "rate", "orders", "total_payout"]
 
 # Helper functions
 def generate_name():
-    first_names = ['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan',
-                   'Ananya', 'Diya', 'Isha', 'Jhanvi', 'Myra', 'Saanvi', 'Sara', 'Tanya', 'Zara', 'Kiara']
-    last_names = ['Sharma', 'Verma', 'Mishra', 'Reddy', 'Patel', 'Gupta', 'Mehta', 'Kapoor', 'Joshi', 'Desai']
     return f"{random.choice(first_names)} {random.choice(last_names)}" #this function will be used to generate random names
 
 def generate_url(post_id): return f"https://socialmedia.com/post/{post_id}" #this function will be used to generate random URLs
 
+def make_ids(prefix, n):
+    # INF001, POST001, ... same zero-padding as the loop generator
+    return (prefix + pd.Series(np.arange(1, n + 1)).astype(str).str.zfill(3)).to_numpy(dtype=object)
+
+
+# ----------------------------------------------------------------------------
+# Loop generator (original row-by-row simulation, kept for the small demo data)
+# ----------------------------------------------------------------------------
+def generate_loop(num_influencers=num_influencers, num_posts=num_posts, num_users=num_users, seed=42,
+                  events_per_post=events_per_post):
+    # Set random seed for reproducibility
+    random.seed(seed)
+    np.random.seed(seed)
+
+    #Influencers dataset
+    influencers = []
+    for i in range(num_influencers):
+        influencer_id = f"INF{str(i+1).zfill(3)}"
+        name = generate_name()
+        gender = np.random.choice(genders, p=gender_weights)
+        category = random.choice(categories)
+        platform = np.random.choice(platforms, p=platform_weights)
+        followers = int(np.clip(np.random.normal(850_000, 1_800_000), 10_000, 10_000_000))
+        influencers.append([influencer_id, name, category, gender, followers, platform])
+
+    influencers_df = pd.DataFrame(influencers, columns=influencer_columns)
+
+    # 2. Posts dataset
+    posts = []
+    for i in range(num_posts):
+        post_id = f"POST{str(i+1).zfill(3)}"
+        influencer = influencers_df.sample(1).iloc[0] #selects influencers from the database randomly
+        influencer_id = influencer["influencer_id"]
+        platform = influencer["platform"]
+        post_date = datetime.today() - timedelta(days=random.randint(1, 90)) #generates random dates
+        url = generate_url(i+1)
+        caption = f"Check out this amazing product! #{random.choice(categories)}"
+        reach = int(influencer["follower_count"] * np.random.uniform(0.1, 0.6))
+        likes = int(reach * np.random.uniform(0.05, 0.15))
+        comments = int(reach * np.random.uniform(0.005, 0.02))
+        posts.append([post_id, influencer_id, platform, post_date.strftime('%Y-%m-%d'), url, caption, reach, likes, comments])
+
+    posts_df = pd.DataFrame(posts, columns=post_columns)
+
+    # 3. Tracking data
+    tracking = []
+    for i in range(num_posts * events_per_post):
+        post = posts_df.sample(1).iloc[0]
+        post_id = post["post_id"]
+        influencer_id = post["influencer_id"]
+        source = post["platform"]
+        campaign = f"Campaign_{random.randint(1,5)}" #assuming that each campaign has a serial associated with it
+        user_id = f"USER{random.randint(1, num_users)}" #randomly assinging user id
+        product = random.choice(list(products.keys())) #randomly selects the products from the products list (assuming that a post can lead to orders for any of the products)
+        date = post["date"]
+        orders = np.random.poisson(2)
+        revenue = round(orders * products[product] * np.random.uniform(0.9, 1.1), 2)
+        tracking.append([source, campaign, post_id, influencer_id, user_id, product, date, orders, revenue])
+
+    tracking_df = pd.DataFrame(tracking, columns=tracking_columns)
+
+    # 4. Payouts
+    payouts = []
+    for influencer_id in influencers_df["influencer_id"]:
+        basis = np.random.choice(["post", "order"])
+        rate = round(np.random.uniform(500, 5000), 2) if basis == "post" else round(np.random.uniform(50, 500), 2)
+        influencer_posts = posts_df[posts_df["influencer_id"] == influencer_id]
+        influencer_orders = tracking_df[tracking_df["influencer_id"] == influencer_id]["orders"].sum()
+        total_payout = len(influencer_posts) * rate if basis == "post" else influencer_orders * rate
+        payouts.append([influencer_id, basis, rate, influencer_orders, round(total_payout, 2)])
+
+    payouts_df = pd.DataFrame(payouts, columns=payout_columns)
+
+    return influencers_df, posts_df, tracking_df, payouts_df
+
+
+# ----------------------------------------------------------------------------
+# Vectorized generator (batched NumPy draws, used for load-testing at scale)
+# ----------------------------------------------------------------------------
+def generate_influencers(num_influencers, rng):
+    names = np.char.add(np.char.add(rng.choice(first_names, num_influencers), " "),
+                        rng.choice(last_names, num_influencers))
+    followers = np.clip(rng.normal(850_000, 1_800_000, num_influencers), 10_000, 10_000_000).astype(np.int64)
+    return pd.DataFrame({
+        "influencer_id": make_ids("INF", num_influencers),
+        "name": names.astype(object),
+        "category": rng.choice(categories, num_influencers).astype(object),
+        "gender": rng.choice(genders, num_influencers, p=gender_weights).astype(object),
+        "follower_count": followers,
+        "platform": rng.choice(platforms, num_influencers, p=platform_weights).astype(object),
+    }, columns=influencer_columns)
+
+
+def generate_posts(influencers_df, num_posts, rng, as_of=None):
+    as_of = pd.Timestamp(as_of if as_of is not None else datetime.today()).normalize()
+    owner = rng.integers(0, len(influencers_df), num_posts) #influencer row behind each post
+    followers = influencers_df["follower_count"].to_numpy()[owner]
+    reach = (followers * rng.uniform(0.1, 0.6, num_posts)).astype(np.int64)
+    likes = (reach * rng.uniform(0.05, 0.15, num_posts)).astype(np.int64)
+    comments = (reach * rng.uniform(0.005, 0.02, num_posts)).astype(np.int64)
+    dates = as_of - pd.to_timedelta(rng.integers(1, 91, num_posts), unit="D")
+    post_numbers = pd.Series(np.arange(1, num_posts + 1)).astype(str)
+    posts_df = pd.DataFrame({
+        "post_id": make_ids("POST", num_posts),
+        "influencer_id": influencers_df["influencer_id"].to_numpy()[owner],
+        "platform": influencers_df["platform"].to_numpy()[owner],
+        "date": dates.strftime('%Y-%m-%d').to_numpy(dtype=object),
+        "URL": ("https://socialmedia.com/post/" + post_numbers).to_numpy(dtype=object),
+        "caption": ("Check out this amazing product! #" + pd.Series(rng.choice(categories, num_posts))).to_numpy(dtype=object),
+        "reach": reach,
+        "likes": likes,
+        "comments": comments,
+    }, columns=post_columns)
+    return posts_df, owner
+
+
+def tracking_draws(seed, block, size, num_posts, num_users=num_users):
+    # Block ``block`` of the tracking rows gets its own stream, spawned from the seed
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(block,)))
+    post_idx = rng.integers(0, num_posts, size)
+    product_idx = rng.integers(0, len(products), size)
+    orders = rng.poisson(2, size)
+    price_factor = rng.uniform(0.9, 1.1, size)
+    return {
+        "post_idx": post_idx,
+        "product_idx": product_idx,
+        "orders": orders,
+        "price_factor": price_factor,
+        "campaign_idx": rng.integers(0, num_campaigns, size),
+        "user_idx": rng.integers(0, num_users, size),
+    }
+
+
+def iter_tracking_draws(seed, num_events, num_posts, num_users=num_users, chunk_size=1_000_000):
+    # Re-cuts the fixed tracking blocks into chunks of ``chunk_size`` rows
+    pending, pending_rows = [], 0
+    for block, start in enumerate(range(0, num_events, tracking_block)):
+        pending.append(tracking_draws(seed, block, min(tracking_block, num_events - start), num_posts, num_users))
+        pending_rows += len(pending[-1]["post_idx"])
+        last = start + tracking_block >= num_events
+        if pending_rows < chunk_size and not last:
+            continue
+        draws = {key: np.concatenate([d[key] for d in pending]) for key in pending[0]}
+        # Whole chunks only, except for the rows left at the end
+        cut = pending_rows if last else pending_rows - pending_rows % chunk_size
+        for lo in range(0, cut, chunk_size):
+            yield {key: values[lo:min(lo + chunk_size, cut)] for key, values in draws.items()}
+        pending = [{key: values[cut:] for key, values in draws.items()}]
+        pending_rows -= cut
+
+
+def iter_tracking_chunks(posts_df, num_events, seed, num_users=num_users, chunk_size=1_000_000):
+    # Lookup tables so each chunk is built with integer draws + fancy indexing only
+    post_ids = posts_df["post_id"].to_numpy(dtype=object)
+    post_influencers = posts_df["influencer_id"].to_numpy(dtype=object)
+    post_platforms = posts_df["platform"].to_numpy(dtype=object)
+    post_dates = posts_df["date"].to_numpy(dtype=object)
+    campaign_labels = np.array([f"Campaign_{i}" for i in range(1, num_campaigns + 1)], dtype=object)
+    user_labels = np.array([f"USER{i}" for i in range(1, num_users + 1)], dtype=object)
+    product_names = np.array(list(products.keys()), dtype=object)
+    product_prices = np.array(list(products.values()), dtype=float)
+
+    for draws in iter_tracking_draws(seed, num_events, len(posts_df), num_users=num_users, chunk_size=chunk_size):
+        post_idx, product_idx, orders = draws["post_idx"], draws["product_idx"], draws["orders"]
+        revenue = np.round(orders * product_prices[product_idx] * draws["price_factor"], 2)
+        chunk = pd.DataFrame({
+            "source": post_platforms[post_idx],
+            "campaign": campaign_labels[draws["campaign_idx"]],
+            "post_id": post_ids[post_idx],
+            "influencer_id": post_influencers[post_idx],
+            "user_id": user_labels[draws["user_idx"]],
+            "product": product_names[product_idx],
+            "date": post_dates[post_idx],
+            "orders": orders,
+            "revenue": revenue,
+        }, columns=tracking_columns)
+        yield chunk, post_idx
+
+
+def generate_payouts(influencers_df, posts_per_influencer, orders_per_influencer, rng):
+    n = len(influencers_df)
+    basis = rng.choice(["post", "order"], n)
+    is_post = basis == "post"
+    rate = np.round(np.where(is_post, rng.uniform(500, 5000, n), rng.uniform(50, 500, n)), 2)
+    orders = orders_per_influencer.astype(np.int64)
+    total_payout = np.round(np.where(is_post, posts_per_influencer * rate, orders * rate), 2)
+    return pd.DataFrame({
+        "influencer_id": influencers_df["influencer_id"].to_numpy(),
+        "basis": basis.astype(object),
+        "rate": rate,
+        "orders": orders,
+        "total_payout": total_payout,
+    }, columns=payout_columns)
+
+
+def generate_vectorized(output_dir=None, num_influencers=num_influencers, num_posts=num_posts,
+                        events_per_post=events_per_post, num_users=num_users, seed=42,
+                        chunk_size=1_000_000, as_of=None):
+    """Generate all four datasets with batched draws.
+
+    With ``output_dir`` the tracking table is streamed to ``tracking.csv`` one chunk at a
+    time (memory stays bounded by ``chunk_size``) and ``None`` is returned in its place;
+    without it everything is returned in memory. Output is reproducible for a given
+    seed, whatever the chunk size: tracking rows are drawn in fixed blocks of
+    ``tracking_block`` rows, each from its own stream spawned from the seed.
+    """
+    rng = np.random.default_rng(seed)
+    influencers_df = generate_influencers(num_influencers, rng)
+    posts_df, owner = generate_posts(influencers_df, num_posts, rng, as_of=as_of)
+
+    # Orders per influencer are accumulated chunk by chunk for the payouts table
+    orders_per_influencer = np.zeros(num_influencers, dtype=np.int64)
+    tracking_chunks = []
+    tracking_path = os.path.join(output_dir, "tracking.csv") if output_dir else None
+    for i, (chunk, post_idx) in enumerate(iter_tracking_chunks(posts_df, num_posts * events_per_post, seed,
+                                                              num_users=num_users, chunk_size=chunk_size)):
+        orders_per_influencer += np.bincount(owner[post_idx], weights=chunk["orders"].to_numpy(),
+                                             minlength=num_influencers).astype(np.int64)
+        if tracking_path:
+            chunk.to_csv(tracking_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        else:
+            tracking_chunks.append(chunk)
+
+    posts_per_influencer = np.bincount(owner, minlength=num_influencers)
+    payouts_df = generate_payouts(influencers_df, posts_per_influencer, orders_per_influencer, rng)
+
+    if tracking_path:
+        if num_posts * events_per_post == 0:
+            pd.DataFrame(columns=tracking_columns).to_csv(tracking_path, index=False)
+        influencers_df.to_csv(os.path.join(output_dir, "influencers.csv"), index=False)
+        posts_df.to_csv(os.path.join(output_dir, "posts.csv"), index=False)
+        payouts_df.to_csv(os.path.join(output_dir, "payouts.csv"), index=False)
+        tracking_df = None
+    elif tracking_chunks:
+        tracking_df = pd.concat(tracking_chunks, ignore_index=True)
+    else:
+        tracking_df = pd.DataFrame(columns=tracking_columns)
+
+    return influencers_df, posts_df, tracking_df, payouts_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate influencer, post, tracking and payout datasets.")
+    parser.add_argument("--mode", choices=["loop", "vectorized"], default="loop",
+                        help="loop = original row-by-row simulation, vectorized = batched draws for large volumes")
+    parser.add_argument("--num-influencers", type=int, default=num_influencers)
+    parser.add_argument("--num-posts", type=int, default=num_posts)
+    parser.add_argument("--events-per-post", type=int, default=events_per_post, help="tracking rows per post")
+    parser.add_argument("--num-users", type=int, default=num_users)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="tracking rows generated/written per batch")
+    parser.add_argument("--as-of", default=None, help="reference date for post dates (YYYY-MM-DD, default today)")
+    parser.add_argument("--output-dir", default=".", help="directory the CSVs are written to")
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.mode == "loop":
+        datasets = generate_loop(args.num_influencers, args.num_posts, args.num_users, seed=args.seed,
+                                 events_per_post=args.events_per_post)
+        for name, df in zip(["influencers", "posts", "tracking", "payouts"], datasets):
+            df.to_csv(os.path.join(args.output_dir, f"{name}.csv"), index=False)
+    else:
+        generate_vectorized(args.output_dir, args.num_influencers, args.num_posts, args.events_per_post,
+                            args.num_users, seed=args.seed, chunk_size=args.chunk_size, as_of=args.as_of)
+
+    print(f"✓ Wrote influencers, posts, tracking and payouts CSVs to {args.output_dir}")
+
 
-#Influencers dataset
-influencers = []
-for i in range(num_influencers):
-    influencer_id = f"INF{str(i+1).zfill(3)}"
-    name = generate_name()
-    gender = np.random.choice(genders, p=gender_weights)
-    category = random.choice(categories)
-    platform = np.random.choice(platforms, p=platform_weights)
-    followers = int(np.clip(np.random.normal(850_000, 1_800_000), 10_000, 10_000_000))
-    influencers.append([influencer_id, name, category, gender, followers, platform])
-
-influencers_df = pd.DataFrame(influencers, columns=["influencer_id", "name", "category", "gender", "follower_count", "platform"])
-
-# 2. Posts dataset
-posts = []
-for i in range(num_posts):
-    post_id = f"POST{str(i+1).zfill(3)}"
-    influencer = influencers_df.sample(1).iloc[0] #selects influencers from the database randomly
-    influencer_id = influencer["influencer_id"]
-    platform = influencer["platform"]
-    post_date = datetime.today() - timedelta(days=random.randint(1, 90)) #generates random dates
-    url = generate_url(i+1)
-    caption = f"Check out this amazing product! #{random.choice(categories)}"
-    reach = int(influencer["follower_count"] * np.random.uniform(0.1, 0.6))
-    likes = int(reach * np.random.uniform(0.05, 0.15))
-    comments = int(reach * np.random.uniform(0.005, 0.02))
-    posts.append([post_id, influencer_id, platform, post_date.strftime('%Y-%m-%d'), url, caption, reach, likes, comments])
-
-posts_df = pd.DataFrame(posts, columns=["post_id","influencer_id", "platform", "date", "URL", "caption", "reach", "likes", "comments"])
-
-# 3. Tracking data
-tracking = []
-for i in range(num_posts * 10):
-    post = posts_df.sample(1).iloc[0]
-    post_id = post["post_id"]
-    influencer_id = post["influencer_id"]
-    source = post["platform"]
-    campaign = f"Campaign_{random.randint(1,5)}" #assuming that each campaign has a serial associated with it
-    user_id = f"USER{random.randint(1, num_users)}" #randomly assinging user id
-    product = random.choice(list(products.keys())) #randomly selects the products from the products list (assuming that a post can lead to orders for any of the products)
-    date = post["date"]
-    orders = np.random.poisson(2)
-    revenue = round(orders * products[product] * np.random.uniform(0.9, 1.1), 2)
-    tracking.append([source, campaign, post_id, influencer_id, user_id, product, date, orders, revenue])
-
-tracking_df = pd.DataFrame(tracking, columns=["source", "campaign", "post_id", "influencer_id", "user_id", "product", "date", "orders", "revenue"])
-
-# 4. Payouts
-payouts = []
-for influencer_id in influencers_df["influencer_id"]:
-    basis = np.random.choice(["post", "order"])
-    rate = round(np.random.uniform(500, 5000), 2) if basis == "post" else round(np.random.uniform(50, 500), 2)
-    influencer_posts = posts_df[posts_df["influencer_id"] == influencer_id]
-    influencer_orders = tracking_df[tracking_df["influencer_id"] == influencer_id]["orders"].sum()
-    total_payout = len(influencer_posts) * rate if basis == "post" else influencer_orders * rate
-    payouts.append([influencer_id, basis, rate, influencer_orders, round(total_payout, 2)])
-
-payouts_df = pd.DataFrame(payouts, columns=["influencer_id", "basis", "rate", "orders", "total_payout"])
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,239 @@
+import json
+import numbers
 import os
-import io
 import time
-import numpy as np
-import pandas as pd
-import plotly.express as px
+from functools import partial
+
+# Cold start: only streamlit is imported before the Executive Summary is painted
+# from the pipeline's executive_kpis.json (a few bytes). pandas, the dashboard
+# modules and master_df follow, and the summary is then redrawn from the filtered
+# view. The sections below it are lazy expanders: their tables and chart
+# libraries are loaded only while they are open.
+STARTED = time.perf_counter()
+
 import streamlit as st
 
+from engineered_features.refresher import current_snapshot, read_manifest
+
 st.set_page_config(page_title="CycloMart Influencer Dashboard", layout="wide")
 
-# --------- Helpers
-@st.cache_data
-def load_csv(path):
-    return pd.read_csv(path)
-
-def try_load_default(name):
-    path = f"/content/{name}.csv"
-    if os.path.exists(path):
-        return load_csv(path)
-    return None
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", "/content")
+# Published by the background refresher (python -m engineered_features.refresher):
+# every rerun reads the CURRENT pointer, so sessions move to a new snapshot on
+# their next rerun and never see a partially written one
+SNAPSHOT_DIR = os.environ.get("DASHBOARD_SNAPSHOTS")
+SNAPSHOT = current_snapshot(SNAPSHOT_DIR) if SNAPSHOT_DIR else None
+if SNAPSHOT is not None:
+    DATA_DIR = SNAPSHOT
+UPLOAD_TYPES = ["csv", "parquet", "arrow", "feather"]
+# Memory cap for parsed uploads kept per browser session
+UPLOAD_CACHE_MB = int(os.environ.get("UPLOAD_CACHE_MB", 512))
+# Debug mode: per-section timings and cache hits (DASHBOARD_PROFILE=1 or ?profile=1),
+# optionally appended to a rolling JSON-lines log
+PROFILE = os.environ.get("DASHBOARD_PROFILE") == "1" or st.query_params.get("profile") == "1"
+PROFILE_LOG = os.environ.get("DASHBOARD_PROFILE_LOG")
+# Optional SQL backend: the embedded database written by the pipeline's --database.
+# Filters, roll-ups, the leaderboard and actions then run as queries on one shared
+# read-only connection pool instead of over an in-memory master_df
+DATABASE = os.environ.get("DASHBOARD_DATABASE")
+if DATABASE and SNAPSHOT is not None and not os.path.isabs(DATABASE):
+    # A relative database name refers to the copy inside the live snapshot
+    DATABASE = os.path.join(SNAPSHOT, DATABASE)
+DATABASE_POOL_SIZE = int(os.environ.get("DASHBOARD_DATABASE_POOL", 4))
+# Sections open on first load (comma-separated titles, or "all"); the others run when expanded
+OPEN_SECTIONS = {s.strip() for s in os.environ.get("DASHBOARD_OPEN_SECTIONS", "Influencer Performance").split(",")}
+
+# --------- Helpers (no pandas needed)
+def read_kpi_artifact(directory):
+    # The pipeline's executive_kpis.json, unless a master_df next to it is newer
+    path = os.path.join(directory, "executive_kpis.json")
+    try:
+        written = os.path.getmtime(path)
+        with open(path) as f:
+            kpis = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if any(e.name.startswith("master_df.") and e.stat().st_mtime > written for e in os.scandir(directory)):
+        return None
+    return kpis
 
 def kpi_card(label, value, help_text=None, fmt="{:,.0f}"):
     with st.container(border=True):
         st.caption(label)
-        if isinstance(value, (int, float, np.integer, np.floating)):
+        if isinstance(value, numbers.Number):
             st.markdown(f"### {fmt.format(value)}")
         else:
             st.markdown(f"### {value}")
         if help_text:
             st.caption(help_text)
 
-# --------- Sidebar: Data & Filters
+def render_summary(placeholder, total_revenue, overall_roas, active_campaigns, total_influencers):
+    # Drawn into an st.empty, so the filtered figures replace the precomputed ones in place
+    with placeholder.container():
+        k1, k2, k3, k4 = st.columns(4)
+        with k1:
+            kpi_card("Total Revenue", total_revenue, fmt="₹{:,.0f}")
+        with k2:
+            kpi_card("Overall ROAS", overall_roas, fmt="{:,.2f}x")
+        with k3:
+            kpi_card("Active Campaigns", active_campaigns)
+        with k4:
+            kpi_card("Total Influencers", total_influencers)
+
+def section(title):
+    # Lazy expander: with on_change="rerun" its .open state is tracked per session,
+    # and the body below it only runs while it is open
+    return st.expander(title, expanded=title in OPEN_SECTIONS or "all" in OPEN_SECTIONS,
+                       key=f"section:{title}", on_change="rerun")
+
+# --------- Sidebar: Data
 st.sidebar.header("Data")
-st.sidebar.write("Load CSVs (or leave blank to use defaults if saved by the notebook).")
+st.sidebar.write("Load CSV/Parquet/Arrow files (or leave blank to use defaults if saved by the pipeline).")
+if SNAPSHOT is not None:
+    manifest = read_manifest(SNAPSHOT) or {}
+    st.sidebar.caption(f"Data snapshot {manifest.get('version', os.path.basename(SNAPSHOT))}")
+
+u_master = st.sidebar.file_uploader("master_df", type=UPLOAD_TYPES)
+u_tracking = st.sidebar.file_uploader("tracking_df", type=UPLOAD_TYPES)
+
+# ---------------- Row 1: Executive Summary, painted before anything is loaded
+st.markdown("## Executive Summary")
+summary = st.empty()
+kpis = read_kpi_artifact(DATA_DIR) if u_master is None else None
+first_paint = None
+if kpis is not None:
+    # The figures of the unfiltered view (the pipeline totals also count influencers without posts)
+    opening = kpis.get("opening_view", kpis)
+    render_summary(summary, opening["total_revenue"], opening["overall_roas"], kpis["active_campaigns"],
+                   opening["total_influencers"])
+    first_paint = time.perf_counter()
+
+import pandas as pd
 
-u_master = st.sidebar.file_uploader("master_df.csv", type=["csv"])
-u_platform = st.sidebar.file_uploader("platform_performance.csv", type=["csv"])
-u_persona = st.sidebar.file_uploader("persona_performance.csv", type=["csv"])
-u_tracking = st.sidebar.file_uploader("tracking_df.csv", type=["csv"])
+from dashboard.aggregations import RollupService, filter_signature
+from dashboard.filters import FilterIndex
+from dashboard.leaderboard import Leaderboard
+from dashboard.profiling import SectionProfiler, append_log
+from dashboard import exports, scatter, trends
+from dashboard.sql_backend import ConnectionPool, SqlBackend
+from dashboard.uploads import UploadCache
+from engineered_features import actions as action_engine
+from engineered_features.schema import apply_schema
+from engineered_features.storage import find_table, read_table
+
+# ROAS vs Engagement level of detail: WebGL above the first count, density + top points above the second
+SCATTER_WEBGL_AT = int(os.environ.get("SCATTER_WEBGL_AT", scatter.WEBGL_AT))
+SCATTER_DENSITY_AT = int(os.environ.get("SCATTER_DENSITY_AT", scatter.DENSITY_AT))
+SCATTER_POINT_BUDGET = int(os.environ.get("SCATTER_POINT_BUDGET", scatter.POINT_BUDGET))
+prof = SectionProfiler(enabled=PROFILE, started=STARTED)
+if first_paint is not None:
+    prof.milestone("first_paint", at=first_paint)
 
-# Load priority: uploaded → default path → error
+# --------- Helpers
+@st.cache_data(max_entries=32)
+def load_csv(path, columns=None):
+    # Any supported format; Parquet/Arrow are memory-mapped and keep their dtypes
+    prof.miss("load_csv")
+    return read_table(path, columns=columns, date_errors='coerce')
+
+def try_load_default(name, columns=None):
+    path = find_table(DATA_DIR, name)
+    if path is not None:
+        return prof.cached("load_csv", load_csv, path, columns)
+    return None
+
+@st.cache_resource(max_entries=4)
+def get_filter_index(dataset_key, _load_master):
+    # Built once per loaded dataset (key = path + mtime; uploads go through
+    # dataset_resource) and shared across reruns; master_df is only read on a miss and never copied after.
+    # The compact schema (categoricals, int32 counts) is applied once here
+    prof.miss("filter_index")
+    return FilterIndex(apply_schema(_load_master(), "master"))
+
+@st.cache_resource(max_entries=4)
+def get_sql_backend(dataset_key, path):
+    # One connection pool per database file (key = path + mtime), shared by every session
+    prof.miss("sql_backend")
+    return SqlBackend(ConnectionPool(path, DATABASE_POOL_SIZE))
+
+@st.cache_resource(max_entries=4)
+def get_leaderboard(dataset_key, _master_df):
+    # Holds the precomputed ROAS ordering of this dataset
+    prof.miss("leaderboard")
+    return Leaderboard(_master_df)
+
+@st.cache_resource(max_entries=4)
+def get_payout_sketch(dataset_key, _load_rows):
+    # Payout bucket counts per platform x category x tier x performance cell
+    prof.miss("payout_sketch")
+    return action_engine.payout_sketch(_load_rows())
+
+@st.cache_resource(max_entries=4)
+def get_rollup_service(dataset_key):
+    # Bounded LRU of platform/persona/category roll-ups per filter signature
+    prof.miss("rollup_service")
+    return RollupService(max_entries=64)
+
+def dataset_resource(name, get_resource, *args):
+    # Objects derived from master_df. Files on disk share them across sessions through
+    # st.cache_resource; an upload's stay in this session's upload cache
+    if u_master is not None:
+        return upload_cache.resource(u_master, name, lambda: get_resource.__wrapped__(master_key, *args))
+    return prof.cached(name, get_resource, master_key, *args)
+
+# --------- Load & Filters
+prof.mark("Load & filter")
+# Uploads are parsed once per distinct content, not on every widget interaction
+if "upload_cache" not in st.session_state:
+    st.session_state["upload_cache"] = UploadCache(UPLOAD_CACHE_MB * 1024 * 1024)
+upload_cache = st.session_state["upload_cache"]
+prof.track("uploads", upload_cache)
+
+# Load priority: uploaded → database (SQL backend) → default path → error
+backend = None
 if u_master is not None:
-    master_df = pd.read_csv(u_master)
+    master_key = f"upload:{upload_cache.content_key(u_master)}"
+    load_master = lambda: upload_cache.load(u_master)
+elif DATABASE and os.path.exists(DATABASE):
+    master_key = f"{DATABASE}:{os.path.getmtime(DATABASE)}"
+    backend = prof.cached("sql_backend", get_sql_backend, master_key, DATABASE)
 else:
-    df_ = try_load_default("master_df")
-    if df_ is None:
+    master_path = find_table(DATA_DIR, "master_df")
+    if master_path is None:
         st.stop()
-    master_df = df_
-
-if u_platform is not None:
-    platform_performance = pd.read_csv(u_platform)
-else:
-    platform_performance = try_load_default("platform_performance")
-
-if u_persona is not None:
-    persona_performance = pd.read_csv(u_persona)
+    master_key = f"{master_path}:{os.path.getmtime(master_path)}"
+    load_master = lambda: prof.cached("load_csv", load_csv, master_path)
+if backend is None:
+    filter_index = dataset_resource("filter_index", get_filter_index, load_master)
+    master_df = filter_index.master_df
+    master_columns = master_df.columns
 else:
-    persona_performance = try_load_default("persona_performance")
+    master_columns = backend.columns
+# Sidebar options and date bounds come from whichever holds the data
+source = filter_index if backend is None else backend
 
-if u_tracking is not None:
-    tracking_df = pd.read_csv(u_tracking)
-else:
-    tracking_df = try_load_default("tracking_df")
+# Platform and persona tables are recomputed from the filtered view (roll-ups below),
+# and the tracking cube is only read by the Trends section, when it is open
+# (the SQL backend queries its own copies)
+has_cube = backend.has_cube if backend is not None else find_table(DATA_DIR, "tracking_cube") is not None
 
 # Ensure expected cols exist (soft checks)
 needed_master = {"influencer_id","name","platform","category","follower_count","roas","total_revenue",
                  "total_payout","total_orders","total_reach","total_likes","total_comments",
                  "engagement_rate","conversion_rate","efficiency_score","performance_category",
                  "follower_tier","persona_combination"}
-missing = [c for c in needed_master if c not in master_df.columns]
+missing = [c for c in needed_master if c not in master_columns]
 if missing:
     st.warning(f"master_df is missing columns: {missing}. Some charts may not render.")
 
 # Filters
 st.sidebar.header("Filters")
-brands = master_df["brand"].dropna().unique().tolist() if "brand" in master_df.columns else []
-products = master_df["product"].dropna().unique().tolist() if "product" in master_df.columns else []
-platforms = master_df["platform"].dropna().unique().tolist()
-categories = master_df["category"].dropna().unique().tolist()
-tiers = master_df["follower_tier"].dropna().unique().tolist() if "follower_tier" in master_df.columns else []
-perf_cats = master_df["performance_category"].dropna().unique().tolist() if "performance_category" in master_df.columns else []
+brands = source.options("brand")
+products = source.options("product")
+platforms = source.options("platform")
+categories = source.options("category")
+tiers = source.options("follower_tier")
+perf_cats = source.options("performance_category")
 
 f_brand = st.sidebar.multiselect("Brand", options=brands, default=brands if brands else [])
 f_product = st.sidebar.multiselect("Product", options=products, default=products if products else [])
@@ -88,8 +243,7 @@ f_tier = st.sidebar.multiselect("Influencer Tier", options=tiers, default=tiers
 f_perf = st.sidebar.multiselect("Performance Category", options=perf_cats, default=perf_cats if perf_cats else [])
 
 # Date filter (based on first/last_post_date if present)
-date_min = pd.to_datetime(master_df.get("first_post_date")).min() if "first_post_date" in master_df.columns else None
-date_max = pd.to_datetime(master_df.get("last_post_date")).max() if "last_post_date" in master_df.columns else None
+date_min, date_max = source.date_bounds()
 if date_min is not None and pd.notna(date_min) and date_max is not None and pd.notna(date_max):
     dr = st.sidebar.date_input("Date Range (by post window)", value=(date_min.date(), date_max.date()))
     if isinstance(dr, tuple) and len(dr) == 2:
@@ -99,238 +253,322 @@ if date_min is not None and pd.notna(date_min) and date_max is not None and pd.n
 else:
     d_start = d_end = None
 
-# Apply filters
-df = master_df.copy()
-if f_brand and "brand" in df.columns:
-    df = df[df["brand"].isin(f_brand)]
-if f_product and "product" in df.columns:
-    df = df[df["product"].isin(f_product)]
-if f_platform:
-    df = df[df["platform"].isin(f_platform)]
-if f_category:
-    df = df[df["category"].isin(f_category)]
-if f_tier:
-    df = df[df["follower_tier"].isin(f_tier)]
-if f_perf:
-    df = df[df["performance_category"].isin(f_perf)]
-if d_start is not None and d_end is not None and "first_post_date" in df.columns and "last_post_date" in df.columns:
-    df["first_post_date"] = pd.to_datetime(df["first_post_date"], errors="coerce")
-    df["last_post_date"] = pd.to_datetime(df["last_post_date"], errors="coerce")
-    df = df[(df["last_post_date"] >= d_start) & (df["first_post_date"] <= d_end)]
-
-# ---------------- Row 1: Executive Summary (4 KPI cards)
-st.markdown("## Executive Summary")
-k1, k2, k3, k4 = st.columns(4)
-with k1:
-    kpi_card("Total Revenue", df["total_revenue"].sum(), fmt="₹{:,.0f}")
-with k2:
+# Investment recommendation rules
+with st.sidebar.expander("Action thresholds"):
+    defaults = action_engine.DEFAULT_THRESHOLDS
+    thresholds = {
+        "invest_min_roas": st.number_input("Invest More: min ROAS", value=defaults["invest_min_roas"], step=0.5),
+        "invest_payout_quantile": st.slider("Invest More: max payout percentile", 0.0, 1.0, defaults["invest_payout_quantile"], 0.05),
+        "optimize_max_roas": st.number_input("Optimize: ROAS below", value=defaults["optimize_max_roas"], step=0.5),
+        "optimize_payout_quantile": st.slider("Optimize: min payout percentile", 0.0, 1.0, defaults["optimize_payout_quantile"], 0.05),
+        "top_n": st.number_input("Influencers per group", min_value=1, value=defaults["top_n"], step=1),
+        "seed": st.number_input("Monitor selection seed", min_value=0, value=defaults["seed"], step=1),
+    }
+
+# Apply filters: AND the per-column masks, then materialize the view once
+selections = {
+    "brand": f_brand,
+    "product": f_product,
+    "platform": f_platform,
+    "category": f_category,
+    "follower_tier": f_tier,
+    "performance_category": f_perf,
+}
+if backend is None:
+    mask = filter_index.mask(selections, d_start, d_end)
+    df = filter_index.view(mask)
+    n_rows = len(df)
+else:
+    # One parameterized WHERE clause; sections query only what they show
+    where = backend.where(selections, d_start, d_end)
+    view_totals = backend.totals(where)
+    n_rows = view_totals[3]
+
+# Roll-ups shared by the sections and exports below (memoized per filter state), built
+# by the first open section that needs them.
+# The unfiltered default dataset reads them straight from the pipeline's rollups table
+rollup_service = dataset_resource("rollup_service", get_rollup_service)
+prof.track("rollups", rollup_service)
+signature = filter_signature(master_key, selections, d_start, d_end)
+
+def section_rollups():
+    if backend is not None:
+        return rollup_service.lookup(signature, lambda: backend.rollups(where, unfiltered=n_rows == backend.size))
+    unfiltered = df is master_df and u_master is None
+    return rollup_service.get(signature, df, table=try_load_default("rollups") if unfiltered else None)
+
+# ---------------- Row 1: Executive Summary (4 KPI cards), now from the filtered view
+prof.mark("Executive Summary")
+if backend is None:
+    total_revenue = df["total_revenue"].sum()
     total_payout = df["total_payout"].sum()
-    overall_roas = (df["total_revenue"].sum() / total_payout) if total_payout > 0 else 0
-    kpi_card("Overall ROAS", overall_roas, fmt="{:,.2f}x")
-with k3:
-    if tracking_df is not None and "campaign" in tracking_df.columns:
-        active_campaigns = tracking_df["campaign"].nunique()
-    else:
-        active_campaigns = int(df.get("campaigns_count", pd.Series([0])).sum())
-    kpi_card("Active Campaigns", active_campaigns)
-with k4:
-    kpi_card("Total Influencers", df["influencer_id"].nunique())
+    total_influencers = df["influencer_id"].nunique()
+else:
+    total_revenue, total_payout, total_influencers, _ = view_totals
+overall_roas = (total_revenue / total_payout) if total_payout > 0 else 0
+# Active Campaigns is not filtered: an uploaded tracking_df, else the pipeline's count
+# (so the tracking table is not read at all), else the database, tracking_df or cube
+tracking_df = upload_cache.load(u_tracking, columns=["campaign"]) if u_tracking is not None else None
+if tracking_df is not None and "campaign" in tracking_df.columns:
+    active_campaigns = tracking_df["campaign"].nunique()
+elif kpis is not None:
+    active_campaigns = kpis["active_campaigns"]
+elif backend is not None:
+    active_campaigns = backend.active_campaigns() or 0
+elif (tracking_df := try_load_default("tracking_df", columns=["campaign"])) is not None:
+    active_campaigns = tracking_df["campaign"].nunique()
+elif has_cube:
+    active_campaigns = try_load_default("tracking_cube")["campaign"].nunique()
+else:
+    active_campaigns = int(df.get("campaigns_count", pd.Series([0])).sum())
 
-st.divider()
+prof.mark("Executive Summary", "chart")
+render_summary(summary, total_revenue, overall_roas, active_campaigns, total_influencers)
+prof.milestone("summary")
 
 # ---------------- Row 2: Influencer-Level (Leaderboard + Scatter)
-st.markdown("## Influencer Performance")
-
-c1, c2 = st.columns([2, 1], gap="large")
-
-with c1:
-    st.subheader("Leaderboard")
-    cols = [c for c in ["name","platform","category","roas","total_revenue","engagement_rate","total_payout","total_orders"] if c in df.columns]
-    table_df = df[cols].copy().sort_values("roas", ascending=False).reset_index(drop=True)
-    st.dataframe(table_df, use_container_width=True, height=420)
-
-with c2:
-    st.subheader("ROAS vs Engagement")
-    if {"engagement_rate","roas"}.issubset(df.columns):
-        scatter_df = df.dropna(subset=["engagement_rate","roas"]).copy()
-        scatter_df["bubble_size"] = np.clip(scatter_df.get("total_revenue", 0), 1, None)
-        color_col = "performance_category" if "performance_category" in scatter_df.columns else "platform"
-        fig = px.scatter(
-            scatter_df, x="engagement_rate", y="roas",
-            size="bubble_size", color=color_col,
-            hover_data=["name","platform","total_revenue"],
-            size_max=40, title=None
-        )
-        fig.update_layout(margin=dict(l=10,r=10,t=10,b=10))
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Need columns: engagement_rate, roas.")
-
-st.divider()
+performance = section("Influencer Performance")
+if performance.open:
+    c1, c2 = performance.columns([2, 1], gap="large")
+
+    with c1:
+        st.subheader("Leaderboard")
+        # Only the visible page is selected and sent; sorting happens server-side
+        prof.mark("Influencer Performance")
+        if backend is None:
+            leaderboard, rows = dataset_resource("leaderboard", get_leaderboard, master_df), mask
+        else:
+            leaderboard, rows = backend, where
+        if leaderboard.sort_columns:
+            l1, l2, l3 = st.columns([2, 1, 1])
+            sort_by = l1.selectbox("Sort by", leaderboard.sort_columns)
+            ascending = l2.selectbox("Order", ["Descending", "Ascending"]) == "Ascending"
+            page_size = l3.selectbox("Rows per page", [25, 50, 100], index=1)
+        else:
+            sort_by, ascending, page_size = None, False, 50
+        n_pages = max(1, -(-n_rows // page_size))
+        page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1) - 1
+        table_df, total_rows = leaderboard.page(rows, sort_by, ascending, page, page_size)
+        prof.mark("Influencer Performance", "chart")
+        st.dataframe(table_df, use_container_width=True, height=420)
+        st.caption(f"Rows {page * page_size + 1 if total_rows else 0:,}–{page * page_size + len(table_df):,} of {total_rows:,}")
+
+    with c2:
+        st.subheader("ROAS vs Engagement")
+        if {"engagement_rate","roas"}.issubset(master_columns):
+            color_col = "performance_category" if "performance_category" in master_columns else "platform"
+            # SVG bubbles, WebGL, or binned density + top outliers depending on the point count
+            if backend is None:
+                fig, mode = scatter.scatter_figure(df, color_col, SCATTER_WEBGL_AT, SCATTER_DENSITY_AT, SCATTER_POINT_BUDGET)
+            else:
+                fig, mode = backend.scatter_figure(where, color_col, SCATTER_WEBGL_AT, SCATTER_DENSITY_AT,
+                                                   SCATTER_POINT_BUDGET)
+            fig.update_layout(margin=dict(l=10,r=10,t=10,b=10))
+            st.plotly_chart(fig, use_container_width=True)
+            if mode == "density":
+                st.caption(f"{n_rows:,} influencers: density shown, top {SCATTER_POINT_BUDGET:,} by revenue as points.")
+        else:
+            st.info("Need columns: engagement_rate, roas.")
 
 # ---------------- Row 3: Platform & Persona (side-by-side)
-st.markdown("## Platform & Persona Insights")
-p1, p2 = st.columns(2, gap="large")
-
-with p1:
-    st.subheader("Platform Performance")
-    # Bars: ROAS by platform
-    if "platform" in df.columns and {"total_revenue","total_payout"}.issubset(df.columns):
-        plat = df.groupby("platform", as_index=False).agg(
-            total_revenue=("total_revenue","sum"),
-            total_payout=("total_payout","sum"),
-            total_orders=("total_orders","sum"),
-            total_reach=("total_reach","sum"),
-            influencer_count=("name","count")
-        )
-        plat["platform_roas"] = np.where(plat["total_payout"]>0, plat["total_revenue"]/plat["total_payout"], 0)
-        plat["revenue_share"] = np.where(plat["total_revenue"].sum()>0, plat["total_revenue"]/plat["total_revenue"].sum()*100, 0)
-
-        fig1 = px.bar(plat.sort_values("platform_roas", ascending=False),
-                      x="platform", y="platform_roas", text="platform_roas")
-        fig1.update_traces(texttemplate="%{text:.2f}x", textposition="outside", cliponaxis=False)
-        fig1.update_layout(yaxis_title="ROAS", xaxis_title="", margin=dict(l=10,r=10,t=10,b=10), height=320)
-        st.plotly_chart(fig1, use_container_width=True)
-
-        # Donut: revenue share
-        fig2 = px.pie(plat, values="total_revenue", names="platform", hole=0.5)
-        fig2.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=320)
-        st.plotly_chart(fig2, use_container_width=True)
-    else:
-        st.info("Need platform, total_revenue, total_payout in master_df.")
-
-with p2:
-    st.subheader("Persona Insights")
-    if "persona_combination" in df.columns and "roas" in df.columns:
-        persona_mean = df.groupby("persona_combination", as_index=False).agg(
-            avg_roas=("roas","mean"),
-            efficiency_score=("efficiency_score","mean"),
-            revenue=("total_revenue","sum"),
-            influencer_count=("name","count")
-        )
-        persona_mean = persona_mean.sort_values("avg_roas", ascending=False)
-
-        # Heatmap-like bar for Avg ROAS by persona
-        fig3 = px.bar(persona_mean, x="persona_combination", y="avg_roas", hover_data=["efficiency_score","revenue","influencer_count"])
-        fig3.update_layout(xaxis_title="", yaxis_title="Avg ROAS", xaxis_tickangle=45, margin=dict(l=10,r=10,t=10,b=10), height=320)
-        st.plotly_chart(fig3, use_container_width=True)
-
-        # Supporting table
-        show_cols = ["persona_combination","avg_roas","efficiency_score","revenue","influencer_count"]
-        st.dataframe(persona_mean[show_cols], use_container_width=True, height=260)
-    else:
-        st.info("Need persona_combination and roas in master_df.")
-
-st.divider()
+platform_persona = section("Platform & Persona Insights")
+if platform_persona.open:
+    prof.mark("Platform & Persona")
+    import plotly.express as px
+    rollups = section_rollups()
+    prof.mark("Platform & Persona", "chart")
+    p1, p2 = platform_persona.columns(2, gap="large")
+
+    with p1:
+        st.subheader("Platform Performance")
+        # Bars: ROAS by platform
+        plat = rollups["platform"]
+        if plat is not None:
+            fig1 = px.bar(plat.sort_values("platform_roas", ascending=False),
+                          x="platform", y="platform_roas", text="platform_roas")
+            fig1.update_traces(texttemplate="%{text:.2f}x", textposition="outside", cliponaxis=False)
+            fig1.update_layout(yaxis_title="ROAS", xaxis_title="", margin=dict(l=10,r=10,t=10,b=10), height=320)
+            st.plotly_chart(fig1, use_container_width=True)
+
+            # Donut: revenue share
+            fig2 = px.pie(plat, values="total_revenue", names="platform", hole=0.5)
+            fig2.update_layout(margin=dict(l=10,r=10,t=10,b=10), height=320)
+            st.plotly_chart(fig2, use_container_width=True)
+        else:
+            st.info("Need platform, total_revenue, total_payout in master_df.")
+
+    with p2:
+        st.subheader("Persona Insights")
+        persona_mean = rollups["persona"]
+        if persona_mean is not None:
+            # Heatmap-like bar for Avg ROAS by persona
+            fig3 = px.bar(persona_mean, x="persona_combination", y="avg_roas", hover_data=["efficiency_score","revenue","influencer_count"])
+            fig3.update_layout(xaxis_title="", yaxis_title="Avg ROAS", xaxis_tickangle=45, margin=dict(l=10,r=10,t=10,b=10), height=320)
+            st.plotly_chart(fig3, use_container_width=True)
+
+            # Supporting table
+            show_cols = ["persona_combination","avg_roas","efficiency_score","revenue","influencer_count"]
+            st.dataframe(persona_mean[show_cols], use_container_width=True, height=260)
+        else:
+            st.info("Need persona_combination and roas in master_df.")
 
 # ---------------- Row 4: Category Insights (3 columns L→R)
-st.markdown("## Category Insights")
-cL, cC, cR = st.columns(3, gap="large")
-
-with cL:
-    st.subheader("Avg ROAS by Category")
-    if {"category","roas"}.issubset(df.columns):
-        cat = df.groupby("category", as_index=False).agg(avg_roas=("roas","mean"))
-        fig = px.bar(cat.sort_values("avg_roas", ascending=True), x="avg_roas", y="category", orientation="h", text="avg_roas")
-        fig.update_traces(texttemplate="%{text:.2f}x")
-        fig.update_layout(xaxis_title="Avg ROAS", yaxis_title="", margin=dict(l=10,r=10,t=10,b=10), height=360)
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Need category and roas.")
-
-with cC:
-    st.subheader("Engagement Rate by Category")
-    if {"category","engagement_rate"}.issubset(df.columns):
-        cat_e = df.groupby("category", as_index=False).agg(avg_eng=("engagement_rate","mean"))
-        fig = px.bar(cat_e.sort_values("avg_eng", ascending=False), x="category", y="avg_eng", text="avg_eng")
-        fig.update_traces(texttemplate="%{text:.2f}%")
-        fig.update_layout(xaxis_title="", yaxis_title="Engagement Rate (%)", margin=dict(l=10,r=10,t=10,b=10), height=360)
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Need category and engagement_rate.")
-
-with cR:
-    st.subheader("Category Summary")
-    have_cols = [c for c in ["category","total_revenue","roas","engagement_rate","name"] if c in df.columns]
-    if set(["category"]).issubset(have_cols):
-        cat_tbl = df.groupby("category", as_index=False).agg(
-            revenue=("total_revenue","sum") if "total_revenue" in df.columns else ("category","count"),
-            avg_roas=("roas","mean") if "roas" in df.columns else ("category","count"),
-            avg_eng=("engagement_rate","mean") if "engagement_rate" in df.columns else ("category","count"),
-            influencer_count=("name","count") if "name" in df.columns else ("category","count")
-        )
-        st.dataframe(cat_tbl.sort_values("avg_roas", ascending=False), use_container_width=True, height=360)
+category = section("Category Insights")
+if category.open:
+    prof.mark("Category")
+    import plotly.express as px
+    cat_tbl = section_rollups()["category"]
+    prof.mark("Category", "chart")
+    cL, cC, cR = category.columns(3, gap="large")
+
+    with cL:
+        st.subheader("Avg ROAS by Category")
+        if cat_tbl is not None and "avg_roas" in cat_tbl.columns:
+            cat = cat_tbl[["category","avg_roas"]]
+            fig = px.bar(cat.sort_values("avg_roas", ascending=True), x="avg_roas", y="category", orientation="h", text="avg_roas")
+            fig.update_traces(texttemplate="%{text:.2f}x")
+            fig.update_layout(xaxis_title="Avg ROAS", yaxis_title="", margin=dict(l=10,r=10,t=10,b=10), height=360)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Need category and roas.")
+
+    with cC:
+        st.subheader("Engagement Rate by Category")
+        if cat_tbl is not None and "avg_eng" in cat_tbl.columns:
+            cat_e = cat_tbl[["category","avg_eng"]]
+            fig = px.bar(cat_e.sort_values("avg_eng", ascending=False), x="category", y="avg_eng", text="avg_eng")
+            fig.update_traces(texttemplate="%{text:.2f}%")
+            fig.update_layout(xaxis_title="", yaxis_title="Engagement Rate (%)", margin=dict(l=10,r=10,t=10,b=10), height=360)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Need category and engagement_rate.")
+
+    with cR:
+        st.subheader("Category Summary")
+        if cat_tbl is not None:
+            sort_col = "avg_roas" if "avg_roas" in cat_tbl.columns else "influencer_count"
+            st.dataframe(cat_tbl.sort_values(sort_col, ascending=False), use_container_width=True, height=360)
+        else:
+            st.info("Need category plus revenue/roas/engagement_rate.")
+
+# ---------------- Row 5: Trends & Drill-down (from the tracking cube)
+trends_section = section("Trends")
+if trends_section.open:
+    if not has_cube:
+        trends_section.info("No tracking_cube found. Run the pipeline with --output-dir to enable trend views.")
     else:
-        st.info("Need category plus revenue/roas/engagement_rate.")
-
-st.divider()
-
-# ---------------- Row 5: Investment Recommendations (3 columns L→R)
-st.markdown("## Investment Recommendations")
-
-def build_actions(src):
-    if src.empty:
-        return pd.DataFrame(columns=["name","roas","total_payout","total_revenue","platform"])
-    q30 = src["total_payout"].quantile(0.30)
-    q70 = src["total_payout"].quantile(0.70)
-    invest_more = src[(src["roas"] >= 3.5) & (src["total_payout"] <= q30)].nlargest(5, "roas")[["name","roas","total_payout","total_revenue","platform"]]
-    optimize = src[(src["roas"] < 2.0) & (src["total_payout"] >= q70)].nsmallest(5, "roas")[["name","roas","total_payout","total_revenue","platform"]]
-    monitor = src[(src["roas"] >= 2.0) & (src["roas"] < 3.5)].copy()
-    if not monitor.empty:
-        monitor = monitor.sample(min(5, len(monitor)))[["name","roas","total_payout","total_revenue","platform"]]
+        import plotly.express as px
+        t1, t2, t3 = trends_section.columns(3)
+        grain = t1.selectbox("Grain", list(trends.GRAINS), index=1)
+        by_label = t2.selectbox("Split by", list(trends.DIMENSIONS))
+        metric_label = t3.selectbox("Metric", list(trends.METRICS))
+        by, metric = trends.DIMENSIONS[by_label], trends.METRICS[metric_label]
+
+        prof.mark("Trends")
+        if backend is None:
+            # Daily date x source x campaign x product x influencer cube from the pipeline
+            cube_view = trends.restrict_cube(try_load_default("tracking_cube"), df["influencer_id"])
+        else:
+            cube_view = backend.cube_view(where, [by])
+        trend_df = trends.trend(cube_view, grain, by, metric)
+        prof.mark("Trends", "chart")
+        fig = px.line(trend_df, x="period", y=metric, color=by, markers=True)
+        fig.update_layout(xaxis_title="", yaxis_title=metric_label, margin=dict(l=10,r=10,t=10,b=10), height=360)
+        trends_section.plotly_chart(fig, use_container_width=True)
+
+        d1, d2 = trends_section.columns([1, 2], gap="large")
+        with d1:
+            prof.mark("Trends")
+            values = trends.ranked_values(cube_view, by, metric)
+            drill_value = st.selectbox(f"Drill into {by_label}", values) if values else None
+            drill_label = st.selectbox("Break down by", [d for d in trends.DIMENSIONS if d != by_label])
+        with d2:
+            if drill_value is not None:
+                drill_by = trends.DIMENSIONS[drill_label]
+                drill_cube = cube_view if backend is None else backend.cube_view(where, [by, drill_by])
+                drill_df = trends.drill_down(drill_cube, by, drill_value, drill_by, metric)
+                prof.mark("Trends", "chart")
+                st.dataframe(drill_df, use_container_width=True, height=300)
+
+# ---------------- Row 6: Investment Recommendations (3 columns L→R)
+recommendations = section("Investment Recommendations")
+if recommendations.open:
+    prof.mark("Investment Recommendations")
+
+    # Payout percentiles come from the per-cell payout sketch when the filter state
+    # only touches sketch dimensions; a narrowed date window needs the exact rows.
+    # The sketch covers the rows inside the full date window, like the unfiltered view
+    # The SQL backend takes exact percentiles in the database instead.
+    def build_actions():
+        if backend is not None:
+            return backend.actions(where if n_rows else backend.where({}), thresholds)
+        sketch_selections = {col: sel for col, sel in selections.items() if sel and col in filter_index.codes}
+        date_narrowed = d_start is not None and (d_start > date_min.normalize() or d_end < date_max.normalize())
+        payout_quantiles = None
+        if not df.empty and not date_narrowed and set(sketch_selections) <= set(action_engine.SKETCH_DIMENSIONS):
+            payout_quantiles = action_engine.sketch_quantiles(
+                dataset_resource("payout_sketch", get_payout_sketch,
+                                 lambda: filter_index.view(filter_index.mask({}, date_min, date_max))),
+                [thresholds["invest_payout_quantile"], thresholds["optimize_payout_quantile"]],
+                sketch_selections)
+        return action_engine.select_actions(df if not df.empty else master_df, thresholds, payout_quantiles)
+
+    # Memoized with the roll-ups: an unchanged filter state and thresholds reuse the picks
+    i_df, o_df, m_df = rollup_service.actions(signature, thresholds, build_actions)
+
+    prof.mark("Investment Recommendations", "chart")
+    a, b, c = recommendations.columns(3, gap="large")
+    with a:
+        st.subheader("Invest More")
+        st.dataframe(i_df, use_container_width=True, height=260)
+    with b:
+        st.subheader("Optimize")
+        st.dataframe(o_df, use_container_width=True, height=260)
+    with c:
+        st.subheader("Monitor")
+        st.dataframe(m_df, use_container_width=True, height=260)
+
+# ---------------- Exports: download buttons, each file built in memory only when clicked
+export = section("Export")
+if export.open:
+    prof.mark("Export")
+    export_format = export.selectbox("Format", exports.available_formats())
+    ext, mime = exports.EXPORT_FORMATS[export_format]
+    # Streamed in chunks: slices of the in-memory view, or batches of the database query
+    if backend is None:
+        master_chunks = partial(exports.frame_chunks, df)
     else:
-        monitor = monitor.reindex(columns=["name","roas","total_payout","total_revenue","platform"])
-    return invest_more, optimize, monitor
-
-i_df, o_df, m_df = build_actions(df if not df.empty else master_df)
-
-a, b, c = st.columns(3, gap="large")
-with a:
-    st.subheader("Invest More")
-    st.dataframe(i_df, use_container_width=True, height=260)
-with b:
-    st.subheader("Optimize")
-    st.dataframe(o_df, use_container_width=True, height=260)
-with c:
-    st.subheader("Monitor")
-    st.dataframe(m_df, use_container_width=True, height=260)
-
-st.divider()
-
-# ---------------- Optional Exports
-st.markdown("### Export")
-colx, coly, colz = st.columns(3)
-with colx:
-    if st.button("Export filtered master_df CSV"):
-        df.to_csv("filtered_master_df.csv", index=False)
-        st.success("Saved filtered_master_df.csv")
-
-with coly:
-    # Rebuild platform metrics on filtered df for export
-    if {"platform","total_revenue","total_payout"}.issubset(df.columns):
-        plat = df.groupby("platform", as_index=False).agg(
-            total_revenue=("total_revenue","sum"),
-            total_payout=("total_payout","sum"),
-            total_orders=("total_orders","sum"),
-            total_reach=("total_reach","sum"),
-            influencer_count=("name","count")
-        )
-        plat["platform_roas"] = np.where(plat["total_payout"]>0, plat["total_revenue"]/plat["total_payout"], 0)
-        plat["revenue_share"] = np.where(plat["total_revenue"].sum()>0, plat["total_revenue"]/plat["total_revenue"].sum()*100, 0)
-        if st.button("Export platform_performance CSV"):
-            plat.to_csv("platform_performance_filtered.csv", index=False)
-            st.success("Saved platform_performance_filtered.csv")
-with colz:
-    # Rebuild persona metrics on filtered df for export
-    if {"persona_combination","roas"}.issubset(df.columns):
-        persona_mean = df.groupby("persona_combination", as_index=False).agg(
-            avg_roas=("roas","mean"),
-            efficiency_score=("efficiency_score","mean"),
-            revenue=("total_revenue","sum"),
-            influencer_count=("name","count")
-        )
-        if st.button("Export persona_performance CSV"):
-            persona_mean.to_csv("persona_performance_filtered.csv", index=False)
-            st.success("Saved persona_performance_filtered.csv")
+        master_chunks = partial(backend.select_chunks, where)
+    # Platform and persona tables are the memoized roll-ups the sections above use
+    rollups = section_rollups()
+    colx, coly, colz = export.columns(3)
+    with colx:
+        too_long = export_format == "Excel" and n_rows > exports.EXCEL_MAX_ROWS
+        st.download_button("Download filtered master_df", data=exports.deferred(master_chunks, export_format, "master_df"),
+                           file_name=f"filtered_master_df{ext}", mime=mime, on_click="ignore", disabled=too_long,
+                           help="Too many rows for one Excel sheet" if too_long else None)
+    for col, name, title in [(coly, "platform", "platform_performance"), (colz, "persona", "persona_performance")]:
+        with col:
+            if rollups[name] is not None:
+                st.download_button(f"Download {title}",
+                                   data=exports.deferred(partial(exports.frame_chunks, rollups[name]), export_format, title),
+                                   file_name=f"{title}_filtered{ext}", mime=mime, on_click="ignore")
 
 st.caption("Tip: For permanent sharing, push this app to a GitHub repo and deploy on Streamlit Community Cloud.")
+
+# ---------------- Debug: per-section profile of this rerun
+prof.mark(None)
+prof.milestone("ready")
+if prof.enabled:
+    run_record = prof.record()
+    with st.expander(f"Profiling: this rerun took {run_record['total_ms']:,.0f} ms"):
+        milestones = run_record["milestones"]
+        st.caption(f"Executive Summary painted after {milestones.get('first_paint', milestones['summary']):,.0f} ms "
+                   f"({'precomputed' if 'first_paint' in milestones else 'computed'}), "
+                   f"filtered after {milestones['summary']:,.0f} ms, page ready after {milestones['ready']:,.0f} ms")
+        st.caption("Section timings (data = filtering and aggregation, chart = figure building and rendering)")
+        st.dataframe(prof.sections(), use_container_width=True)
+        st.caption("Cache lookups")
+        st.dataframe(prof.caches(), use_container_width=True)
+    if PROFILE_LOG:
+        append_log(PROFILE_LOG, run_record)
@@ -0,0 +1 @@
+"""Benchmarks for the pipeline stages and dashboard hot paths (python -m benchmarks.run)."""
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# Cold-start benchmark for the dashboard.
+# Every repeat starts a fresh interpreter (no imported modules, empty st.cache,
+# like a restarted or newly scaled-out container), runs app.py once through
+# streamlit's AppTest with the profiler on, then once more in the same process
+# (a warm rerun). The profiler's milestones are read back from its JSON-lines
+# log, in ms from the top of the script:
+#   first_paint  Executive Summary drawn from executive_kpis.json
+#   summary      Executive Summary redrawn from the filtered view
+#   ready        the whole page
+# ``process_ms`` is the wall time from spawning the interpreter to the end of
+# the cold run, harness imports included. Medians over --repeat are printed.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MILESTONES = ['first_paint', 'summary', 'ready']
+
+CHILD = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+at.run()
+print(time.perf_counter(), flush=True)
+at.run()
+if at.exception:
+    sys.exit('\\n'.join(e.value for e in at.exception))
+"""
+
+
+def run_once(app, data_dir, open_sections=None):
+    """Milestones of one cold run and its warm rerun, in a fresh interpreter."""
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, 'profile.jsonl')
+        env = {**os.environ, 'DASHBOARD_DATA_DIR': data_dir, 'DASHBOARD_PROFILE': '1', 'DASHBOARD_PROFILE_LOG': log,
+               'PYTHONPATH': os.pathsep.join(p for p in [ROOT, os.environ.get('PYTHONPATH')] if p)}
+        if open_sections is not None:
+            env['DASHBOARD_OPEN_SECTIONS'] = open_sections
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', CHILD, app], env=env, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"App run failed:\n{result.stderr.strip()[-2000:]}")
+        # perf_counter is system-wide on Linux, so the child's clock reading is comparable
+        cold_done = float(result.stdout.split()[0])
+        with open(log) as f:
+            cold, warm = [json.loads(line) for line in f][:2]
+    run = {'process_ms': round((cold_done - start) * 1000, 1)}
+    for name, record in [('cold', cold), ('warm', warm)]:
+        for milestone in MILESTONES:
+            run[f'{name}_{milestone}_ms'] = record['milestones'].get(milestone)
+        run[f'{name}_total_ms'] = record['total_ms']
+    return run
+
+
+def summarize(runs):
+    keys = runs[0].keys()
+    return {k: (round(statistics.median(v), 1) if (v := [r[k] for r in runs if r[k] is not None]) else None)
+            for k in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the dashboard's cold start in fresh interpreters.")
+    parser.add_argument('--data-dir', default='/content', help="pipeline output directory the app reads")
+    parser.add_argument('--app', default=os.path.join(ROOT, 'app.py'))
+    parser.add_argument('--repeat', type=int, default=3, help="fresh interpreters to start (medians are reported)")
+    parser.add_argument('--open-sections', default=None,
+                        help="DASHBOARD_OPEN_SECTIONS for the runs (default: the app's own default)")
+    parser.add_argument('--output', default=None, help="write results JSON here")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.repeat):
+        runs.append(run_once(args.app, args.data_dir, args.open_sections))
+        print(f"  run {i + 1}: " + ", ".join(f"{k} {v:,.0f}" for k, v in runs[-1].items() if v is not None))
+    median = summarize(runs)
+    print(f"Cold start ({args.data_dir}, median of {args.repeat}):")
+    for k, v in median.items():
+        print(f"  {k:<22} {'-' if v is None else f'{v:10,.1f} ms'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'data_dir': args.data_dir, 'app': args.app, 'runs': runs, 'median': median}, f, indent=2)
+        print(f"✓ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
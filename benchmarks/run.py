@@ -0,0 +1,247 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engineered_features import actions
+from engineered_features.aggregates import tracking_cube
+from engineered_features.processing_data import (
+    add_derived_features, add_primary_kpis, add_rankings, add_status, add_time_metrics, aggregate_posts,
+    aggregate_tracking, build_insight_tables, compute_executive_kpis, load_datasets, merge_master,
+)
+from engineered_features.rollups import compute_rollups
+from dashboard.aggregations import compute_rollups as dashboard_rollups
+from dashboard.filters import FilterIndex
+from dashboard.leaderboard import Leaderboard
+from dashboard import trends
+
+
+# Benchmark suite for the pipeline stages and the dashboard hot paths.
+# Each scale tier is generated once with the vectorized simulator (same schema
+# as Simulated_raw_datasets) and kept under --data-root. Every stage is then
+# timed in isolation on the previous stage's output: best of --repeat runs,
+# plus one extra run under tracemalloc for the peak memory it allocates.
+# Results go to JSON; --compare flags stages that got slower than a baseline
+# by more than the tolerance and by more than the runs' own spread, after
+# timing the flagged stages once more.
+
+# tier -> (influencers, posts, tracking events per post); tracking rows = posts x events
+TIERS = {
+    '1e3': (100, 500, 2),
+    '1e4': (1_000, 2_000, 5),
+    '1e5': (10_000, 20_000, 5),
+    '1e6': (100_000, 200_000, 5),
+    '1e7': (1_000_000, 2_000_000, 5),
+}
+DEFAULT_TIERS = ['1e3', '1e4', '1e5']
+AS_OF = '2025-09-01'
+# Differences below this many seconds, or below the spread (slowest - best) of the
+# compared runs' repeats, are treated as noise when comparing
+NOISE_FLOOR = 0.01
+DEFAULT_REPEAT = 5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_simulator():
+    # Simulated_raw_datasets is a script folder, not a package
+    path = os.path.join(ROOT, 'Simulated_raw_datasets', 'simulating_script.py')
+    spec = importlib.util.spec_from_file_location('simulating_script', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ensure_dataset(data_root, tier, seed=42):
+    """Directory holding the four raw tables of ``tier``, generated on first use."""
+    data_dir = os.path.join(data_root, f'tier_{tier}_seed{seed}')
+    if os.path.exists(os.path.join(data_dir, 'payouts.csv')):
+        return data_dir
+    num_influencers, num_posts, events_per_post = TIERS[tier]
+    os.makedirs(data_dir, exist_ok=True)
+    print(f"Generating tier {tier} in {data_dir} ...")
+    load_simulator().generate_vectorized(data_dir, num_influencers=num_influencers, num_posts=num_posts,
+                                         events_per_post=events_per_post, num_users=max(num_influencers * 10, 1000),
+                                         seed=seed, as_of=AS_OF)
+    return data_dir
+
+
+def measure(fn, repeat):
+    """Best and spread of the wall times of ``repeat`` calls, then the traced peak of one more call."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, min(seconds), max(seconds) - min(seconds), peak
+
+
+def pipeline_stages(data_dir):
+    # (name, fn(state) -> result); each result is stored as state[name]
+    return [
+        ('load', lambda s: load_datasets(data_dir)),
+        ('aggregate_posts', lambda s: aggregate_posts(s['load'][1])),
+        ('aggregate_tracking', lambda s: aggregate_tracking(s['load'][2])),
+        ('tracking_cube', lambda s: tracking_cube(s['load'][2])),
+        ('merge', lambda s: merge_master(s['load'][0], s['aggregate_posts'], s['aggregate_tracking'], s['load'][3])),
+        # The add_* steps extend master_df in place, so repeats recompute the same columns
+        ('primary_kpis', lambda s: add_primary_kpis(s['merge'])),
+        ('derived_features', lambda s: add_derived_features(s['primary_kpis'])),
+        ('time_metrics', lambda s: add_time_metrics(s['derived_features'], AS_OF)),
+        ('status', lambda s: add_status(s['time_metrics'])),
+        ('rankings', lambda s: add_rankings(s['status'])),
+        ('executive_kpis', lambda s: compute_executive_kpis(s['rankings'], s['load'][2]['campaign'].nunique())),
+        ('rollups', lambda s: compute_rollups(s['rankings'], s['tracking_cube'])),
+        ('insight_tables', lambda s: build_insight_tables(s['rollups'])),
+        ('actions', lambda s: actions.select_actions(s['rankings'])),
+    ]
+
+
+def app_stages(master_df, cube):
+    # A typical filter state: half the platforms and every category but one
+    platforms = list(master_df['platform'].dropna().unique())
+    categories = list(master_df['category'].dropna().unique())
+    selections = {'platform': platforms[: max(1, len(platforms) // 2)], 'category': categories[1:] or categories}
+    return [
+        ('filter_index', lambda s: FilterIndex(master_df)),
+        ('filter_mask', lambda s: s['filter_index'].mask(selections)),
+        ('filter_view', lambda s: s['filter_index'].view(s['filter_mask'])),
+        ('dashboard_rollups', lambda s: dashboard_rollups(s['filter_view'])),
+        ('payout_sketch', lambda s: actions.payout_sketch(master_df)),
+        ('sketch_quantiles', lambda s: actions.sketch_quantiles(s['payout_sketch'], [0.3, 0.7], selections)),
+        ('build_actions', lambda s: actions.select_actions(s['filter_view'], payout_quantiles=s['sketch_quantiles'])),
+        ('leaderboard_index', lambda s: Leaderboard(master_df)),
+        ('leaderboard_page_roas', lambda s: s['leaderboard_index'].page(s['filter_mask'], 'roas', False, 0, 50)),
+        ('leaderboard_page_revenue', lambda s: s['leaderboard_index'].page(s['filter_mask'], 'total_revenue', False, 0, 50)),
+        ('trend_weekly', lambda s: trends.trend(trends.restrict_cube(cube, s['filter_view']['influencer_id']),
+                                                'Week', 'source', 'revenue')),
+    ]
+
+
+def run_stages(tier, group, stages, repeat, results, state=None):
+    state = {} if state is None else state
+    for name, fn in stages:
+        state[name], seconds, spread, peak = measure(lambda: fn(state), repeat)
+        results.append({'tier': tier, 'group': group, 'stage': name, 'seconds': round(seconds, 6),
+                        'spread_seconds': round(spread, 6), 'peak_mb': round(peak / 2**20, 3)})
+        print(f"  {group:<8} {name:<26} {seconds * 1000:10.2f} ms {peak / 2**20:10.1f} MB")
+    return state
+
+
+def run_tier(data_root, tier, repeat, seed=42):
+    """Results of every stage of ``tier``, and a ``retime(stage_key, repeat)`` callback for them."""
+    data_dir = ensure_dataset(data_root, tier, seed)
+    print(f"Tier {tier} ({data_dir})")
+    results = []
+    state = run_stages(tier, 'pipeline', pipeline_stages(data_dir), repeat, results)
+    master_df = state['rankings']
+    app_state = run_stages(tier, 'app', app_stages(master_df, state['tracking_cube']), repeat, results)
+    for r in results:
+        r['influencers'] = len(master_df)
+        r['tracking_rows'] = len(state['load'][2])
+    stages = {('pipeline', name): (fn, state) for name, fn in pipeline_stages(data_dir)}
+    stages.update({('app', name): (fn, app_state) for name, fn in app_stages(master_df, state['tracking_cube'])})
+
+    def retime(group, stage, repeat):
+        fn, stage_state = stages[(group, stage)]
+        _, seconds, spread, _ = measure(lambda: fn(stage_state), repeat)
+        return seconds, spread
+
+    return results, retime
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=0.2, noise_floor=NOISE_FLOOR):
+    """Stages that are more than ``tolerance`` slower than in ``baseline``.
+
+    A slowdown also has to exceed the noise: ``noise_floor``, or the spreads of the
+    two runs' repeats added together when that is larger (baselines written
+    before spreads were recorded only use the floor).
+    """
+    previous = {(r['tier'], r['group'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for r in results['results']:
+        old = previous.get((r['tier'], r['group'], r['stage']))
+        if old is None:
+            continue
+        slower = r['seconds'] - old['seconds']
+        noise = max(noise_floor, r.get('spread_seconds', 0) + old.get('spread_seconds', 0))
+        if slower > noise and r['seconds'] > old['seconds'] * (1 + tolerance):
+            regressions.append({**r, 'baseline_seconds': old['seconds'], 'ratio': round(r['seconds'] / old['seconds'], 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages and dashboard hot paths.")
+    parser.add_argument('--tiers', nargs='+', choices=list(TIERS), default=DEFAULT_TIERS,
+                        help="scale tiers, named by tracking rows (default: %(default)s)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="timed runs per stage; the best is kept and their spread bounds the noise")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-root', default=os.path.join(tempfile.gettempdir(), 'influencer_benchmarks'),
+                        help="where generated tier datasets are kept and reused")
+    parser.add_argument('--output', default=None, help="write results JSON here")
+    parser.add_argument('--compare', default=None, help="baseline results JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {'environment': environment(), 'repeat': args.repeat, 'results': []}
+    retimers = {}
+    for tier in args.tiers:
+        tier_results, retimers[tier] = run_tier(args.data_root, tier, args.repeat, args.seed)
+        results['results'] += tier_results
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            # Time the flagged stages again, so a burst of load on the machine is not reported
+            print(f"Re-timing {len(regressions)} flagged stage(s)")
+            flagged = {(r['tier'], r['group'], r['stage']) for r in regressions}
+            for r in results['results']:
+                if (r['tier'], r['group'], r['stage']) in flagged:
+                    seconds, spread = retimers[r['tier']](r['group'], r['stage'], args.repeat * 2)
+                    if seconds < r['seconds']:
+                        r['seconds'], r['spread_seconds'] = round(seconds, 6), round(spread, 6)
+            regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"✗ {r['tier']} {r['group']}/{r['stage']}: {r['baseline_seconds'] * 1000:.2f} ms -> "
+                  f"{r['seconds'] * 1000:.2f} ms ({r['ratio']}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"✓ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Data helpers behind the Streamlit dashboard (app.py)."""
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+from engineered_features import rollups as rollup_engine
+
+
+def filter_signature(dataset_key, selections, d_start=None, d_end=None):
+    """Hashable key for one filter state of one dataset."""
+    chosen = tuple((col, tuple(sorted(map(str, values)))) for col, values in sorted(selections.items()))
+    return dataset_key, chosen, str(d_start), str(d_end)
+
+
+def platform_rollup(table):
+    if "platform_roas" not in table.columns or "platform" not in table.columns:
+        return None
+    plat = rollup_engine.grouping_set(table, "platform")
+    columns = ["platform", "total_revenue", "total_payout", "total_orders", "total_reach",
+               "influencer_count", "platform_roas", "revenue_share"]
+    return plat[[c for c in columns if c in plat.columns]]
+
+
+def persona_rollup(table):
+    if "persona_combination" not in table.columns or "avg_roas" not in table.columns:
+        return None
+    persona = rollup_engine.grouping_set(table, "persona_combination").rename(
+        columns={"avg_efficiency_score": "efficiency_score", "total_revenue": "revenue"})
+    columns = ["persona_combination", "avg_roas", "efficiency_score", "revenue", "influencer_count"]
+    persona_mean = persona[[c for c in columns if c in persona.columns]]
+    return persona_mean.sort_values("avg_roas", ascending=False)
+
+
+def category_rollup(table):
+    # One grouping set feeds the ROAS bars, the engagement bars and the summary table
+    if "category" not in table.columns:
+        return None
+    cat = rollup_engine.grouping_set(table, "category").rename(
+        columns={"total_revenue": "revenue", "avg_engagement_rate": "avg_eng"})
+    return cat[[c for c in ["category", "revenue", "avg_roas", "avg_eng", "influencer_count"] if c in cat.columns]]
+
+
+def compute_rollups(df, table=None):
+    """All roll-ups the dashboard sections and exports need for one filtered view.
+
+    The grouping sets come from one pass of the pipeline's roll-up engine over
+    ``df``, or straight from ``table`` (the persisted rollups artifact) when the
+    view is the unfiltered master.
+    """
+    if table is None:
+        has_dims = any(d in df.columns for d in rollup_engine.DIMENSIONS)
+        table = rollup_engine.compute_rollups(df) if has_dims else pd.DataFrame(columns=["grouping_set"])
+    return {
+        "platform": platform_rollup(table),
+        "persona": persona_rollup(table),
+        "category": category_rollup(table),
+    }
+
+
+class RollupService:
+    """Bounded LRU cache of ``compute_rollups`` results keyed by filter signature.
+
+    One instance is shared per dataset, so every section and export of a rerun
+    reuses the same roll-ups and returning to an earlier filter combination is a
+    dictionary lookup. The investment action tables (and so the payout
+    percentiles behind them) share the cache, keyed by signature and thresholds.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, signature, df, table=None):
+        return self.lookup(signature, lambda: compute_rollups(df, table))
+
+    def actions(self, signature, thresholds, build):
+        """Invest More / Optimize / Monitor tables of one filter state, built by ``build()`` on a miss."""
+        return self.lookup((signature, "actions", tuple(sorted(thresholds.items()))), build)
+
+    def lookup(self, signature, build):
+        # ``build()`` runs only on a miss (e.g. the SQL backend's roll-up queries)
+        with self._lock:
+            if signature in self._cache:
+                self._cache.move_to_end(signature)
+                self.hits += 1
+                return self._cache[signature]
+        rollups = build()
+        with self._lock:
+            self.misses += 1
+            self._cache[signature] = rollups
+            self._cache.move_to_end(signature)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return rollups
@@ -0,0 +1,110 @@
+import gzip
+import io
+
+from engineered_features.storage import has_pyarrow
+
+
+# In-memory exports behind the dashboard's download buttons.
+# A table comes in as DataFrame chunks (``frame_chunks`` slices an in-memory
+# view, SqlBackend.select_chunks streams a query) and is encoded chunk by chunk
+# into one BytesIO: CSV text is encoded per chunk (and gzip-compressed as it
+# goes), Parquet gets one row group per chunk, and Excel uses openpyxl's
+# write-only sheets. Memory is the encoded file plus one chunk, never a second
+# copy of the table or one big CSV string. The buttons get ``deferred(...)``,
+# so nothing is built until one is clicked.
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "CSV (gzip)": (".csv.gz", "application/gzip"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+CHUNK_ROWS = 100_000
+# One sheet holds 1,048,576 rows, header included
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def has_openpyxl():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_formats():
+    """Export formats whose optional writer (pyarrow, openpyxl) is installed."""
+    optional = {"Parquet": has_pyarrow, "Excel": has_openpyxl}
+    return [fmt for fmt in EXPORT_FORMATS if fmt not in optional or optional[fmt]()]
+
+
+def frame_chunks(df, rows=CHUNK_ROWS):
+    # Row slices share the frame's data (copy-on-write), so nothing is copied here
+    yield df.iloc[:rows]
+    for start in range(rows, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+def _write_csv(chunks, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    for i, chunk in enumerate(chunks):
+        chunk.to_csv(text, index=False, header=i == 0)
+    text.flush()
+    text.detach()
+
+
+def _write_parquet(chunks, out):
+    import pyarrow as pa
+    from pyarrow import parquet
+
+    writer = None
+    for chunk in chunks:
+        # Later chunks are cast to the first chunk's schema (one file, one schema)
+        table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None, preserve_index=False)
+        if writer is None:
+            writer = parquet.ParquetWriter(out, table.schema)
+        writer.write_table(table)
+    writer.close()
+
+
+def _write_excel(chunks, out, sheet_name):
+    from openpyxl import Workbook
+
+    book = Workbook(write_only=True)
+    sheet = book.create_sheet(sheet_name[:31])
+    written = 0
+    for i, chunk in enumerate(chunks):
+        written += len(chunk)
+        if written > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel sheets hold at most {EXCEL_MAX_ROWS:,} rows; use CSV or Parquet")
+        if i == 0:
+            sheet.append([str(c) for c in chunk.columns])
+        # Missing values become empty cells
+        cells = chunk.astype(object).where(chunk.notna(), None)
+        for row in cells.itertuples(index=False, name=None):
+            sheet.append(row)
+    book.save(out)
+
+
+def export(chunks, fmt, sheet_name="data"):
+    """``chunks`` (an iterable of DataFrames with the same columns) encoded as ``fmt``, in a BytesIO."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r} (expected one of {list(EXPORT_FORMATS)})")
+    out = io.BytesIO()
+    if fmt == "CSV":
+        _write_csv(chunks, out)
+    elif fmt == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=out, mode="wb", mtime=0) as compressed:
+            _write_csv(chunks, compressed)
+    elif fmt == "Parquet":
+        _write_parquet(chunks, out)
+    else:
+        _write_excel(chunks, out, sheet_name)
+    out.seek(0)
+    return out
+
+
+def deferred(make_chunks, fmt, sheet_name="data"):
+    """Zero-argument callable for ``st.download_button(data=...)``: the file is built on click."""
+    return lambda: export(make_chunks(), fmt, sheet_name)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+
+# Sidebar filter columns, in the order the widgets are shown
+FILTER_COLUMNS = ["brand", "product", "platform", "category", "follower_tier", "performance_category"]
+
+
+class FilterIndex:
+    """Integer-code index over master_df's sidebar filter columns.
+
+    Built once per loaded dataset: every filter column is factorized into int
+    codes and the post-window dates are parsed into datetime64 arrays. A rerun
+    then turns each multiselect into a per-value lookup table, ANDs the
+    resulting boolean masks and materializes the filtered view once.
+    """
+
+    def __init__(self, master_df):
+        self.master_df = master_df
+        self.size = len(master_df)
+        self.codes = {}
+        self.values = {}
+        for col in FILTER_COLUMNS:
+            if col in master_df.columns:
+                # factorize keeps first-appearance order, like .dropna().unique()
+                codes, uniques = pd.factorize(master_df[col])
+                self.codes[col] = codes
+                self.values[col] = uniques
+        self.first_post = self._dates("first_post_date")
+        self.last_post = self._dates("last_post_date")
+
+    def _dates(self, col):
+        if col not in self.master_df.columns:
+            return None
+        return pd.to_datetime(self.master_df[col], errors="coerce").to_numpy()
+
+    def options(self, col):
+        return list(self.values[col]) if col in self.values else []
+
+    def date_bounds(self):
+        if self.first_post is None or self.last_post is None:
+            return None, None
+        return pd.Series(self.first_post).min(), pd.Series(self.last_post).max()
+
+    def column_mask(self, col, selected):
+        # Lookup table over the distinct values; NaN rows (code -1) never match
+        value_mask = np.append(np.isin(np.asarray(self.values[col], dtype=object),
+                                       np.asarray(list(selected), dtype=object)), False)
+        return value_mask[self.codes[col]]
+
+    def mask(self, selections, d_start=None, d_end=None):
+        """Rows matching every non-empty selection and overlapping [d_start, d_end]."""
+        mask = np.ones(self.size, dtype=bool)
+        for col, selected in selections.items():
+            if selected and col in self.codes:
+                mask &= self.column_mask(col, selected)
+        if d_start is not None and d_end is not None and self.first_post is not None and self.last_post is not None:
+            mask &= (self.last_post >= np.datetime64(d_start)) & (self.first_post <= np.datetime64(d_end))
+        return mask
+
+    def view(self, mask):
+        """The rows of master_df under ``mask``; read-only for callers.
+
+        Unfiltered reruns get the cached master_df object itself (otherwise one
+        boolean take), so a caller that needs to change columns must copy first.
+        """
+        if mask.all():
+            return self.master_df
+        return self.master_df[mask]
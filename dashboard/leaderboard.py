@@ -0,0 +1,74 @@
+import numpy as np
+
+
+# Leaderboard columns, and the metric columns it can be sorted on
+LEADERBOARD_COLUMNS = ["name", "platform", "category", "roas", "total_revenue", "engagement_rate",
+                       "total_payout", "total_orders"]
+SORT_COLUMNS = ["roas", "total_revenue", "engagement_rate", "total_payout", "total_orders"]
+DEFAULT_SORT = "roas"
+
+
+class Leaderboard:
+    """Paginated, server-side sorted leaderboard over master_df.
+
+    Built once per loaded dataset alongside the FilterIndex. The default ROAS
+    ordering is computed once and reused: a rerun walks it through the filter
+    mask and slices out the visible page. Other sort columns (and ascending
+    order) use a partial top-K selection over the filtered rows, so only the
+    rows up to the end of the requested page are ever sorted.
+    Ties keep master_df's row order; missing values always sort last.
+    """
+
+    def __init__(self, master_df):
+        self.master_df = master_df
+        self.columns = [c for c in LEADERBOARD_COLUMNS if c in master_df.columns]
+        self.sort_columns = [c for c in SORT_COLUMNS if c in master_df.columns]
+        self.size = len(master_df)
+        self._orderings = {}
+        if DEFAULT_SORT in self.sort_columns:
+            self._orderings[DEFAULT_SORT] = self._full_order(DEFAULT_SORT)
+
+    def _keys(self, col, ascending=False):
+        # Smallest key first; NaN -> +inf so missing values land at the end
+        values = self.master_df[col].to_numpy(dtype=float, na_value=np.nan)
+        keys = values if ascending else -values
+        return np.where(np.isnan(keys), np.inf, keys)
+
+    def _full_order(self, col):
+        keys = self._keys(col)
+        return np.lexsort((np.arange(self.size), keys))
+
+    def _top_k(self, col, ascending, rows, k):
+        # Positions (into master_df) of the first k of ``rows`` in sort order
+        keys = self._keys(col, ascending)[rows]
+        if k < len(rows):
+            kth = np.partition(keys, k - 1)[k - 1]
+            # Keep every tie of the k-th key so the stable tie-break stays exact
+            candidates = np.flatnonzero(keys <= kth)
+            rows, keys = rows[candidates], keys[candidates]
+        return rows[np.lexsort((rows, keys))][:k]
+
+    def page(self, mask=None, sort_by=DEFAULT_SORT, ascending=False, page=0, page_size=50):
+        """Rows ``page * page_size`` up to the next page of the filtered, sorted leaderboard.
+
+        Returns ``(page_df, total_rows)``; page_df is indexed by 0-based rank.
+        """
+        total = self.size if mask is None else int(np.count_nonzero(mask))
+        start = min(page * page_size, total)
+        end = min(start + page_size, total)
+        if sort_by not in self.sort_columns:
+            sort_by = self.sort_columns[0] if self.sort_columns else None
+
+        if sort_by is None:
+            positions = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+            positions = positions[start:end]
+        elif sort_by in self._orderings and not ascending:
+            order = self._orderings[sort_by]
+            positions = (order if mask is None else order[mask[order]])[start:end]
+        else:
+            rows = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+            positions = self._top_k(sort_by, ascending, rows, end)[start:end] if end else rows[:0]
+
+        page_df = self.master_df.iloc[positions][self.columns]
+        page_df.index = range(start, start + len(page_df))
+        return page_df, total
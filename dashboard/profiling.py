@@ -0,0 +1,99 @@
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+
+# Opt-in per-section profiling of one dashboard rerun.
+# The script calls ``mark(section, phase)`` at each checkpoint; the time until
+# the next mark is booked to that section and phase ("data" for filtering and
+# aggregation, "chart" for figure construction and rendering). Cache lookups go
+# through ``cached(name, fn, ...)`` (a call) and the cached body reports
+# ``miss(name)``; caches with their own counters are registered with ``track``.
+# ``milestone(name)`` records how long after the start a point was reached (e.g.
+# the first paint); a profiler created late is given the script's start time,
+# and the time before its first mark is booked to "Startup".
+# When disabled every method returns immediately.
+
+LOG_MAX_BYTES = 5 * 1024 * 1024
+
+
+class SectionProfiler:
+    def __init__(self, enabled=False, started=None):
+        self.enabled = enabled
+        self.started = time.perf_counter() if started is None else started
+        self.timings = []
+        self.calls = {}
+        self.misses = {}
+        self.tracked = {}
+        self.milestones = {}
+        self._current = ("Startup", "data") if started is not None else None
+        self._since = self.started
+
+    def mark(self, section=None, phase="data"):
+        """Close the running checkpoint and start ``section``/``phase`` (None = stop)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._current is not None:
+            self.timings.append((*self._current, now - self._since))
+        self._current = (section, phase) if section is not None else None
+        self._since = now
+
+    def milestone(self, name, at=None):
+        """Record that ``name`` was reached (now, or at the perf_counter value ``at``)."""
+        if self.enabled and name not in self.milestones:
+            self.milestones[name] = round(((time.perf_counter() if at is None else at) - self.started) * 1000, 1)
+
+    def cached(self, name, fn, *args, **kwargs):
+        if self.enabled:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        return fn(*args, **kwargs)
+
+    def miss(self, name):
+        if self.enabled:
+            self.misses[name] = self.misses.get(name, 0) + 1
+
+    def track(self, name, cache):
+        # Caches exposing cumulative ``hits``/``misses`` (RollupService, UploadCache)
+        if self.enabled and name not in self.tracked:
+            self.tracked[name] = (cache, cache.hits, cache.misses)
+
+    def sections(self):
+        if not self.timings:
+            return pd.DataFrame(columns=["section", "data_ms", "chart_ms", "total_ms"])
+        rows = pd.DataFrame(self.timings, columns=["section", "phase", "seconds"])
+        table = rows.pivot_table(index="section", columns="phase", values="seconds", aggfunc="sum", sort=False)
+        table = table.reindex(columns=["data", "chart"]).fillna(0) * 1000
+        table.columns = ["data_ms", "chart_ms"]
+        table["total_ms"] = table.sum(axis=1)
+        return table.round(1).reset_index()
+
+    def caches(self):
+        rows = []
+        for name, calls in self.calls.items():
+            misses = self.misses.get(name, 0)
+            rows.append({"cache": name, "calls": calls, "hits": calls - misses, "misses": misses})
+        for name, (cache, hits, misses) in self.tracked.items():
+            rows.append({"cache": name, "calls": cache.hits - hits + cache.misses - misses,
+                         "hits": cache.hits - hits, "misses": cache.misses - misses})
+        return pd.DataFrame(rows, columns=["cache", "calls", "hits", "misses"])
+
+    def record(self):
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "milestones": dict(self.milestones),
+            "sections": self.sections().to_dict("records"),
+            "caches": self.caches().to_dict("records"),
+        }
+
+
+def append_log(path, record, max_bytes=LOG_MAX_BYTES):
+    """Append ``record`` as a JSON line, rolling ``path`` over to ``path.1`` past ``max_bytes``."""
+    if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+        os.replace(path, path + ".1")
+    with open(path, "a") as f:
+        f.write(json.dumps(record, default=str) + "\n")
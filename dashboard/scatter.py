@@ -0,0 +1,86 @@
+import numpy as np
+
+
+# Level-of-detail rendering for the ROAS vs Engagement scatter.
+# Small views keep the original SVG bubbles. Past ``webgl_at`` points (plotly's
+# own "auto" cut-over, made explicit) the same chart is drawn with WebGL
+# (scattergl), which the browser can pan and hover at hundreds of thousands of
+# points. Past ``density_at`` points no per-influencer
+# marks are sent at all: the plane is binned server-side into a 2-D count grid
+# (a fixed-size heatmap) and only the top ``point_budget`` influencers by
+# revenue are overlaid as points, so the payload no longer grows with the data.
+# plotly is imported by the functions that build figures, so importing this
+# module (the dashboard does at startup) stays cheap.
+
+WEBGL_AT = 1_000
+DENSITY_AT = 100_000
+POINT_BUDGET = 2_000
+DENSITY_BINS = 120
+
+
+def render_mode(n_points, webgl_at=WEBGL_AT, density_at=DENSITY_AT):
+    if n_points > density_at:
+        return "density"
+    if n_points > webgl_at:
+        return "webgl"
+    return "svg"
+
+
+def top_outliers(df, n, by="total_revenue"):
+    """The ``n`` rows with the largest ``by`` (argpartition, no full sort)."""
+    if by not in df.columns or len(df) <= n:
+        return df
+    values = df[by].to_numpy(dtype=float, na_value=-np.inf)
+    top = np.argpartition(values, len(values) - n)[-n:]
+    return df.iloc[np.sort(top)]
+
+
+def density_grid(df, x, y, bins=DENSITY_BINS):
+    """Counts of ``df`` on a ``bins`` x ``bins`` grid over the x/y plane."""
+    xs = df[x].to_numpy(dtype=float)
+    ys = df[y].to_numpy(dtype=float)
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins)
+    x_mid = (x_edges[:-1] + x_edges[1:]) / 2
+    y_mid = (y_edges[:-1] + y_edges[1:]) / 2
+    # histogram2d indexes [x, y]; Heatmap wants rows = y
+    return x_mid, y_mid, counts.T
+
+
+def _bubbles(df, color_col, render_mode):
+    import plotly.express as px
+    df = df.assign(bubble_size=np.clip(df.get("total_revenue", 0), 1, None))
+    hover = [c for c in ["name", "platform", "total_revenue"] if c in df.columns]
+    return px.scatter(
+        df, x="engagement_rate", y="roas",
+        size="bubble_size", color=color_col,
+        hover_data=hover, size_max=40, title=None, render_mode=render_mode
+    )
+
+
+def scatter_figure(df, color_col, webgl_at=WEBGL_AT, density_at=DENSITY_AT, point_budget=POINT_BUDGET):
+    """ROAS vs engagement figure for ``df`` and the render mode that was used."""
+    points = df.dropna(subset=["engagement_rate", "roas"])
+    mode = render_mode(len(points), webgl_at, density_at)
+    if mode == "svg":
+        return _bubbles(points, color_col, "svg"), mode
+    if mode == "webgl":
+        return _bubbles(points, color_col, "webgl"), mode
+
+    return density_figure(top_outliers(points, point_budget), density_grid(points, "engagement_rate", "roas"),
+                          color_col), mode
+
+
+def density_figure(top_points, grid, color_col):
+    """Density heatmap of ``grid`` (from density_grid) under ``top_points`` as WebGL bubbles."""
+    import plotly.graph_objects as go
+    fig = _bubbles(top_points, color_col, "webgl")
+    x_mid, y_mid, counts = grid
+    heatmap = go.Heatmap(
+        x=x_mid, y=y_mid, z=np.where(counts > 0, np.log10(counts + 1), np.nan),
+        customdata=counts, colorscale="Greys", showscale=False,
+        hovertemplate="engagement %{x:.2f}<br>ROAS %{y:.2f}<br>%{customdata:,.0f} influencers<extra></extra>",
+    )
+    # Density underneath, outlier points on top
+    fig.add_trace(heatmap)
+    fig.data = (fig.data[-1],) + fig.data[:-1]
+    return fig
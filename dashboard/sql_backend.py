@@ -0,0 +1,323 @@
+import math
+import queue
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from dashboard import scatter
+from dashboard.aggregations import compute_rollups
+from dashboard.filters import FILTER_COLUMNS
+from dashboard.leaderboard import DEFAULT_SORT, LEADERBOARD_COLUMNS, SORT_COLUMNS
+from engineered_features import actions as action_engine
+from engineered_features import rollups as rollup_engine
+from engineered_features.database import ROW_COLUMN, connect, engine_of
+from engineered_features.schema import narrow_int
+from engineered_features.storage import DATE_COLUMNS
+
+
+# SQL backend for the dashboard over the pipeline's embedded database
+# (see engineered_features/database.py). Nothing per session is held in memory:
+# the sidebar filters become one parameterized WHERE clause, and the leaderboard
+# page, the KPI sums, the roll-up cells, the scatter density grid, the action
+# picks and the cube slices are each one query returning only the rows shown.
+# Results match the pandas path: ties break on master_df's row order (``_row``)
+# and NULLs behave like NaN (never selected, sorted last).
+
+
+class ConnectionPool:
+    """Fixed set of read-only connections to one database file, shared by every session.
+
+    DuckDB hands out cursors of one read-only connection (each runs its queries
+    on DuckDB's own thread pool); SQLite opens ``size`` read-only connections.
+    """
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self.engine = engine_of(path)
+        self._idle = queue.Queue()
+        if self.engine == "duckdb":
+            self._root = connect(path, read_only=True)
+            connections = [self._root.cursor() for _ in range(size)]
+        else:
+            self._root = None
+            connections = [connect(path, read_only=True) for _ in range(size)]
+        for con in connections:
+            self._idle.put(con)
+
+    @contextmanager
+    def connection(self):
+        con = self._idle.get()
+        try:
+            yield con
+        finally:
+            self._idle.put(con)
+
+    def query(self, sql, params=()):
+        with self.connection() as con:
+            if self.engine == "duckdb":
+                return con.execute(sql, list(params)).df()
+            return pd.read_sql_query(sql, con, params=list(params))
+
+    def query_chunks(self, sql, params=(), rows=100_000):
+        """Result of ``sql`` as DataFrames of up to ``rows`` rows; the connection is held until exhausted."""
+        with self.connection() as con:
+            if self.engine == "duckdb":
+                for batch in con.execute(sql, list(params)).fetch_record_batch(rows):
+                    yield batch.to_pandas()
+            else:
+                yield from pd.read_sql_query(sql, con, params=list(params), chunksize=rows)
+
+    def scalars(self, sql, params=()):
+        with self.connection() as con:
+            return tuple(con.execute(sql, list(params)).fetchone())
+
+    def tables(self):
+        if self.engine == "duckdb":
+            return set(self.query("SELECT table_name FROM information_schema.tables")["table_name"])
+        return set(self.query("SELECT name FROM sqlite_master WHERE type = 'table'")["name"])
+
+
+def _quote(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _typed(df):
+    # SQLite returns dates as text
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+class SqlBackend:
+    """Filter, leaderboard, roll-up, action and trend queries over the database.
+
+    A filter state is a ``(clause, params)`` pair from ``where``; every other
+    method takes one. ``options``, ``date_bounds`` and ``sort_columns`` mirror
+    FilterIndex and Leaderboard so the sidebar is built the same way.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.tables = pool.tables()
+        self.columns = [c for c in pool.query("SELECT * FROM master_df LIMIT 0").columns if c != ROW_COLUMN]
+        self.size = pool.scalars("SELECT COUNT(*) FROM master_df")[0]
+        self.filter_columns = [c for c in FILTER_COLUMNS if c in self.columns]
+        self.sort_columns = [c for c in SORT_COLUMNS if c in self.columns]
+        self.leaderboard_columns = [c for c in LEADERBOARD_COLUMNS if c in self.columns]
+        self.has_dates = {"first_post_date", "last_post_date"} <= set(self.columns)
+        self.has_cube = "tracking_cube" in self.tables
+        self._floor = "FLOOR({})" if pool.engine == "duckdb" else "CAST({} AS INTEGER)"
+
+    # ---- sidebar
+    def options(self, col):
+        if col not in self.filter_columns:
+            return []
+        q = _quote(col)
+        # First-appearance order, like FilterIndex
+        sql = f"SELECT {q} FROM master_df WHERE {q} IS NOT NULL GROUP BY {q} ORDER BY MIN({ROW_COLUMN})"
+        return self.pool.query(sql)[col].tolist()
+
+    def date_bounds(self):
+        if not self.has_dates:
+            return None, None
+        low, high = self.pool.scalars("SELECT MIN(first_post_date), MAX(last_post_date) FROM master_df")
+        return (pd.Timestamp(low) if low is not None else None), (pd.Timestamp(high) if high is not None else None)
+
+    def where(self, selections, d_start=None, d_end=None):
+        """``(clause, params)`` for rows matching every non-empty selection and the date window."""
+        clauses, params = [], []
+        for col, selected in selections.items():
+            if selected and col in self.filter_columns:
+                clauses.append(f"{_quote(col)} IN ({', '.join('?' * len(selected))})")
+                params += [str(v) for v in selected]
+        if d_start is not None and d_end is not None and self.has_dates:
+            clauses.append("last_post_date >= ? AND first_post_date <= ?")
+            params += [str(pd.Timestamp(d_start)), str(pd.Timestamp(d_end))]
+        return " AND ".join(clauses) or "1 = 1", tuple(params)
+
+    def _and(self, where, clause, *params):
+        return f"({where[0]}) AND {clause}", where[1] + tuple(params)
+
+    def select(self, where, columns=None, order=None, limit=None, offset=0):
+        """Rows of master_df matching ``where``, indexed by master_df position."""
+        columns = self.columns if columns is None else [c for c in columns if c in self.columns]
+        sql = f"SELECT {ROW_COLUMN}, {', '.join(map(_quote, columns))} FROM master_df WHERE {where[0]}"
+        sql += f" ORDER BY {order + ', ' if order else ''}{ROW_COLUMN}"
+        params = where[1]
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += (int(limit), int(offset))
+        rows = _typed(self.pool.query(sql, params))
+        rows.index = pd.Index(rows.pop(ROW_COLUMN).to_numpy(), name=None)
+        return rows
+
+    def select_chunks(self, where, rows=100_000):
+        """All columns of the rows matching ``where`` in master_df order, streamed ``rows`` at a time.
+
+        At least one (possibly empty) chunk is yielded, so exports always get the header.
+        """
+        sql = f"SELECT {', '.join(map(_quote, self.columns))} FROM master_df WHERE {where[0]} ORDER BY {ROW_COLUMN}"
+        empty = True
+        for chunk in self.pool.query_chunks(sql, where[1], rows):
+            empty = False
+            yield _typed(chunk)
+        if empty:
+            yield self.select(where, limit=0)
+
+    # ---- KPIs
+    def count(self, where):
+        return int(self.pool.scalars(f"SELECT COUNT(*) FROM master_df WHERE {where[0]}", where[1])[0])
+
+    def totals(self, where):
+        """(total_revenue, total_payout, distinct influencers, rows) of the view."""
+        revenue, payout, influencers, rows = self.pool.scalars(
+            "SELECT COALESCE(SUM(total_revenue), 0), COALESCE(SUM(total_payout), 0), "
+            f"COUNT(DISTINCT influencer_id), COUNT(*) FROM master_df WHERE {where[0]}", where[1])
+        return float(revenue), float(payout), int(influencers), int(rows)
+
+    def active_campaigns(self):
+        if not self.has_cube:
+            return None
+        return int(self.pool.scalars("SELECT COUNT(DISTINCT campaign) FROM tracking_cube")[0])
+
+    # ---- leaderboard
+    def page(self, where, sort_by=DEFAULT_SORT, ascending=False, page=0, page_size=50, total=None):
+        """Same contract as Leaderboard.page: ``(page_df indexed by rank, total_rows)``."""
+        total = self.count(where) if total is None else total
+        start = min(page * page_size, total)
+        if sort_by not in self.sort_columns:
+            sort_by = self.sort_columns[0] if self.sort_columns else None
+        order = f"{_quote(sort_by)} {'ASC' if ascending else 'DESC'} NULLS LAST" if sort_by else None
+        page_df = self.select(where, self.leaderboard_columns, order, limit=min(page_size, total - start), offset=start)
+        page_df.index = range(start, start + len(page_df))
+        return page_df, total
+
+    # ---- roll-ups
+    def rollup_cells(self, where):
+        """base_cells of the view, grouped in the database."""
+        dims = [d for d in rollup_engine.DIMENSIONS if d in self.columns]
+        aggs = [f"COALESCE(SUM({_quote(c)}), 0) AS {_quote(c)}" for c in rollup_engine.SUM_MEASURES if c in self.columns]
+        for c in rollup_engine.MEAN_MEASURES:
+            if c in self.columns:
+                aggs += [f"COALESCE(SUM({_quote(c)}), 0) AS {_quote(c + '_sum')}", f"COUNT({_quote(c)}) AS {_quote(c + '_n')}"]
+        aggs.append("COUNT(name) AS influencer_count" if "name" in self.columns else "COUNT(*) AS influencer_count")
+        group = ", ".join(map(_quote, dims))
+        cells = self.pool.query(f"SELECT {group}, {', '.join(aggs)} FROM master_df WHERE {where[0]} GROUP BY {group}",
+                                where[1])
+        # Whole-number sums come back as floats (or, when empty, objects) from some engines
+        return cells.assign(**{c: narrow_int(pd.to_numeric(cells[c]).astype(float), "int64")
+                               for c in cells.columns if c not in dims})
+
+    def rollups(self, where, unfiltered=False):
+        """The dashboard roll-ups of the view (stored grouping sets when unfiltered)."""
+        if unfiltered and "rollups" in self.tables:
+            return compute_rollups(None, self.pool.query("SELECT * FROM rollups"))
+        if not any(d in self.columns for d in rollup_engine.DIMENSIONS):
+            return compute_rollups(None, pd.DataFrame(columns=["grouping_set"]))
+        return compute_rollups(None, rollup_engine.rollups_from_cells(self.rollup_cells(where)))
+
+    # ---- scatter
+    def scatter_count(self, where):
+        return self.count(self._and(where, "engagement_rate IS NOT NULL AND roas IS NOT NULL"))
+
+    def scatter_rows(self, where, columns, limit=None):
+        """Plottable rows; with ``limit``, the top rows by revenue (in master_df order)."""
+        points = self._and(where, "engagement_rate IS NOT NULL AND roas IS NOT NULL")
+        if limit is None:
+            return self.select(points, columns)
+        rows = self.select(points, columns, "total_revenue DESC NULLS LAST", limit=limit)
+        return rows.sort_index()
+
+    def scatter_figure(self, where, color_col, webgl_at=scatter.WEBGL_AT, density_at=scatter.DENSITY_AT,
+                       point_budget=scatter.POINT_BUDGET):
+        """scatter.scatter_figure for the view; density mode only fetches the top points."""
+        columns = list(dict.fromkeys(["engagement_rate", "roas", "total_revenue", "name", "platform", color_col]))
+        mode = scatter.render_mode(self.scatter_count(where), webgl_at, density_at)
+        if mode != "density":
+            return scatter.scatter_figure(self.scatter_rows(where, columns), color_col, webgl_at, density_at,
+                                          point_budget)
+        grid = self.density_grid(where, "engagement_rate", "roas", scatter.DENSITY_BINS)
+        return scatter.density_figure(self.scatter_rows(where, columns, point_budget), grid, color_col), mode
+
+    def density_grid(self, where, x, y, bins):
+        """Same result as scatter.density_grid, counted in the database."""
+        points = self._and(where, f"{_quote(x)} IS NOT NULL AND {_quote(y)} IS NOT NULL")
+        x_lo, x_hi, y_lo, y_hi = self.pool.scalars(
+            f"SELECT MIN({_quote(x)}), MAX({_quote(x)}), MIN({_quote(y)}), MAX({_quote(y)}) FROM master_df "
+            f"WHERE {points[0]}", points[1])
+        edges = []
+        for lo, hi in [(x_lo, x_hi), (y_lo, y_hi)]:
+            lo, hi = (0.0, 1.0) if lo is None else (float(lo), float(hi))
+            if lo == hi:
+                lo, hi = lo - 0.5, hi + 0.5
+            edges.append(np.linspace(lo, hi, bins + 1))
+
+        def bin_of(col, e):
+            raw = self._floor.format(f"({_quote(col)} - ?) / ?")
+            return f"CASE WHEN {raw} >= {bins} THEN {bins - 1} ELSE {raw} END"
+
+        width = [(e[-1] - e[0]) / bins for e in edges]
+        sql = (f"SELECT bx, by_, COUNT(*) AS n FROM (SELECT {bin_of(x, edges[0])} AS bx, {bin_of(y, edges[1])} AS by_ "
+               f"FROM master_df WHERE {points[0]}) AS binned GROUP BY bx, by_")
+        params = (edges[0][0], width[0], edges[0][0], width[0], edges[1][0], width[1], edges[1][0], width[1]) + points[1]
+        cells = self.pool.query(sql, params)
+        counts = np.zeros((bins, bins))
+        counts[cells["by_"].to_numpy(dtype=int), cells["bx"].to_numpy(dtype=int)] = cells["n"].to_numpy()
+        mids = [(e[:-1] + e[1:]) / 2 for e in edges]
+        return mids[0], mids[1], counts
+
+    # ---- actions
+    def payout_quantiles(self, where, quantiles):
+        """Exact payout quantiles of the view (linear interpolation, like Series.quantile)."""
+        paid = self._and(where, "total_payout IS NOT NULL")
+        n = self.count(paid)
+        results = []
+        for q in quantiles:
+            if n == 0:
+                results.append(np.nan)
+                continue
+            rank = q * (n - 1)
+            lo, hi = math.floor(rank), math.ceil(rank)
+            values = self.pool.query(
+                f"SELECT total_payout FROM master_df WHERE {paid[0]} ORDER BY total_payout LIMIT ? OFFSET ?",
+                paid[1] + (hi - lo + 1, lo))["total_payout"].to_numpy(dtype=float)
+            results.append(values[0] + (values[-1] - values[0]) * (rank - lo))
+        return results
+
+    def actions(self, where, thresholds=None):
+        """Invest More, Optimize and Monitor tables, as action_engine.select_actions."""
+        t = action_engine.resolve_thresholds(thresholds)
+        columns = [c for c in action_engine.ACTION_COLUMNS if c in self.columns]
+        if self.count(where) == 0:
+            empty = pd.DataFrame(columns=action_engine.ACTION_COLUMNS)
+            return empty, empty, empty
+        low, high = [None if pd.isna(v) else float(v) for v in self.payout_quantiles(
+            where, [t["invest_payout_quantile"], t["optimize_payout_quantile"]])]
+        top_n = int(t["top_n"])
+
+        invest = self.select(self._and(where, "roas >= ? AND total_payout <= ?", t["invest_min_roas"], low),
+                             columns, "roas DESC", limit=top_n)
+        optimize = self.select(self._and(where, "roas < ? AND total_payout >= ?", t["optimize_max_roas"], high),
+                               columns, "roas ASC", limit=top_n)
+        # Monitor: the seeded hash pick runs on the candidates' ids only
+        band = self._and(where, "roas >= ? AND roas < ?", t["optimize_max_roas"], t["invest_min_roas"])
+        candidates = self.select(band, ["influencer_id"])
+        picked = action_engine.seeded_pick(candidates, top_n, t["seed"]).index
+        if len(picked):
+            chosen = self.select(self._and(band, f"{ROW_COLUMN} IN ({', '.join('?' * len(picked))})",
+                                           *map(int, picked)), columns)
+            monitor = chosen.loc[picked]
+        else:
+            monitor = pd.DataFrame(columns=columns)
+        return invest, optimize, monitor
+
+    # ---- trends
+    def cube_view(self, where, dims):
+        """The tracking cube of the view's influencers, summed to date x ``dims``."""
+        keys = ", ".join(["date"] + [_quote(d) for d in dims])
+        sql = (f"SELECT {keys}, SUM(orders) AS orders, SUM(revenue) AS revenue, SUM(events) AS events "
+               f"FROM tracking_cube WHERE influencer_id IN (SELECT influencer_id FROM master_df WHERE {where[0]}) "
+               f"GROUP BY {keys} ORDER BY {keys}")
+        return _typed(self.pool.query(sql, where[1]))
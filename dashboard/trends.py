@@ -0,0 +1,46 @@
+import pandas as pd
+
+
+# Trend and drill-down views served from the pipeline's daily tracking cube
+# (date x source x campaign x product x influencer). Week and month views are
+# rolled up from the cube, never from raw tracking events.
+
+GRAINS = {"Day": None, "Week": "W", "Month": "M"}
+DIMENSIONS = {"Source": "source", "Campaign": "campaign", "Product": "product", "Influencer": "influencer_id"}
+METRICS = {"Revenue": "revenue", "Orders": "orders", "Events": "events"}
+
+
+def restrict_cube(cube, influencer_ids=None):
+    # Keep the cube in step with the sidebar filters (which select influencers)
+    if influencer_ids is None:
+        return cube
+    return cube[cube["influencer_id"].isin(influencer_ids)]
+
+
+def with_period(cube, grain):
+    freq = GRAINS[grain]
+    dates = pd.to_datetime(cube["date"])
+    period = dates if freq is None else dates.dt.to_period(freq).dt.start_time
+    return cube.assign(period=period)
+
+
+def trend(cube, grain, by, metric, top_n=8):
+    """Metric per period, one series per ``by`` value; the tail is folded into "Other"."""
+    if cube.empty:
+        return pd.DataFrame(columns=["period", by, metric])
+    totals = cube.groupby(by, observed=True)[metric].sum().nlargest(top_n)
+    series = cube[by].astype(str).where(cube[by].isin(totals.index), "Other")
+    rolled = (with_period(cube, grain).assign(**{by: series})
+              .groupby(["period", by], observed=True)[metric].sum().reset_index())
+    return rolled.sort_values("period")
+
+
+def drill_down(cube, by, value, drill_by, metric, top_n=10):
+    """Top ``drill_by`` values (with all three measures) inside one ``by`` value."""
+    sub = cube[cube[by].astype(str) == str(value)]
+    table = sub.groupby(drill_by, observed=True)[list(METRICS.values())].sum()
+    return table.sort_values(metric, ascending=False).head(top_n).reset_index()
+
+
+def ranked_values(cube, by, metric):
+    return cube.groupby(by, observed=True)[metric].sum().sort_values(ascending=False).index.astype(str).tolist()
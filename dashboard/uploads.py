@@ -0,0 +1,69 @@
+import hashlib
+import io
+from collections import OrderedDict
+
+from engineered_features.storage import format_of, read_table, with_storage_dtypes
+
+
+class UploadCache:
+    """Per-session cache of parsed uploads, keyed by a hash of the file content.
+
+    Each upload is hashed once (the file id -> digest mapping is remembered)
+    and parsed once per distinct content and column selection. Dtype and date
+    normalization happen at load time. Entries are evicted least recently used
+    once the parsed frames exceed ``max_bytes``; the newest entry is always
+    kept, so an upload larger than the cap is still parsed only once.
+
+    ``resource`` holds objects derived from one upload (the FilterIndex and
+    Leaderboard of an uploaded master_df) for as long as the session shows
+    that content, instead of in the process-wide resource cache.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}
+        self._frames = OrderedDict()
+        self._resources_key = None
+        self._resources = {}
+
+    def content_key(self, upload):
+        file_id = getattr(upload, "file_id", None)
+        if file_id is None or file_id not in self._digests:
+            digest = hashlib.sha256(upload.getvalue()).hexdigest()
+            if file_id is None:
+                return digest
+            self._digests[file_id] = digest
+        return self._digests[file_id]
+
+    def load(self, upload, columns=None):
+        key = (self.content_key(upload), tuple(columns) if columns else None)
+        if key in self._frames:
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return self._frames[key][0]
+
+        self.misses += 1
+        df = with_storage_dtypes(read_table(io.BytesIO(upload.getvalue()), columns=columns,
+                                            fmt=format_of(upload.name), date_errors='coerce'))
+        nbytes = int(df.memory_usage(deep=True).sum())
+        self._frames[key] = (df, nbytes)
+        self.used_bytes += nbytes
+        while self.used_bytes > self.max_bytes and len(self._frames) > 1:
+            _, (_, evicted) = self._frames.popitem(last=False)
+            self.used_bytes -= evicted
+        return df
+
+    def resource(self, upload, name, build):
+        """``build()`` once per content of ``upload`` and ``name``; other uploads' resources are dropped."""
+        key = self.content_key(upload)
+        if key != self._resources_key:
+            self._resources_key, self._resources = key, {}
+        if name in self._resources:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._resources[name] = build()
+        return self._resources[name]
@@ -0,0 +1 @@
+"""Feature engineering pipeline for the HealthKart influencer dashboard."""
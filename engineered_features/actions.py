@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+
+# Investment action engine shared by the pipeline and the dashboard.
+# Invest More / Optimize / Monitor are picked from ROAS thresholds and payout
+# percentiles. The percentiles can come from an exact quantile over the rows,
+# or from a payout sketch: log-spaced bucket counts (DDSketch style, relative
+# error <= SKETCH_ALPHA) kept per cell of the filter dimensions. Sketches merge
+# by adding counts, so the percentiles of any filter combination are read from
+# the few matching cells instead of rescanning master_df, and sketches of
+# separate slices (chunks, shards) combine like the other partial aggregates.
+# Monitor picks are seeded: the rows with the smallest seeded hash of their id.
+
+ACTION_COLUMNS = ['name', 'roas', 'total_payout', 'total_revenue', 'platform']
+DEFAULT_THRESHOLDS = {
+    'invest_min_roas': 3.5,           # Invest More: ROAS at least this ...
+    'invest_payout_quantile': 0.30,   # ... and payout at most this percentile
+    'optimize_max_roas': 2.0,         # Optimize: ROAS below this ...
+    'optimize_payout_quantile': 0.70,  # ... and payout at least this percentile
+    'top_n': 5,
+    'seed': 0,
+}
+
+SKETCH_DIMENSIONS = ['platform', 'category', 'follower_tier', 'performance_category']
+SKETCH_ALPHA = 0.01
+_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+# Bucket of zero and negative payouts
+ZERO_BUCKET = np.iinfo(np.int32).min
+
+
+def resolve_thresholds(thresholds=None):
+    return {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+
+def payout_buckets(values):
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keys = np.ceil(np.log(values) / np.log(_GAMMA))
+    return np.where(values > 0, keys, ZERO_BUCKET).astype(np.int32)
+
+
+def bucket_values(buckets):
+    # Representative value of each bucket, within SKETCH_ALPHA of any member
+    buckets = np.asarray(buckets)
+    values = 2 * _GAMMA ** buckets.astype(float) / (_GAMMA + 1)
+    return np.where(buckets == ZERO_BUCKET, 0.0, values)
+
+
+def payout_sketch(master_df, dims=None):
+    """Payout bucket counts per cell of ``dims``: one row per (cell, bucket)."""
+    dims = [d for d in (dims or SKETCH_DIMENSIONS) if d in master_df.columns]
+    rows = master_df[dims + ['total_payout']].dropna(subset=['total_payout'])
+    rows = rows.assign(bucket=payout_buckets(rows['total_payout']))
+    return rows.groupby(dims + ['bucket'], observed=True, dropna=False).size().rename('count').reset_index()
+
+
+def merge_sketches(sketches):
+    sketches = [s for s in sketches if len(s)]
+    if not sketches:
+        return pd.DataFrame(columns=['bucket', 'count'])
+    dims = [c for c in sketches[0].columns if c not in ('bucket', 'count')]
+    return (pd.concat(sketches, ignore_index=True)
+            .groupby(dims + ['bucket'], observed=True, dropna=False)['count'].sum().reset_index())
+
+
+def sketch_quantiles(sketch, quantiles, selections=None):
+    """Approximate payout ``quantiles`` of the rows matching ``selections``.
+
+    ``selections`` maps sketch dimensions to the values kept (empty = all), like
+    the dashboard's sidebar filters. Uses linear interpolation between order
+    statistics, as ``Series.quantile`` does. Returns None when nothing matches.
+    """
+    keep = np.ones(len(sketch), dtype=bool)
+    for col, selected in (selections or {}).items():
+        if selected:
+            keep &= sketch[col].isin(list(selected)).to_numpy()
+    counts = sketch.loc[keep].groupby('bucket')['count'].sum().sort_index()
+    if counts.empty:
+        return None
+    cumulative = counts.to_numpy().cumsum()
+    values = bucket_values(counts.index.to_numpy())
+    results = []
+    for q in quantiles:
+        rank = q * (cumulative[-1] - 1)
+        lo, hi = np.searchsorted(cumulative, [np.floor(rank) + 1, np.ceil(rank) + 1])
+        results.append(values[lo] + (values[hi] - values[lo]) * (rank - np.floor(rank)))
+    return results
+
+
+def seeded_pick(df, n, seed=0):
+    """``n`` rows of ``df`` chosen by a seeded hash of their id: reproducible, and a
+    row that is picked stays picked while it remains in a filtered view."""
+    if len(df) <= n:
+        return df
+    ids = df['influencer_id'] if 'influencer_id' in df.columns else df.index.to_series()
+    hashes = pd.util.hash_pandas_object(ids, index=False, hash_key=f'{seed:016d}'[-16:]).to_numpy()
+    return df.iloc[np.argsort(hashes, kind='stable')[:n]]
+
+
+def select_actions(df, thresholds=None, payout_quantiles=None):
+    """Invest More, Optimize and Monitor tables for ``df``.
+
+    ``payout_quantiles`` is the (low, high) payout pair from a sketch; without it
+    the exact quantiles of ``df`` are used.
+    """
+    t = resolve_thresholds(thresholds)
+    if df.empty:
+        empty = pd.DataFrame(columns=ACTION_COLUMNS)
+        return empty, empty, empty
+    if payout_quantiles is None:
+        payout_quantiles = df['total_payout'].quantile(
+            [t['invest_payout_quantile'], t['optimize_payout_quantile']]).tolist()
+    low_payout, high_payout = payout_quantiles
+    roas = df['roas'].to_numpy(dtype=float, na_value=np.nan)
+    payout = df['total_payout'].to_numpy(dtype=float, na_value=np.nan)
+    columns = [c for c in ACTION_COLUMNS if c in df.columns]
+
+    # INVEST MORE: High ROAS, Low Investment
+    invest_more_df = df[(roas >= t['invest_min_roas']) & (payout <= low_payout)].nlargest(t['top_n'], 'roas')[columns]
+    # OPTIMIZE: Low ROAS, High Investment
+    optimize_df = df[(roas < t['optimize_max_roas']) & (payout >= high_payout)].nsmallest(t['top_n'], 'roas')[columns]
+    # MONITOR: Medium Performance
+    monitor = df[(roas >= t['optimize_max_roas']) & (roas < t['invest_min_roas'])]
+    monitor_df = seeded_pick(monitor, t['top_n'], t['seed'])[columns]
+    return invest_more_df, optimize_df, monitor_df
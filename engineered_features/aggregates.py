@@ -0,0 +1,195 @@
+import pandas as pd
+
+from engineered_features.schema import apply_schema
+from engineered_features.storage import iter_table_chunks
+
+
+# Partial (mergeable) per-influencer aggregates behind posts_agg and tracking_agg.
+# A partial holds only sums, counts and min/max dates, so partials computed on
+# separate slices of the raw data can be combined and finalized into exactly
+# the tables aggregate_posts / aggregate_tracking build in one pass.
+
+POSTS_PARTIAL_COLUMNS = ['post_count', 'reach_sum', 'reach_count', 'likes_sum', 'likes_count',
+                         'comments_sum', 'comments_count', 'first_post_date', 'last_post_date']
+TRACKING_PARTIAL_COLUMNS = ['orders_sum', 'revenue_sum']
+
+
+def empty_posts_partial():
+    dtypes = {c: 'datetime64[ns]' if c.endswith('_date') else 'float64' for c in POSTS_PARTIAL_COLUMNS}
+    return pd.DataFrame(columns=POSTS_PARTIAL_COLUMNS, index=pd.Index([], name='influencer_id')).astype(dtypes)
+
+
+def empty_tracking_partial():
+    return pd.DataFrame(columns=TRACKING_PARTIAL_COLUMNS, index=pd.Index([], name='influencer_id'), dtype=float)
+
+
+def empty_campaign_pairs():
+    return pd.DataFrame(columns=['influencer_id', 'campaign'])
+
+
+def partial_posts(posts_df):
+    partial = posts_df.groupby('influencer_id').agg(
+        post_count=('post_id', 'count'),
+        reach_sum=('reach', 'sum'),
+        reach_count=('reach', 'count'),
+        likes_sum=('likes', 'sum'),
+        likes_count=('likes', 'count'),
+        comments_sum=('comments', 'sum'),
+        comments_count=('comments', 'count'),
+        first_post_date=('date', 'min'),
+        last_post_date=('date', 'max'),
+    )
+    return partial
+
+
+def partial_tracking(tracking_df):
+    partial = tracking_df.groupby('influencer_id').agg(
+        orders_sum=('orders', 'sum'),
+        revenue_sum=('revenue', 'sum'),
+    )
+    return partial
+
+
+def campaign_pairs(tracking_df):
+    # Distinct (influencer, campaign) pairs: the exact state behind campaigns_count
+    return tracking_df[['influencer_id', 'campaign']].drop_duplicates()
+
+
+# Daily tracking cube: orders, revenue and event counts per
+# date x source x campaign x product x influencer. Cubes are plain sums, so
+# cubes of separate slices combine by re-grouping, and every coarser roll-up
+# (per product, per week, per campaign ...) can be served from the cube.
+CUBE_DIMENSIONS = ['date', 'source', 'campaign', 'product', 'influencer_id']
+CUBE_MEASURES = ['orders', 'revenue', 'events']
+
+
+def tracking_cube(tracking_df):
+    cube = tracking_df.groupby(CUBE_DIMENSIONS, observed=True, dropna=False).agg(
+        orders=('orders', 'sum'),
+        revenue=('revenue', 'sum'),
+        events=('orders', 'size'),
+    )
+    return cube.reset_index()
+
+
+def _union_categories(frames, columns):
+    # Frames read separately carry their own category dictionaries, and concat
+    # would fall back to object strings; give them one shared dictionary first
+    for col in columns:
+        if all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames):
+            categories = pd.Index(sorted(set().union(*(f[col].cat.categories for f in frames))))
+            frames = [f.assign(**{col: f[col].cat.set_categories(categories)}) for f in frames]
+    return frames
+
+
+def combine_cubes(cubes):
+    cubes = [c for c in cubes if len(c)]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+    return (pd.concat(_union_categories(cubes, CUBE_DIMENSIONS), ignore_index=True)
+            .groupby(CUBE_DIMENSIONS, observed=True, dropna=False)[CUBE_MEASURES].sum().reset_index())
+
+
+def combine_posts_partials(partials):
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return empty_posts_partial()
+    combined = pd.concat(partials).groupby(level='influencer_id')
+    sums = combined[[c for c in POSTS_PARTIAL_COLUMNS if c.endswith(('_count', '_sum'))]].sum()
+    sums['first_post_date'] = combined['first_post_date'].min()
+    sums['last_post_date'] = combined['last_post_date'].max()
+    return sums[POSTS_PARTIAL_COLUMNS]
+
+
+def combine_tracking_partials(partials):
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return empty_tracking_partial()
+    return pd.concat(partials).groupby(level='influencer_id')[TRACKING_PARTIAL_COLUMNS].sum()
+
+
+def combine_campaign_pairs(pairs):
+    pairs = [p for p in pairs if len(p)]
+    if not pairs:
+        return empty_campaign_pairs()
+    return pd.concat(pairs, ignore_index=True).drop_duplicates(ignore_index=True)
+
+
+def finalize_posts(partial):
+    """Turn a posts partial into the ``posts_agg`` table of ``aggregate_posts``."""
+    posts_agg = pd.DataFrame({
+        'total_posts': partial['post_count'],
+        'total_reach': partial['reach_sum'],
+        'avg_reach_per_post': partial['reach_sum'] / partial['reach_count'],
+        'total_likes': partial['likes_sum'],
+        'avg_likes_per_post': partial['likes_sum'] / partial['likes_count'],
+        'total_comments': partial['comments_sum'],
+        'avg_comments_per_post': partial['comments_sum'] / partial['comments_count'],
+    }, index=partial.index).round(2)
+    # Added after rounding, which only applies to the numbers
+    posts_agg['first_post_date'] = partial['first_post_date']
+    posts_agg['last_post_date'] = partial['last_post_date']
+    return posts_agg.sort_index().reset_index()
+
+
+def finalize_tracking(partial, pairs):
+    """Turn a tracking partial and campaign pairs into the ``tracking_agg`` table."""
+    campaigns_count = pairs.dropna(subset=['campaign']).groupby('influencer_id').size()
+    tracking_agg = pd.DataFrame({
+        'total_orders': partial['orders_sum'],
+        'total_revenue': partial['revenue_sum'],
+        'campaigns_count': campaigns_count.reindex(partial.index, fill_value=0),
+    }, index=partial.index).round(2)
+    return tracking_agg.sort_index().reset_index()
+
+
+# ----------------------------------------------------------------------------
+# Out-of-core aggregation: stream a table in chunks and fold each chunk's partial
+# into a running one, so peak memory is bounded by the chunk size plus the
+# per-influencer state (and the distinct campaign pairs) instead of the file.
+# The daily cube is the exception: it grows with the date range rather than the
+# influencer count, so chunk cubes are buffered and only folded into the running
+# cube once they outnumber its rows. Each cube row is then regrouped a bounded
+# number of times, and memory stays within about twice the cube plus a chunk.
+# ----------------------------------------------------------------------------
+def _typed(df, table, dtype):
+    # Chunks carry their own category dictionaries, so the combined result is
+    # typed once at the end (sorted categories, like a whole-table read)
+    return apply_schema(df, table) if dtype is not None else df
+
+
+def stream_posts_agg(path, chunksize=1_000_000, dtype=None):
+    """Chunked equivalent of ``aggregate_posts`` over the posts table at ``path``.
+
+    ``dtype`` (e.g. ``schema.read_dtypes('posts')``) is applied while reading;
+    when given, the result has the dtypes of ``aggregate_posts`` on the typed table.
+    """
+    partial = empty_posts_partial()
+    columns = ['post_id', 'influencer_id', 'date', 'reach', 'likes', 'comments']
+    for chunk in iter_table_chunks(path, columns, chunksize, dtype):
+        partial = combine_posts_partials([partial, partial_posts(chunk)])
+    return _typed(finalize_posts(partial), 'posts_agg', dtype)
+
+
+def stream_tracking_agg(path, chunksize=1_000_000, dtype=None):
+    """Chunked equivalent of ``aggregate_tracking`` over the tracking table at ``path``.
+
+    Also returns the daily tracking cube and the number of distinct campaigns,
+    which the executive KPIs, product table and trend views would otherwise
+    need the full tracking table for. ``dtype`` works as in ``stream_posts_agg``.
+    """
+    partial = empty_tracking_partial()
+    pairs = empty_campaign_pairs()
+    cube, pending, pending_rows = combine_cubes([]), [], 0
+    for chunk in iter_table_chunks(path, CUBE_DIMENSIONS + ['orders', 'revenue'], chunksize, dtype):
+        partial = combine_tracking_partials([partial, partial_tracking(chunk)])
+        pairs = combine_campaign_pairs([pairs, campaign_pairs(chunk)])
+        pending.append(tracking_cube(chunk))
+        pending_rows += len(pending[-1])
+        if pending_rows > len(cube):
+            cube, pending, pending_rows = combine_cubes([cube] + pending), [], 0
+
+    cube = combine_cubes([cube] + pending)
+    active_campaigns = pairs['campaign'].nunique()
+    return (_typed(finalize_tracking(partial, pairs), 'tracking_agg', dtype), _typed(cube, 'cube', dtype),
+            active_campaigns)
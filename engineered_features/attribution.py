@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+
+# Multi-touch attribution over the tracking events.
+# Every event is a touch of its user; an event with orders or revenue is also a
+# conversion. A conversion's orders and revenue are credited to the touches of
+# the same user dated within ``lookback_days`` before it (its own day included,
+# up to and including the conversion itself):
+#   last        the latest touch
+#   first       the earliest touch
+#   linear      equal shares
+#   time_decay  shares halving every ``half_life_days`` of age
+# Dates are days, so touches on the same day are ordered as they appear in the
+# table. Events are sorted once by (user, day); each conversion's window is then
+# a contiguous range [lo, hi) found with searchsorted (an as-of join), and
+# shares are spread over the ranges with a difference array, so the cost is
+# O(n log n) whatever the window sizes. time_decay joins (user, day) groups
+# once per day of lookback instead, plus running sums within the own day.
+# Credits always add up to the raw totals; only the events (and so
+# influencers, posts, campaigns) they are booked to change.
+
+ATTRIBUTION_MODELS = ['last', 'first', 'linear', 'time_decay']
+DEFAULT_LOOKBACK_DAYS = 30
+DEFAULT_HALF_LIFE_DAYS = 7
+ATTRIBUTION_LEVELS = {
+    'influencer': ['influencer_id'],
+    'post': ['influencer_id', 'post_id'],
+    'campaign': ['campaign'],
+}
+
+
+def _codes(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64)
+    return pd.factorize(series, use_na_sentinel=True)[0].astype(np.int64)
+
+
+def _range_add(values, lo, hi, n):
+    # Adds values[i] to every position of [lo[i], hi[i]) in one pass
+    diff = np.bincount(lo, weights=values, minlength=n + 1) - np.bincount(hi, weights=values, minlength=n + 1)
+    return np.cumsum(diff[:n])
+
+
+def _lagged(group_keys, offset):
+    # Position of the group keyed ``key + offset`` for every group, and whether it exists
+    target = group_keys + offset
+    pos = np.minimum(np.searchsorted(group_keys, target), len(group_keys) - 1)
+    return pos, group_keys[pos] == target
+
+
+def _time_decay(keys, conversions, credits, lookback_days, half_life_days):
+    # Weights depend only on the gap in days, so the earlier days of a window are handled on
+    # (user, day) groups: each group is joined to the groups 1..lookback days before it (its
+    # window) and after it (the conversions it is a touch of). The conversion's own day only
+    # counts the touches up to the conversion itself, which is a running count (for the
+    # window) and a suffix sum (for the credit) within the group. All weights are <= 1, so
+    # no sum is rescaled by a large factor.
+    n = len(keys)
+    group_keys, starts, touches = np.unique(keys, return_index=True, return_counts=True)
+    group = np.repeat(np.arange(len(group_keys)), touches)
+    decay = np.exp2(-np.arange(lookback_days + 1) / half_life_days)
+    earlier = np.zeros(len(group_keys))
+    for lag, weight in enumerate(decay[1:], start=1):
+        pos, found = _lagged(group_keys, -lag)
+        earlier += np.where(found, weight * touches[pos], 0)
+    window = earlier[group[conversions]] + conversions - starts[group[conversions]] + 1
+    ends = starts + touches - 1
+    booked = []
+    for c in credits.T:
+        per_touch = np.zeros(n)
+        per_touch[conversions] = c / window
+        running = np.cumsum(per_touch)
+        same_day = running[ends[group]] - running + per_touch
+        group_total = running[ends] - running[starts] + per_touch[starts]
+        unit = np.zeros(len(group_keys))
+        for lag, weight in enumerate(decay[1:], start=1):
+            pos, found = _lagged(group_keys, lag)
+            unit += np.where(found, weight * group_total[pos], 0)
+        booked.append(unit[group] + same_day)
+    return booked
+
+
+def attribute_events(tracking_df, model='last', lookback_days=DEFAULT_LOOKBACK_DAYS,
+                     half_life_days=DEFAULT_HALF_LIFE_DAYS):
+    """Attributed ``(orders, revenue)`` arrays aligned with the rows of ``tracking_df``.
+
+    Needs user_id, date, orders and revenue. Events without a user only credit
+    themselves.
+    """
+    if model not in ATTRIBUTION_MODELS:
+        raise ValueError(f"Unknown attribution model {model!r} (expected one of {ATTRIBUTION_MODELS})")
+    if lookback_days < 0 or half_life_days <= 0:
+        raise ValueError("lookback_days must be >= 0 and half_life_days > 0")
+    n = len(tracking_df)
+    orders = tracking_df['orders'].to_numpy(dtype=float, na_value=0)
+    revenue = tracking_df['revenue'].to_numpy(dtype=float, na_value=0)
+    if n == 0:
+        return orders, revenue
+
+    users = _codes(tracking_df['user_id'])
+    # Userless events get a user of their own each
+    missing = users < 0
+    users[missing] = users.max() + 1 + np.arange(missing.sum())
+    days = tracking_df['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    days -= days.min()
+
+    order = np.lexsort((np.arange(n), days, users))
+    users, days = users[order], days[order]
+    # (user, day) packed into one sortable key; a day's lookback never reaches the previous user
+    span = days.max() + lookback_days + 1
+    keys = users * span + days
+
+    conversions = np.flatnonzero((orders[order] != 0) | (revenue[order] != 0))
+    lo = np.searchsorted(keys, keys[conversions] - lookback_days, side='left')
+    # A window ends at the conversion itself: same-day events after it are not its touches
+    hi = conversions + 1
+    credits = np.column_stack([orders[order][conversions], revenue[order][conversions]])
+
+    if model == 'last':
+        booked = [np.bincount(hi - 1, weights=c, minlength=n) for c in credits.T]
+    elif model == 'first':
+        booked = [np.bincount(lo, weights=c, minlength=n) for c in credits.T]
+    elif model == 'linear':
+        share = 1.0 / (hi - lo)
+        booked = [_range_add(c * share, lo, hi, n) for c in credits.T]
+    else:
+        booked = _time_decay(keys, conversions, credits, lookback_days, half_life_days)
+
+    attributed = []
+    for values in booked:
+        out = np.empty(n)
+        out[order] = values
+        attributed.append(out)
+    return tuple(attributed)
+
+
+def attribute_tracking(tracking_df, model='last', lookback_days=DEFAULT_LOOKBACK_DAYS,
+                       half_life_days=DEFAULT_HALF_LIFE_DAYS):
+    """``tracking_df`` with orders and revenue replaced by their attributed credit.
+
+    The result feeds aggregate_tracking and tracking_cube unchanged, so master_df
+    and the cube carry attributed instead of raw sums.
+    """
+    orders, revenue = attribute_events(tracking_df, model, lookback_days, half_life_days)
+    return tracking_df.assign(orders=orders, revenue=revenue)
+
+
+def attribution_tables(tracking_df, attributed_df):
+    """Raw vs attributed orders and revenue per influencer, post and campaign."""
+    tables = {}
+    for level, keys in ATTRIBUTION_LEVELS.items():
+        if not set(keys) <= set(tracking_df.columns):
+            continue
+        raw = tracking_df.groupby(keys, observed=True)[['orders', 'revenue']].sum()
+        credited = attributed_df.groupby(keys, observed=True)[['orders', 'revenue']].sum()
+        table = raw.add_prefix('raw_').join(credited.add_prefix('attributed_'), how='outer').fillna(0)
+        table['revenue_shift'] = table['attributed_revenue'] - table['raw_revenue']
+        tables[level] = table.round(2).reset_index()
+    return tables
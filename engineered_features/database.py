@@ -0,0 +1,93 @@
+import os
+import sqlite3
+
+import pandas as pd
+
+
+# Embedded database copy of the dashboard tables.
+# master_df, the tracking cube and the roll-ups are written into one local
+# database file, so the dashboard can push filters, groupbys and orderings down
+# as SQL instead of holding master_df in every session. DuckDB (columnar,
+# vectorized, multi-threaded) is used for .duckdb files and is optional;
+# .sqlite/.db files use the standard library's sqlite3.
+# master_df gets a ``_row`` column with its row order, the tie-break the pandas
+# code gets from row order. Categoricals are stored as text and dates as
+# timestamps (SQLite: 'YYYY-MM-DD HH:MM:SS' text, which compares correctly).
+
+ENGINES = {'.duckdb': 'duckdb', '.sqlite': 'sqlite', '.sqlite3': 'sqlite', '.db': 'sqlite'}
+DATABASE_TABLES = ['master_df', 'tracking_cube', 'rollups']
+ROW_COLUMN = '_row'
+# Indexed in SQLite (DuckDB relies on its zone maps instead)
+INDEXED_COLUMNS = ['platform', 'category', 'follower_tier', 'performance_category', 'influencer_id']
+
+
+def has_duckdb():
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def engine_of(path):
+    return ENGINES.get(os.path.splitext(str(path))[1].lower(), 'sqlite')
+
+
+def connect(path, read_only=False):
+    """Connection to the database file at ``path`` (engine chosen by extension)."""
+    if engine_of(path) == 'duckdb':
+        if not has_duckdb():
+            raise ImportError(f"duckdb is not installed; use a .sqlite path instead of {path}")
+        import duckdb
+        return duckdb.connect(str(path), read_only=read_only)
+    if read_only:
+        return sqlite3.connect(f'file:{path}?mode=ro', uri=True, check_same_thread=False)
+    return sqlite3.connect(str(path))
+
+
+def _storable(df):
+    # Categoricals -> plain text columns (NaN stays NULL)
+    changes = {c: df[c].astype(df[c].cat.categories.dtype) for c in df.columns
+               if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.assign(**changes) if changes else df
+
+
+def _write(con, engine, name, df):
+    df = _storable(df)
+    if engine == 'duckdb':
+        con.register('frame', df)
+        con.execute(f'CREATE TABLE "{name}" AS SELECT * FROM frame')
+        con.unregister('frame')
+        return
+    df.to_sql(name, con, index=False)
+    for col in INDEXED_COLUMNS:
+        if col in df.columns:
+            con.execute(f'CREATE INDEX "{name}_{col}" ON "{name}" ("{col}")')
+
+
+def write_database(path, master_df, cube=None, rollups=None):
+    """Write the dashboard tables into a fresh database file at ``path``.
+
+    The file is built next to ``path`` and swapped in with os.replace, so
+    readers never see a half-written database.
+    """
+    directory = os.path.dirname(str(path))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    engine = engine_of(path)
+    root, ext = os.path.splitext(str(path))
+    tmp = f'{root}.tmp{ext}'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    tables = {'master_df': master_df.assign(**{ROW_COLUMN: range(len(master_df))}),
+              'tracking_cube': cube, 'rollups': rollups}
+    con = connect(tmp)
+    try:
+        for name, df in tables.items():
+            if df is not None:
+                _write(con, engine, name, df)
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, path)
+    return path
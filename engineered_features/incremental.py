@@ -0,0 +1,235 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from engineered_features.aggregates import (
+    campaign_pairs, combine_campaign_pairs, combine_posts_partials, combine_tracking_partials,
+    empty_campaign_pairs, empty_posts_partial, empty_tracking_partial, finalize_posts,
+    finalize_tracking, partial_posts, partial_tracking,
+)
+from engineered_features.processing_data import (
+    add_days_since_last_post, add_derived_features, add_primary_kpis, add_rankings, add_status,
+    add_time_metrics, clean_datasets, merge_master, raw_table_path,
+)
+from engineered_features.refresher import (
+    MANIFEST_FILE, STAGING_PREFIX, VERSIONS_DIR, current_snapshot, prune, publish, read_manifest,
+)
+from engineered_features.storage import read_table, write_table
+
+
+# Incremental refresh of master_df.
+# The state directory keeps the per-influencer partial aggregates (sums, counts,
+# min/max dates and distinct campaign pairs) plus the last master_df. A refresh
+# folds only the newly arrived post/tracking rows into those partials and
+# rebuilds the KPI columns only for influencers whose inputs changed; the
+# as-of and global columns (days_since_last_post, status, ranks) are refreshed
+# for every row with vectorized expressions.
+#
+# The state is published like the refresher's snapshots: each save writes a
+# new versions/<version>/ directory and then swaps the CURRENT pointer, so a
+# crash mid-save leaves the previous state intact. Its manifest lists every
+# delta file folded so far (size + content hash); a delta already in it is
+# skipped instead of being counted twice.
+#
+# state_dir/
+#   CURRENT                 name of the live state version
+#   versions/<version>/     partials, master_df.csv + manifest.json
+
+STATE_FILES = {
+    'posts': 'posts_partial.csv',
+    'tracking': 'tracking_partial.csv',
+    'pairs': 'campaign_pairs.csv',
+    'master': 'master_df.csv',
+}
+POST_COLUMNS = ['post_id', 'influencer_id', 'platform', 'date', 'reach', 'likes', 'comments']
+TRACKING_COLUMNS = ['source', 'campaign', 'post_id', 'influencer_id', 'user_id', 'product', 'date', 'orders', 'revenue']
+# State versions kept under versions/, the live one included
+KEEP_STATES = 2
+
+
+def load_state(state_dir):
+    # Directories written before states were versioned hold the files directly
+    snapshot = current_snapshot(state_dir) or state_dir
+
+    def path(key):
+        return os.path.join(snapshot, STATE_FILES[key])
+
+    manifest = read_manifest(snapshot) if snapshot != state_dir else None
+    state = {
+        'posts': empty_posts_partial(),
+        'tracking': empty_tracking_partial(),
+        'pairs': empty_campaign_pairs(),
+        'master': None,
+        'folded': manifest['folded'] if manifest else [],
+        'sequence': manifest['sequence'] if manifest else 0,
+    }
+    if os.path.exists(path('posts')):
+        state['posts'] = _with_dates(pd.read_csv(path('posts'), index_col='influencer_id'))
+    if os.path.exists(path('tracking')):
+        state['tracking'] = pd.read_csv(path('tracking'), index_col='influencer_id')
+    if os.path.exists(path('pairs')):
+        state['pairs'] = pd.read_csv(path('pairs'))
+    if os.path.exists(path('master')):
+        state['master'] = _with_dates(pd.read_csv(path('master')))
+    return state
+
+
+def _with_dates(df):
+    # parse_dates leaves an all-empty column (no posts folded yet) as float
+    for col in ['first_post_date', 'last_post_date']:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def save_state(state_dir, state):
+    """Write ``state`` as a new version under ``state_dir`` and make it the live one."""
+    state['sequence'] += 1
+    version = f"{state['sequence']:06d}-{datetime.now().strftime('%Y%m%dT%H%M%S')}"
+    staging = os.path.join(state_dir, VERSIONS_DIR, STAGING_PREFIX + version)
+    os.makedirs(staging, exist_ok=True)
+    for key, filename in STATE_FILES.items():
+        # Partials keep their influencer_id index, the others are plain tables
+        state[key].to_csv(os.path.join(staging, filename), index=key in ('posts', 'tracking'))
+    with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+        json.dump({'version': version, 'sequence': state['sequence'], 'folded': state['folded']}, f, indent=2)
+    publish(state_dir, staging, version)
+    prune(state_dir, KEEP_STATES)
+    return version
+
+
+def delta_record(path):
+    """Size and content hash identifying a delta file, whatever its path or mtime."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return {'path': os.path.abspath(path), 'size': os.path.getsize(path), 'sha1': digest.hexdigest()}
+
+
+def is_folded(state, record):
+    return any(r['sha1'] == record['sha1'] and r['size'] == record['size'] for r in state['folded'])
+
+
+def _fold(partial, delta, combine):
+    # Combine only the touched influencers' partials with the delta
+    touched = partial.index.isin(delta.index)
+    untouched = partial[~touched]
+    combined = combine([partial[touched], delta])
+    return pd.concat([untouched, combined]) if len(untouched) else combined
+
+
+def _base_changes(previous, influencers_df, payouts_df):
+    # Influencers whose profile or payout fields differ from the last refresh
+    base = influencers_df.merge(payouts_df, on='influencer_id', how='left').set_index('influencer_id')
+    prev = previous.set_index('influencer_id').reindex(base.index)[base.columns]
+    differs = base.ne(prev) & ~(base.isna() & prev.isna())
+    return set(base.index[differs.any(axis=1)])
+
+
+def refresh_master(state, influencers_df, payouts_df, new_posts=None, new_tracking=None, as_of=None):
+    """Fold new post/tracking rows into ``state`` and return the refreshed master_df.
+
+    ``state`` is the dict returned by ``load_state`` and is updated in place.
+    """
+    changed = set()
+    if new_posts is not None and len(new_posts):
+        delta = partial_posts(new_posts)
+        state['posts'] = _fold(state['posts'], delta, combine_posts_partials)
+        changed |= set(delta.index)
+    if new_tracking is not None and len(new_tracking):
+        delta = partial_tracking(new_tracking)
+        state['tracking'] = _fold(state['tracking'], delta, combine_tracking_partials)
+        state['pairs'] = combine_campaign_pairs([state['pairs'], campaign_pairs(new_tracking)])
+        changed |= set(delta.index)
+
+    previous = state['master']
+    if previous is None:
+        changed = set(influencers_df['influencer_id'])
+    else:
+        changed |= _base_changes(previous, influencers_df, payouts_df)
+
+    # Re-derive the row-local columns for the changed influencers only
+    in_changed = influencers_df['influencer_id'].isin(changed)
+    ids = influencers_df.loc[in_changed, 'influencer_id']
+    posts_agg = finalize_posts(state['posts'][state['posts'].index.isin(ids)])
+    tracking_agg = finalize_tracking(state['tracking'][state['tracking'].index.isin(ids)],
+                                     state['pairs'][state['pairs']['influencer_id'].isin(ids)])
+    updated = merge_master(influencers_df[in_changed], posts_agg, tracking_agg,
+                           payouts_df[payouts_df['influencer_id'].isin(ids)])
+    updated = add_primary_kpis(updated)
+    updated = add_derived_features(updated)
+    updated = add_time_metrics(updated, as_of)
+    updated = add_status(updated)
+
+    if previous is None:
+        master_df = updated
+    else:
+        kept = previous[previous['influencer_id'].isin(influencers_df['influencer_id'])
+                        & ~previous['influencer_id'].isin(ids)]
+        master_df = pd.concat([kept, updated], ignore_index=True)[previous.columns]
+        master_df = (master_df.set_index('influencer_id')
+                     .reindex(influencers_df['influencer_id']).reset_index())
+
+    # Columns that depend on the refresh date or on every influencer
+    master_df = add_days_since_last_post(master_df, as_of)
+    master_df = add_status(master_df)
+    master_df = add_rankings(master_df)
+    state['master'] = master_df
+    return master_df
+
+
+def _read_delta(path, columns):
+    return read_table(path) if path else pd.DataFrame(columns=columns)
+
+
+def apply_deltas(state_dir, data_dir, new_posts=None, new_tracking=None, as_of=None, log=print):
+    """Fold the delta files into the state under ``state_dir``; returns the refreshed master_df.
+
+    A delta file whose contents were already folded into the state is skipped.
+    """
+    state = load_state(state_dir)
+    records = {}
+    for kind, path in [('posts', new_posts), ('tracking', new_tracking)]:
+        if path is None:
+            continue
+        record = delta_record(path)
+        if is_folded(state, record) or record in records.values():
+            log(f"… Skipping {path}: it was already folded into {state_dir}")
+        else:
+            records[kind] = record
+
+    influencers_df, posts_df, tracking_df, payouts_df = clean_datasets(
+        read_table(raw_table_path(data_dir, 'influencers')),
+        _read_delta(new_posts if 'posts' in records else None, POST_COLUMNS),
+        _read_delta(new_tracking if 'tracking' in records else None, TRACKING_COLUMNS),
+        read_table(raw_table_path(data_dir, 'payouts')),
+    )
+    master_df = refresh_master(state, influencers_df, payouts_df, posts_df, tracking_df, as_of=as_of)
+    state['folded'] = state['folded'] + [dict(r, kind=kind) for kind, r in records.items()]
+    save_state(state_dir, state)
+    log(f"✓ Folded {len(posts_df)} posts and {len(tracking_df)} tracking rows into {state_dir}")
+    return master_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally refresh master_df from newly arrived rows.")
+    parser.add_argument('--state-dir', required=True, help="directory holding the partial aggregates")
+    parser.add_argument('--data-dir', default='/content', help="directory with the influencers and payouts tables")
+    parser.add_argument('--new-posts', default=None, help="table (CSV/Parquet/Arrow) with only the newly arrived posts")
+    parser.add_argument('--new-tracking', default=None, help="table (CSV/Parquet/Arrow) with only the newly arrived tracking rows")
+    parser.add_argument('--as-of', default=None, help="reference date for days_since_last_post (YYYY-MM-DD)")
+    parser.add_argument('--output-dir', default=None, help="also write the refreshed master_df.csv here")
+    args = parser.parse_args()
+
+    master_df = apply_deltas(args.state_dir, args.data_dir, args.new_posts, args.new_tracking, as_of=args.as_of)
+
+    if args.output_dir:
+        print(f"✓ Saved {write_table(master_df, args.output_dir, 'master_df')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+# Per-stage instrumentation for the pipeline.
+# ``recorder.run(name, fn, *args)`` calls ``fn(*args)`` and, when the recorder
+# is enabled, records wall and CPU time, rows in (DataFrame arguments) and out
+# (the result), traced memory growth and peak, and the process max RSS. Stages
+# listed in ``profile`` also get a cProfile dump. A disabled recorder is just a
+# function call, so the pipeline always goes through one.
+
+
+def _rows(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, (tuple, list)):
+        counts = [_rows(o) for o in obj]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+
+class StageRecorder:
+    """Records one pipeline run, stage by stage, into a JSON-serialisable report."""
+
+    def __init__(self, enabled=False, trace_memory=True, profile=(), profile_dir='.'):
+        self.profile = set(profile or ())
+        self.enabled = enabled or bool(self.profile)
+        self.trace_memory = trace_memory and self.enabled
+        self.profile_dir = profile_dir
+        self.stages = []
+        self.started = datetime.now()
+        self._t0 = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def run(self, name, fn, *args, **kwargs):
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        record = {'stage': name, 'rows_in': _rows(list(args) + list(kwargs.values()))}
+        profiler = cProfile.Profile() if name in self.profile else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            if profiler:
+                profiler.disable()
+            record['wall_seconds'] = round(time.perf_counter() - wall, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu, 6)
+
+        record['rows_out'] = _rows(result)
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            record['memory_delta_mb'] = round((current - mem_start) / 2**20, 3)
+            record['memory_peak_mb'] = round((peak - mem_start) / 2**20, 3)
+        record['max_rss_mb'] = _max_rss_mb()
+        if profiler:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            record['profile'] = os.path.join(self.profile_dir, f'{name}.prof')
+            profiler.dump_stats(record['profile'])
+        self.stages.append(record)
+        return result
+
+    def report(self):
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'argv': sys.argv,
+            'python': sys.version.split()[0],
+            'pandas': pd.__version__,
+            'total_wall_seconds': round(time.perf_counter() - self._t0, 6),
+            'memory_traced': self.trace_memory,
+            'stages': self.stages,
+        }
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.report(), f, indent=2, default=str)
+        os.replace(tmp, path)
+        return path
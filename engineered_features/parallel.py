@@ -0,0 +1,146 @@
+import argparse
+import glob
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from engineered_features.processing_data import (
+    PIPELINE_COLUMNS, add_derived_features, add_primary_kpis, add_rankings, add_status, add_time_metrics,
+    aggregate_posts, aggregate_tracking, build_insight_tables, build_investment_actions, clean_datasets,
+    compute_executive_kpis, merge_master, print_summary, raw_table_path, save_outputs,
+)
+from engineered_features.actions import merge_sketches, payout_sketch, resolve_thresholds, sketch_quantiles
+from engineered_features.aggregates import CUBE_DIMENSIONS, tracking_cube
+from engineered_features.rollups import compute_rollups
+from engineered_features.schema import apply_schema, share_id_dictionaries
+from engineered_features.storage import FORMATS, iter_table_chunks, read_table
+
+
+# Sharded pipeline.
+# Every step up to the status column is independent per influencer, so the raw
+# tables are hash-partitioned by influencer_id into shard files (streamed, so
+# the partitioner never holds a whole table) and each shard is processed in a
+# ProcessPoolExecutor worker. The reduce step concatenates the shard masters
+# and computes what needs global state: the dense ranks, the executive KPIs,
+# the investment actions and the platform/persona/category roll-ups. Each shard
+# also sketches its payouts; the sketches merge into the payout percentiles of
+# the investment actions without sorting the combined master_df.
+
+ROW_ORDER = '_row'
+
+
+def shard_ids(influencer_ids, num_shards):
+    # Stable across processes and runs (unlike the built-in hash of str)
+    return pd.util.hash_pandas_object(influencer_ids, index=False).to_numpy() % num_shards
+
+
+def partition_tables(data_dir, shard_dir, num_shards, chunk_size=1_000_000):
+    """Split the four raw tables into ``shard_dir/<table>.<shard>.<chunk>.pkl`` files."""
+    for name, columns in PIPELINE_COLUMNS.items():
+        path = raw_table_path(data_dir, name)
+        offset = 0
+        written = set()
+        chunk = None
+        for chunk_no, chunk in enumerate(iter_table_chunks(path, columns, chunk_size)):
+            if name == 'influencers':
+                # Remember the input order so the reduce step can restore it
+                chunk[ROW_ORDER] = range(offset, offset + len(chunk))
+                offset += len(chunk)
+            for shard, part in chunk.groupby(shard_ids(chunk['influencer_id'], num_shards)):
+                part.to_pickle(os.path.join(shard_dir, f"{name}.{shard}.{chunk_no}.pkl"))
+                written.add(shard)
+        if chunk is None:
+            # A table without rows can yield no chunks at all (e.g. a Parquet file
+            # with no batches); its columns alone give the empty shards their schema
+            chunk = read_table(path, columns=columns).iloc[:0]
+            if name == 'influencers':
+                chunk[ROW_ORDER] = pd.Series(dtype='int64')
+        # Empty shards still get a typed (zero-row) file so workers see the schema
+        for shard in set(range(num_shards)) - written:
+            chunk.iloc[:0].to_pickle(os.path.join(shard_dir, f"{name}.{shard}.0.pkl"))
+
+
+def _load_shard(shard_dir, name, shard):
+    paths = sorted(glob.glob(os.path.join(shard_dir, f"{name}.{shard}.*.pkl")))
+    return pd.concat([pd.read_pickle(p) for p in paths], ignore_index=True)
+
+
+def process_shard(shard_dir, shard, as_of=None):
+    """Map step: the per-influencer part of build_master_df for one shard."""
+    influencers_df = _load_shard(shard_dir, 'influencers', shard)
+    if influencers_df.empty:
+        return None
+    tables = clean_datasets(
+        influencers_df, _load_shard(shard_dir, 'posts', shard),
+        _load_shard(shard_dir, 'tracking', shard), _load_shard(shard_dir, 'payouts', shard))
+    influencers_df, posts_df, tracking_df, payouts_df = share_id_dictionaries(
+        *[apply_schema(df, name) for df, name in zip(tables, PIPELINE_COLUMNS)])
+
+    master_df = merge_master(influencers_df, aggregate_posts(posts_df), aggregate_tracking(tracking_df), payouts_df)
+    master_df = add_primary_kpis(master_df)
+    master_df = add_derived_features(master_df)
+    master_df = add_time_metrics(master_df, as_of)
+    master_df = add_status(master_df)
+
+    campaigns = set(tracking_df['campaign'].dropna())
+    return master_df, tracking_cube(tracking_df), campaigns, payout_sketch(master_df)
+
+
+def build_master_parallel(data_dir, workers=None, num_shards=None, as_of=None, chunk_size=1_000_000):
+    """Sharded equivalent of loading ``data_dir`` and running ``build_master_df``.
+
+    Returns ``(master_df, tracking_cube, active_campaigns, payout_sketch)``.
+    """
+    workers = workers or os.cpu_count() or 1
+    num_shards = num_shards or workers * 4
+    with tempfile.TemporaryDirectory(prefix='shards_') as shard_dir:
+        partition_tables(data_dir, shard_dir, num_shards, chunk_size)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [r for r in pool.map(process_shard, [shard_dir] * num_shards, range(num_shards),
+                                           [as_of] * num_shards) if r is not None]
+
+    # Reduce step: global ranks and totals over the shard results
+    master_df = (pd.concat([r[0] for r in results], ignore_index=True)
+                 .sort_values(ROW_ORDER).drop(columns=ROW_ORDER).reset_index(drop=True))
+    master_df = add_rankings(master_df)
+    # Shards hold disjoint influencers, so their cubes simply concatenate; sorted
+    # like the serial groupby so the row order does not depend on the shards
+    cube = (pd.concat([r[1] for r in results], ignore_index=True)
+            .sort_values(CUBE_DIMENSIONS, kind='stable').reset_index(drop=True))
+    active_campaigns = len(set().union(*[r[2] for r in results]))
+    return master_df, cube, active_campaigns, merge_sketches([r[3] for r in results])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build master_df with a process pool, sharded by influencer_id.")
+    parser.add_argument('--data-dir', default='/content', help="directory holding the four raw tables")
+    parser.add_argument('--output-dir', default=None, help="write master_df and insight tables here")
+    parser.add_argument('--format', choices=list(FORMATS), default='csv')
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--shards', type=int, default=None, help="number of influencer_id shards (default: 4 x workers)")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="rows read at a time while partitioning")
+    parser.add_argument('--as-of', default=None, help="reference date for days_since_last_post (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    master_df, cube, active_campaigns, sketch = build_master_parallel(
+        args.data_dir, args.workers, args.shards, args.as_of, args.chunk_size)
+    print(f"✓ Created master dataset with {len(master_df)} influencers")
+
+    executive_kpis = compute_executive_kpis(master_df, active_campaigns)
+    t = resolve_thresholds()
+    payout_quantiles = sketch_quantiles(sketch, [t['invest_payout_quantile'], t['optimize_payout_quantile']])
+    invest_more_df, optimize_df, monitor_df = build_investment_actions(master_df, payout_quantiles=payout_quantiles)
+    rollups = compute_rollups(master_df, cube)
+    insights = build_insight_tables(rollups)
+    print("✓ Calculated executive KPIs, investment actions and insight tables")
+
+    if args.output_dir:
+        save_outputs(args.output_dir, master_df, insights, args.format, cube=cube, rollups=rollups,
+                     executive_kpis=executive_kpis)
+        print(f"✓ Saved outputs to {args.output_dir}")
+    print_summary(master_df, executive_kpis)
+
+
+if __name__ == "__main__":
+    main()
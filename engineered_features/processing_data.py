@@ -1,316 +1,679 @@
+import argparse
+import io
+import json
+import os
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import date, datetime
 import warnings
-warnings.filterwarnings('ignore')
 
-
-influencers_df = pd.read_csv('/content/influencers.csv')
-posts_df = pd.read_csv('/content/posts.csv')
-tracking_df = pd.read_csv('/content/tracking.csv')
-payouts_df = pd.read_csv('/content/payouts.csv')
-
-# Clean column names
-for df in [influencers_df, posts_df, tracking_df, payouts_df]:
-    df.columns = df.columns.str.strip()
-
-# Fix platform column names (from PDFs: pla0orm, pla4orm)
-if 'pla0orm' in posts_df.columns:
-    posts_df = posts_df.rename(columns={'pla0orm': 'platform'})
-if 'pla4orm' in influencers_df.columns:
-    influencers_df = influencers_df.rename(columns={'pla4orm': 'platform'})
-
-# Convert dates
-posts_df['date'] = pd.to_datetime(posts_df['date'])
-tracking_df['date'] = pd.to_datetime(tracking_df['date'])
-
-print(f"✓ Loaded {len(influencers_df)} influencers")
-print(f"✓ Loaded {len(posts_df)} posts")
-print(f"✓ Loaded {len(tracking_df)} tracking records")
-print(f"✓ Loaded {len(payouts_df)} payout records")
-
-print("\nAggregating post metrics...")
-
-# Aggregate posts data by influencer
-posts_agg = posts_df.groupby('influencer_id').agg({
-    'post_id': 'count',
-    'reach': ['sum', 'mean'],
-    'likes': ['sum', 'mean'],
-    'comments': ['sum', 'mean'],
-    'date': ['min', 'max']
-}).round(2)
-
-# Flatten column names
-posts_agg.columns = ['total_posts', 'total_reach', 'avg_reach_per_post',
-                     'total_likes', 'avg_likes_per_post', 'total_comments',
-                     'avg_comments_per_post', 'first_post_date', 'last_post_date']
-
-posts_agg = posts_agg.reset_index()
-print(f"✓ Aggregated post metrics for {len(posts_agg)} influencers")
-
-# Data overview
-print("\nData Overview:")
-print(f"Date range: {posts_df['date'].min()} to {posts_df['date'].max()}")
-print(f"Platforms: {list(influencers_df['platform'].unique())}")
-print(f"Categories: {list(influencers_df['category'].unique())}")
-
-print("Aggregating business metrics...")
-
-# Aggregate tracking data by influencer
-tracking_agg = tracking_df.groupby('influencer_id').agg({
-    'orders': 'sum',
-    'revenue': 'sum',
-    'campaign': 'nunique'
-}).round(2)
-
-tracking_agg.columns = ['total_orders', 'total_revenue', 'campaigns_count']
-tracking_agg = tracking_agg.reset_index()
-print(f"✓ Aggregated tracking metrics for {len(tracking_agg)} influencers")
-
-print("Creating master dataset...")
-
-# Start with influencers base data
-master_df = influencers_df.copy()
-
-# Merge aggregated data
-master_df = master_df.merge(posts_agg, on='influencer_id', how='left')
-master_df = master_df.merge(tracking_agg, on='influencer_id', how='left')
-master_df = master_df.merge(payouts_df, on='influencer_id', how='left')
-
-# Fill NAs with 0 for numeric columns
-numeric_cols = ['total_posts', 'total_reach', 'total_likes', 'total_comments',
-                'total_orders', 'total_revenue', 'campaigns_count', 'total_payout']
-master_df[numeric_cols] = master_df[numeric_cols].fillna(0)
-
-print(f"✓ Created master dataset with {len(master_df)} influencers")
-print(f"Master dataset shape: {master_df.shape}")
-
-print("Calculating primary KPIs...")
-
-# Primary KPIs
-master_df['roas'] = np.where(master_df['total_payout'] > 0,
-                            master_df['total_revenue'] / master_df['total_payout'], 0)
-
-master_df['engagement_rate'] = np.where(master_df['total_reach'] > 0,
-                                       (master_df['total_likes'] + master_df['total_comments']) / master_df['total_reach'] * 100, 0)
-
-master_df['conversion_rate'] = np.where(master_df['total_reach'] > 0,
-                                       master_df['total_orders'] / master_df['total_reach'] * 100, 0)
-
-master_df['cost_per_order'] = np.where(master_df['total_orders'] > 0,
-                                      master_df['total_payout'] / master_df['total_orders'], 0)
-
-master_df['cost_per_engagement'] = np.where((master_df['total_likes'] + master_df['total_comments']) > 0,
-                                            master_df['total_payout'] / (master_df['total_likes'] + master_df['total_comments']), 0)
-
-master_df['revenue_per_post'] = np.where(master_df['total_posts'] > 0,
-                                         master_df['total_revenue'] / master_df['total_posts'], 0)
-
-# Efficiency Score (composite metric)
-master_df['efficiency_score'] = np.where(
-    (master_df['roas'] > 0) & (master_df['engagement_rate'] > 0) & (master_df['conversion_rate'] > 0),
-    (master_df['roas'] * master_df['engagement_rate'] * master_df['conversion_rate']) / 100,
-    0
+from engineered_features import actions as actions_module, rollups as rollups_module, schema, storage
+from engineered_features.actions import select_actions
+from engineered_features.attribution import (
+    ATTRIBUTION_MODELS, DEFAULT_HALF_LIFE_DAYS, DEFAULT_LOOKBACK_DAYS, attribute_tracking, attribution_tables,
 )
+from engineered_features.aggregates import stream_posts_agg, stream_tracking_agg, tracking_cube
+from engineered_features.database import write_database
+from engineered_features.instrumentation import StageRecorder
+from engineered_features.rollups import compute_rollups, grouping_set
+from engineered_features.schema import apply_schema, read_dtypes, share_id_dictionaries
+from engineered_features.stages import StageGraph
+from engineered_features.storage import FORMATS, find_table, read_table, write_table
+
+
+# Raw columns the pipeline actually uses (None = all columns)
+PIPELINE_COLUMNS = {
+    'influencers': None,
+    'posts': ['post_id', 'influencer_id', 'date', 'reach', 'likes', 'comments'],
+    'tracking': ['source', 'campaign', 'influencer_id', 'product', 'date', 'orders', 'revenue'],
+    'payouts': None,
+}
+# The payout engine also needs each tracking event's post
+PAYOUT_ENGINE_COLUMNS = {**PIPELINE_COLUMNS, 'tracking': PIPELINE_COLUMNS['tracking'] + ['post_id']}
+PAYOUT_BASES = ['post', 'order', 'hybrid', 'tiered']
+# Attribution credits a user's touches, and reports per post
+ATTRIBUTION_COLUMNS = ['post_id', 'user_id']
+# Executive KPIs as a few bytes of JSON: the dashboard paints its summary from
+# this before it loads any table
+EXECUTIVE_KPIS_FILE = 'executive_kpis.json'
+# Column names mangled in the source PDFs
+PLATFORM_TYPOS = {'posts': 'pla0orm', 'influencers': 'pla4orm'}
+LOAD_LABELS = {'influencers': 'influencers', 'posts': 'posts', 'tracking': 'tracking records',
+               'payouts': 'payout records'}
 
-print("✓ Calculated primary KPIs")
-
-print("Calculating derived features...")
 
-# Follower Tiers
-def get_follower_tier(follower_count):
-    if follower_count < 10000:
-        return 'Nano'
-    elif follower_count < 100000:
-        return 'Micro'
-    elif follower_count < 1000000:
-        return 'Macro'
-    else:
-        return 'Mega'
+def with_tracking_columns(table_columns, extra):
+    tracking = table_columns['tracking'] + [c for c in extra if c not in table_columns['tracking']]
+    return {**table_columns, 'tracking': tracking}
 
-master_df['follower_tier'] = master_df['follower_count'].apply(get_follower_tier)
 
-# Performance Categories
-def get_performance_category(roas):
-    if roas >= 3.5:
-        return 'High'
-    elif roas >= 2.0:
-        return 'Medium'
-    else:
-        return 'Low'
+def raw_table_path(data_dir, name):
+    # Raw tables can be CSV, Parquet or Arrow; the most recently written copy wins
+    path = find_table(data_dir, name)
+    if path is None:
+        raise FileNotFoundError(f"No {name} table (.csv/.parquet/.arrow) in {data_dir}")
+    return path
 
-master_df['performance_category'] = master_df['roas'].apply(get_performance_category)
 
-# Persona Combination
-master_df['persona_combination'] = master_df['follower_tier'] + '+' + master_df['category'] + '+' + master_df['platform']
+def load_table(path, name, columns=None):
+    # Dimension and ID strings are parsed straight into categoricals (see schema.py);
+    # each table keeps its own ID dictionary until share_id_dictionaries
+    df = read_table(path, columns=columns, dtype=read_dtypes(name, columns))
+    return apply_schema(clean_table(df, name), name)
 
-# ROI Score (0-100 scale)
-master_df['roi_score'] = np.clip((master_df['roas'] * 10 + master_df['efficiency_score'] * 2) / 2, 0, 100)
 
-print("✓ Calculated derived features")
+def load_datasets(data_dir='/content', table_columns=PIPELINE_COLUMNS):
+    tables = [load_table(raw_table_path(data_dir, name), name, columns) for name, columns in table_columns.items()]
+    return tuple(share_id_dictionaries(*tables))
 
-print("Calculating time-based metrics...")
 
-# Days since last post
-current_date = datetime.now()
-master_df['days_since_last_post'] = master_df['last_post_date'].apply(
-    lambda x: (current_date - x).days if pd.notna(x) else 999
-)
+def clean_table(df, name):
+    # Clean column names
+    df.columns = df.columns.str.strip()
 
-# Campaign duration and post frequency
-master_df['campaign_duration'] = (master_df['last_post_date'] - master_df['first_post_date']).dt.days + 1
-master_df['campaign_duration'] = master_df['campaign_duration'].fillna(0)
+    # Fix platform column names (from PDFs: pla0orm, pla4orm)
+    typo = PLATFORM_TYPOS.get(name)
+    if typo and typo in df.columns:
+        df = df.rename(columns={typo: 'platform'})
+
+    # Convert dates
+    if name in ('posts', 'tracking'):
+        df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def clean_datasets(influencers_df, posts_df, tracking_df, payouts_df):
+    return tuple(clean_table(df, name) for df, name in
+                 zip([influencers_df, posts_df, tracking_df, payouts_df], PIPELINE_COLUMNS))
+
+
+def aggregate_posts(posts_df):
+    # Aggregate posts data by influencer
+    posts_agg = posts_df.groupby('influencer_id').agg({
+        'post_id': 'count',
+        'reach': ['sum', 'mean'],
+        'likes': ['sum', 'mean'],
+        'comments': ['sum', 'mean'],
+        'date': ['min', 'max']
+    })
+
+    # Flatten column names
+    posts_agg.columns = ['total_posts', 'total_reach', 'avg_reach_per_post',
+                         'total_likes', 'avg_likes_per_post', 'total_comments',
+                         'avg_comments_per_post', 'first_post_date', 'last_post_date']
+    # Rounding only applies to the numbers, not the post dates
+    posts_agg = posts_agg.round({col: 2 for col in posts_agg.columns[:-2]})
+    return posts_agg.reset_index()
+
+
+def aggregate_tracking(tracking_df):
+    # Aggregate tracking data by influencer
+    tracking_agg = tracking_df.groupby('influencer_id').agg({
+        'orders': 'sum',
+        'revenue': 'sum',
+        'campaign': 'nunique'
+    }).round(2)
+
+    tracking_agg.columns = ['total_orders', 'total_revenue', 'campaigns_count']
+    return tracking_agg.reset_index()
+
+
+# ----------------------------------------------------------------------------
+# Payout engine: total_payout recomputed from rate cards instead of payouts.csv.
+# rate card: influencer_id, basis (post/order/hybrid/tiered), post_rate, order_rate
+# tiers:     influencer_id, min_orders, order_rate (marginal rates, like tax brackets)
+# caps:      campaign, cap (maximum payout per influencer within one campaign)
+# Everything is computed per influencer x campaign with grouped array operations.
+# ----------------------------------------------------------------------------
+def attribute_posts(posts_df, tracking_df):
+    """Posts per influencer x campaign; a post counts for the campaign of its first
+    tracked event, and posts without events count with campaign NaN."""
+    first_events = (tracking_df[['post_id', 'campaign', 'date']].dropna(subset=['post_id'])
+                    .sort_values(['date', 'campaign'], kind='stable').drop_duplicates('post_id'))
+    post_campaign = posts_df[['post_id', 'influencer_id']].merge(
+        first_events[['post_id', 'campaign']], on='post_id', how='left')
+    return post_campaign.groupby(['influencer_id', 'campaign'], observed=True, dropna=False).size().rename('posts')
+
+
+def tiered_order_payout(orders, tiers):
+    """Marginal-rate payout of ``orders`` (a Series on influencer_id x campaign)."""
+    tiers = tiers.sort_values(['influencer_id', 'min_orders'])
+    tiers = tiers.assign(next_min=tiers.groupby('influencer_id')['min_orders'].shift(-1).fillna(np.inf))
+    rows = orders.rename('orders').reset_index().reset_index().merge(tiers, on='influencer_id')
+    in_tier = np.clip(rows['orders'] - rows['min_orders'], 0, rows['next_min'] - rows['min_orders'])
+    paid = (in_tier * rows['order_rate']).groupby(rows['index']).sum()
+    return pd.Series(paid.reindex(range(len(orders)), fill_value=0).to_numpy(), index=orders.index)
+
+
+def compute_payouts(posts_df, tracking_df, rate_card, tiers=None, caps=None):
+    """Payouts from rate cards, per influencer x campaign and per influencer.
+
+    Returns ``(payouts_df, campaign_payouts)``; payouts_df has the columns of
+    payouts.csv (influencer_id, basis, rate, orders, total_payout) so it merges
+    into master_df in its place.
+    """
+    unknown = sorted(set(rate_card['basis'].dropna().astype(str)) - set(PAYOUT_BASES))
+    if unknown:
+        raise ValueError(f"Unknown payout basis {unknown} in the rate card (expected one of {PAYOUT_BASES})")
+    if tiers is None and (rate_card['basis'].astype(str) == 'tiered').any():
+        raise ValueError("The rate card has 'tiered' cards but no rate tiers table was given")
+    posts = attribute_posts(posts_df, tracking_df)
+    orders = tracking_df.groupby(['influencer_id', 'campaign'], observed=True, dropna=False)['orders'].sum()
+    cells = pd.concat([posts, orders], axis=1).fillna(0).reset_index()
+    cells['influencer_id'] = cells['influencer_id'].astype(str)
+
+    card = rate_card.assign(influencer_id=rate_card['influencer_id'].astype(str))
+    cells = cells.merge(card[['influencer_id', 'basis', 'post_rate', 'order_rate']], on='influencer_id', how='inner')
+    post_rate = cells['post_rate'].fillna(0)
+    order_rate = cells['order_rate'].fillna(0)
+    basis = cells['basis']
+
+    tiered = np.zeros(len(cells))
+    if (basis == 'tiered').any():
+        tiered = tiered_order_payout(cells.set_index(['influencer_id', 'campaign'])['orders'],
+                                     tiers.assign(influencer_id=tiers['influencer_id'].astype(str))).to_numpy()
+    cells['payout'] = np.select(
+        [basis == 'post', basis == 'order', basis == 'hybrid', basis == 'tiered'],
+        [cells['posts'] * post_rate,
+         cells['orders'] * order_rate,
+         cells['posts'] * post_rate + cells['orders'] * order_rate,
+         cells['posts'] * post_rate + tiered],
+        default=0.0)
+
+    if caps is not None:
+        cap = cells['campaign'].astype(str).map(caps.set_index(caps['campaign'].astype(str))['cap'])
+        cells['payout'] = np.where(cap.notna(), np.minimum(cells['payout'], cap), cells['payout'])
+
+    # Influencers on the rate card without posts or orders still get a (zero) payout row
+    totals = cells.groupby('influencer_id').agg(orders=('orders', 'sum'), total_payout=('payout', 'sum'))
+    payouts_df = card.merge(totals, on='influencer_id', how='left')
+    payouts_df['orders'] = payouts_df['orders'].fillna(0).astype('int64')
+    payouts_df['total_payout'] = payouts_df['total_payout'].fillna(0).round(2)
+    # Tiered cards have no single order rate; their rate is the post rate (if any)
+    payouts_df['rate'] = np.where(payouts_df['basis'].isin(['post', 'hybrid', 'tiered']),
+                                  payouts_df['post_rate'], payouts_df['order_rate'])
+    payouts_df = payouts_df[['influencer_id', 'basis', 'rate', 'orders', 'total_payout']]
+    campaign_payouts = cells[['influencer_id', 'campaign', 'basis', 'posts', 'orders', 'payout']]
+    return payouts_df, campaign_payouts
+
+
+def rate_card_from_payouts(payouts_df):
+    # The post/order rate card implied by a static payouts table (used when
+    # campaign caps are applied without a rate card)
+    is_post = payouts_df['basis'].astype(str) == 'post'
+    return pd.DataFrame({
+        'influencer_id': payouts_df['influencer_id'].astype(str),
+        'basis': payouts_df['basis'].astype(str),
+        'post_rate': np.where(is_post, payouts_df['rate'], np.nan),
+        'order_rate': np.where(is_post, np.nan, payouts_df['rate']),
+    })
+
+
+def merge_master(influencers_df, posts_agg, tracking_agg, payouts_df):
+    # Start with influencers base data
+    master_df = influencers_df.copy()
+
+    # Merge aggregated data
+    master_df = master_df.merge(posts_agg, on='influencer_id', how='left')
+    master_df = master_df.merge(tracking_agg, on='influencer_id', how='left')
+    master_df = master_df.merge(payouts_df, on='influencer_id', how='left')
+
+    # Fill NAs with 0 for numeric columns
+    numeric_cols = ['total_posts', 'total_reach', 'total_likes', 'total_comments',
+                    'total_orders', 'total_revenue', 'campaigns_count', 'total_payout']
+    master_df[numeric_cols] = master_df[numeric_cols].fillna(0)
+    return master_df
+
+
+def add_primary_kpis(master_df):
+    master_df['roas'] = np.where(master_df['total_payout'] > 0,
+                                master_df['total_revenue'] / master_df['total_payout'], 0)
+
+    master_df['engagement_rate'] = np.where(master_df['total_reach'] > 0,
+                                           (master_df['total_likes'] + master_df['total_comments']) / master_df['total_reach'] * 100, 0)
+
+    master_df['conversion_rate'] = np.where(master_df['total_reach'] > 0,
+                                           master_df['total_orders'] / master_df['total_reach'] * 100, 0)
+
+    master_df['cost_per_order'] = np.where(master_df['total_orders'] > 0,
+                                          master_df['total_payout'] / master_df['total_orders'], 0)
+
+    master_df['cost_per_engagement'] = np.where((master_df['total_likes'] + master_df['total_comments']) > 0,
+                                                master_df['total_payout'] / (master_df['total_likes'] + master_df['total_comments']), 0)
+
+    master_df['revenue_per_post'] = np.where(master_df['total_posts'] > 0,
+                                             master_df['total_revenue'] / master_df['total_posts'], 0)
+
+    # Efficiency Score (composite metric)
+    master_df['efficiency_score'] = np.where(
+        (master_df['roas'] > 0) & (master_df['engagement_rate'] > 0) & (master_df['conversion_rate'] > 0),
+        (master_df['roas'] * master_df['engagement_rate'] * master_df['conversion_rate']) / 100,
+        0
+    )
+    return master_df
+
+
+def add_derived_features(master_df):
+    # Follower Tiers: Nano < 10K <= Micro < 100K <= Macro < 1M <= Mega
+    follower_count = master_df['follower_count']
+    master_df['follower_tier'] = np.select(
+        [follower_count < 10000, follower_count < 100000, follower_count < 1000000],
+        ['Nano', 'Micro', 'Macro'], default='Mega')
+
+    # Performance Categories: High >= 3.5x ROAS, Medium >= 2.0x, else Low
+    roas = master_df['roas']
+    master_df['performance_category'] = np.select(
+        [roas >= 3.5, roas >= 2.0], ['High', 'Medium'], default='Low')
+
+    # Persona Combination
+    master_df['persona_combination'] = (master_df['follower_tier'] + '+' + master_df['category'].astype(str)
+                                        + '+' + master_df['platform'].astype(str))
+
+    # ROI Score (0-100 scale)
+    master_df['roi_score'] = np.clip((master_df['roas'] * 10 + master_df['efficiency_score'] * 2) / 2, 0, 100)
+    return master_df
+
+
+def add_days_since_last_post(master_df, as_of=None):
+    # Days since last post (999 when the influencer never posted)
+    current_date = pd.Timestamp(as_of if as_of is not None else datetime.now())
+    master_df['days_since_last_post'] = (
+        (current_date - master_df['last_post_date']).dt.days.fillna(999).astype('int64'))
+    return master_df
+
+
+def add_time_metrics(master_df, as_of=None):
+    master_df = add_days_since_last_post(master_df, as_of)
+
+    # Campaign duration and post frequency
+    master_df['campaign_duration'] = (master_df['last_post_date'] - master_df['first_post_date']).dt.days + 1
+    master_df['campaign_duration'] = master_df['campaign_duration'].fillna(0)
+
+    master_df['post_frequency'] = np.where(master_df['campaign_duration'] > 0,
+                                          master_df['total_posts'] / master_df['campaign_duration'] * 7, 0)
 
-master_df['post_frequency'] = np.where(master_df['campaign_duration'] > 0,
-                                      master_df['total_posts'] / master_df['campaign_duration'] * 7, 0)
+    # Engagement Quality & Reach Efficiency
+    master_df['engagement_quality'] = np.where(master_df['total_likes'] > 0,
+                                              master_df['total_comments'] / master_df['total_likes'], 0)
 
-# Engagement Quality & Reach Efficiency
-master_df['engagement_quality'] = np.where(master_df['total_likes'] > 0,
-                                          master_df['total_comments'] / master_df['total_likes'], 0)
+    master_df['reach_efficiency'] = np.where(master_df['follower_count'] > 0,
+                                            master_df['total_reach'] / master_df['follower_count'], 0)
+    return master_df
 
-master_df['reach_efficiency'] = np.where(master_df['follower_count'] > 0,
-                                        master_df['total_reach'] / master_df['follower_count'], 0)
 
-print("✓ Calculated time-based metrics")
+def add_status(master_df):
+    # Status based on activity and performance
+    master_df['status'] = np.select(
+        [master_df['days_since_last_post'] > 30, master_df['roas'] < 1.5, master_df['roas'] >= 3.5],
+        ['Inactive', 'Review', 'Star'], default='Active')
 
-print("Calculating status indicators...")
+    # Investment efficiency
+    master_df['investment_efficiency'] = master_df['roas']  # Same as ROAS for simplicity
+    return master_df
+
+
+def add_rankings(master_df):
+    # Platform performance ranking
+    master_df['platform_rank'] = master_df.groupby('platform')['roas'].rank(method='dense', ascending=False)
+
+    # Overall performance ranking
+    master_df['overall_rank'] = master_df['roas'].rank(method='dense', ascending=False)
+    return master_df
+
+
+def build_master_df(influencers, posts, tracking, payouts, as_of=None):
+    """Build the influencer-level master dataset from the four cleaned raw tables.
 
-# Status based on activity and performance
-def get_status(row):
-    if row['days_since_last_post'] > 30:
-        return 'Inactive'
-    elif row['roas'] < 1.5:
-        return 'Review'
-    elif row['roas'] >= 3.5:
-        return 'Star'
+    ``as_of`` is the reference date for ``days_since_last_post`` (defaults to now).
+    """
+    return build_master_from_aggregates(influencers, aggregate_posts(posts), aggregate_tracking(tracking),
+                                        payouts, as_of=as_of)
+
+
+def build_master_from_aggregates(influencers, posts_agg, tracking_agg, payouts, as_of=None, recorder=None):
+    recorder = recorder or StageRecorder()
+    master_df = recorder.run('merge', merge_master, influencers, posts_agg, tracking_agg, payouts)
+    master_df = recorder.run('primary_kpis', add_primary_kpis, master_df)
+    master_df = recorder.run('derived_features', add_derived_features, master_df)
+    master_df = recorder.run('time_metrics', add_time_metrics, master_df, as_of)
+    master_df = recorder.run('status', add_status, master_df)
+    return recorder.run('rankings', add_rankings, master_df)
+
+
+def compute_executive_kpis(master_df, active_campaigns):
+    # Overall metrics
+    total_revenue = master_df['total_revenue'].sum()
+    total_payout = master_df['total_payout'].sum()
+
+    # Best and worst performers
+    best_performer_idx = master_df['roas'].idxmax()
+    worst_performer_idx = master_df['roas'].idxmin()
+
+    return {
+        'total_revenue': total_revenue,
+        'overall_roas': total_revenue / total_payout if total_payout > 0 else 0,
+        'active_campaigns': active_campaigns,
+        'total_influencers': len(master_df),
+        'best_performer_name': master_df.loc[best_performer_idx, 'name'],
+        'best_performer_roas': master_df.loc[best_performer_idx, 'roas'],
+        'worst_performer_name': master_df.loc[worst_performer_idx, 'name'],
+        'worst_performer_roas': master_df.loc[worst_performer_idx, 'roas']
+    }
+
+
+def build_investment_actions(master_df, thresholds=None, payout_quantiles=None):
+    # Invest More / Optimize / Monitor with a seeded Monitor pick; payout percentiles
+    # are exact unless given (e.g. from merged payout sketches)
+    return select_actions(master_df, thresholds, payout_quantiles)
+
+
+def build_insight_tables(rollups):
+    """Shape the roll-up engine's grouping sets into the classic insight tables."""
+    # Platform Performance
+    platform_performance = grouping_set(rollups, 'platform').set_index('platform')[
+        ['total_revenue', 'total_payout', 'total_orders', 'total_reach', 'influencer_count',
+         'platform_roas', 'revenue_share']]
+
+    # Persona Performance
+    persona_performance = grouping_set(rollups, 'persona_combination').set_index('persona_combination').rename(
+        columns={'avg_roas': 'roas', 'avg_efficiency_score': 'efficiency_score'})[
+        ['total_posts', 'roas', 'total_revenue', 'efficiency_score', 'influencer_count']
+    ].sort_values('roas', ascending=False)
+
+    # Category Performance
+    category_performance = grouping_set(rollups, 'category').set_index('category').rename(
+        columns={'avg_roas': 'roas', 'avg_engagement_rate': 'engagement_rate'})[
+        ['total_revenue', 'roas', 'engagement_rate', 'influencer_count']
+    ].sort_values('roas', ascending=False)
+
+    # Product Performance (from the tracking cube)
+    product_performance = grouping_set(rollups, 'product').set_index('product').rename(
+        columns={'total_orders': 'orders', 'total_revenue': 'revenue'})[
+        ['orders', 'revenue']
+    ].sort_values('revenue', ascending=False)
+
+    return {
+        'platform_performance': platform_performance,
+        'persona_performance': persona_performance,
+        'category_performance': category_performance,
+        'product_performance': product_performance,
+    }
+
+
+# ----------------------------------------------------------------------------
+# The command-line run as a memoized stage DAG (see stages.py). Raw tables are
+# loaded one per stage so that each aggregate depends only on its own table;
+# the ID dictionaries are shared where tables meet (the merge, the payout
+# engine) instead of at load time. With a cache directory a rerun only executes
+# the stages downstream of what changed: a new payouts table reruns the merge
+# and everything after it, but reads the post and tracking aggregates and the
+# cube from their artifacts.
+# ----------------------------------------------------------------------------
+def count_campaigns(tracking_df):
+    return tracking_df['campaign'].nunique()
+
+
+def merge_tables(influencers_df, posts_agg, tracking_agg, payouts_df):
+    # Loaded or cached separately, the inputs each have their own ID dictionary;
+    # the categorical ones are recoded onto a shared one so the merges join on codes
+    frames = [influencers_df, posts_agg, tracking_agg, payouts_df]
+    coded = [i for i, df in enumerate(frames) if isinstance(df['influencer_id'].dtype, pd.CategoricalDtype)]
+    for i, df in zip(coded, share_id_dictionaries(*[frames[i] for i in coded])):
+        frames[i] = df
+    return merge_master(*frames)
+
+
+def rate_card_payouts(posts_df, tracking_df, payouts_df=None, rate_card=None, rate_tiers=None, campaign_caps=None):
+    posts_df, tracking_df = share_id_dictionaries(posts_df, tracking_df)
+    card = read_table(rate_card) if rate_card else rate_card_from_payouts(payouts_df)
+    tiers = read_table(rate_tiers) if rate_tiers else None
+    caps = read_table(campaign_caps) if campaign_caps else None
+    return compute_payouts(posts_df, tracking_df, card, tiers, caps)
+
+
+def pipeline_graph(args, recorder=None):
+    """The stages of one run for the parsed command-line ``args``, cached under ``args.cache_dir``."""
+    graph = StageGraph(args.cache_dir, recorder)
+
+    def load(name, columns=None):
+        path = raw_table_path(args.data_dir, name)
+        # Not persisted: an artifact would only duplicate the raw table
+        return graph.add(f'load_{name}', load_table, params={'path': path, 'name': name, 'columns': columns},
+                         files=[path], modules=[schema, storage], persist=False)
+
+    influencers, payouts = load('influencers'), load('payouts')
+    if args.chunk_size:
+        # Out-of-core path: posts and tracking are streamed, never fully loaded,
+        # with the same declared schema as the in-memory loads
+        for stage, fn, table in [('stream_posts', stream_posts_agg, 'posts'),
+                                 ('stream_tracking', stream_tracking_agg, 'tracking')]:
+            path = raw_table_path(args.data_dir, table)
+            params = {'path': path, 'chunksize': args.chunk_size,
+                      'dtype': read_dtypes(table, PIPELINE_COLUMNS[table])}
+            graph.add(stage, fn, params=params, files=[path], modules=[schema, storage])
+        posts_agg = 'stream_posts'
+        tracking_agg, cube, active_campaigns = [('stream_tracking', i) for i in range(3)]
     else:
-        return 'Active'
-
-master_df['status'] = master_df.apply(get_status, axis=1)
-
-# Investment efficiency
-master_df['investment_efficiency'] = master_df['roas']  # Same as ROAS for simplicity
-
-print("✓ Calculated status indicators")
-
-print("Calculating performance rankings...")
-
-# Platform performance ranking
-master_df['platform_rank'] = master_df.groupby('platform')['roas'].rank(method='dense', ascending=False)
-
-# Overall performance ranking
-master_df['overall_rank'] = master_df['roas'].rank(method='dense', ascending=False)
-
-print("✓ Calculated performance rankings")
-
-print("Calculating executive KPIs...")
-
-# Overall metrics
-total_revenue = master_df['total_revenue'].sum()
-total_payout = master_df['total_payout'].sum()
-overall_roas = total_revenue / total_payout if total_payout > 0 else 0
-active_campaigns = tracking_df['campaign'].nunique()
-total_influencers = len(master_df)
-
-# Best and worst performers
-best_performer_idx = master_df['roas'].idxmax()
-worst_performer_idx = master_df['roas'].idxmin()
-
-executive_kpis = {
-    'total_revenue': total_revenue,
-    'overall_roas': overall_roas,
-    'active_campaigns': active_campaigns,
-    'total_influencers': total_influencers,
-    'best_performer_name': master_df.loc[best_performer_idx, 'name'],
-    'best_performer_roas': master_df.loc[best_performer_idx, 'roas'],
-    'worst_performer_name': master_df.loc[worst_performer_idx, 'name'],
-    'worst_performer_roas': master_df.loc[worst_performer_idx, 'roas']
-}
-
-print("✓ Calculated executive KPIs")
-
-print("Creating investment action dataframes...")
-
-# INVEST MORE: High ROAS, Low Investment
-invest_more_df = master_df[
-    (master_df['roas'] >= 3.5) &
-    (master_df['total_payout'] <= master_df['total_payout'].quantile(0.3))
-].nlargest(5, 'roas')[['name', 'roas', 'total_payout', 'total_revenue', 'platform']]
-
-# OPTIMIZE: Low ROAS, High Investment
-optimize_df = master_df[
-    (master_df['roas'] < 2.0) &
-    (master_df['total_payout'] >= master_df['total_payout'].quantile(0.7))
-].nsmallest(5, 'roas')[['name', 'roas', 'total_payout', 'total_revenue', 'platform']]
-
-# MONITOR: Medium Performance
-monitor_df = master_df[
-    (master_df['roas'] >= 2.0) & (master_df['roas'] < 3.5)
-].sample(min(5, len(master_df[
-    (master_df['roas'] >= 2.0) & (master_df['roas'] < 3.5)
-])))[['name', 'roas', 'total_payout', 'total_revenue', 'platform']]
-
-print("✓ Created investment action dataframes")
-
-print("Creating aggregated insights tables...")
-
-# Platform Performance
-platform_performance = master_df.groupby('platform').agg({
-    'total_revenue': 'sum',
-    'total_payout': 'sum',
-    'total_orders': 'sum',
-    'total_reach': 'sum',
-    'name': 'count'
-}).rename(columns={'name': 'influencer_count'})
-
-platform_performance['platform_roas'] = platform_performance['total_revenue'] / platform_performance['total_payout']
-platform_performance['revenue_share'] = platform_performance['total_revenue'] / platform_performance['total_revenue'].sum() * 100
-
-# Persona Performance
-persona_performance = master_df.groupby('persona_combination').agg({
-    'total_posts': 'sum',
-    'roas': 'mean',
-    'total_revenue': 'sum',
-    'efficiency_score': 'mean',
-    'name': 'count'
-}).rename(columns={'name': 'influencer_count'}).sort_values('roas', ascending=False)
-
-# Category Performance
-category_performance = master_df.groupby('category').agg({
-    'total_revenue': 'sum',
-    'roas': 'mean',
-    'engagement_rate': 'mean',
-    'name': 'count'
-}).rename(columns={'name': 'influencer_count'}).sort_values('roas', ascending=False)
-
-# Product Performance (from tracking data)
-product_performance = tracking_df.groupby('product').agg({
-    'orders': 'sum',
-    'revenue': 'sum'
-}).sort_values('revenue', ascending=False)
-
-print("✓ Created aggregated insights tables")
-
-print("\n" + "="*60)
-print("FINAL DATASET SUMMARY")
-print("="*60)
-
-print(f"Master DataFrame Shape: {master_df.shape}")
-print(f"Columns: {list(master_df.columns)}")
-print(f"\nExecutive KPIs:")
-print(f"  Total Revenue: ₹{executive_kpis['total_revenue']:,.2f}")
-print(f"  Overall ROAS: {executive_kpis['overall_roas']:.2f}x")
-print(f"  Active Campaigns: {executive_kpis['active_campaigns']}")
-print(f"  Best Performer: {executive_kpis['best_performer_name']} ({executive_kpis['best_performer_roas']:.2f}x)")
-print(f"  Worst Performer: {executive_kpis['worst_performer_name']} ({executive_kpis['worst_performer_roas']:.2f}x)")
-
-print(f"\nPlatform Distribution:")
-print(master_df['platform'].value_counts())
-
-print(f"\nPerformance Category Distribution:")
-print(master_df['performance_category'].value_counts())
-
-print(f"\nTop 5 ROAS Performers:")
-print(master_df.nlargest(5, 'roas')[['name', 'platform', 'roas', 'total_revenue']].to_string(index=False))
-
-print("\n✅ Data processing complete! Ready for Streamlit dashboard.")
+        payout_engine = bool(args.rate_card or args.campaign_caps)
+        columns = PAYOUT_ENGINE_COLUMNS if payout_engine else PIPELINE_COLUMNS
+        if args.attribution != 'none':
+            columns = with_tracking_columns(columns, ATTRIBUTION_COLUMNS)
+        posts, tracking = load('posts', columns['posts']), load('tracking', columns['tracking'])
+        # Master and cube sums come from the attributed events; the payout engine keeps the raw orders
+        credited = tracking
+        if args.attribution != 'none':
+            credited = graph.add('attribution', attribute_tracking, [tracking], persist=False,
+                                 params={'model': args.attribution, 'lookback_days': args.lookback_days,
+                                         'half_life_days': args.half_life_days})
+            graph.add('attribution_tables', attribution_tables, [tracking, credited])
+        posts_agg = graph.add('aggregate_posts', aggregate_posts, [posts])
+        tracking_agg = graph.add('aggregate_tracking', aggregate_tracking, [credited])
+        cube = graph.add('tracking_cube', tracking_cube, [credited])
+        active_campaigns = graph.add('active_campaigns', count_campaigns, [tracking])
+        if payout_engine:
+            # Caps without a rate card apply to the rates in the payouts table
+            inputs = [posts, tracking] if args.rate_card else [posts, tracking, payouts]
+            graph.add('payouts', rate_card_payouts, inputs,
+                      params={'rate_card': args.rate_card, 'rate_tiers': args.rate_tiers,
+                              'campaign_caps': args.campaign_caps},
+                      files=[args.rate_card, args.rate_tiers, args.campaign_caps])
+            payouts = ('payouts', 0)
+
+    graph.add('merge', merge_tables, [influencers, posts_agg, tracking_agg, payouts], modules=[schema])
+    graph.add('primary_kpis', add_primary_kpis, ['merge'])
+    graph.add('derived_features', add_derived_features, ['primary_kpis'])
+    # Without --as-of the ages count from today, so they are only reused within the day
+    graph.add('time_metrics', add_time_metrics, ['derived_features'], params={'as_of': args.as_of},
+              salt=None if args.as_of else date.today().isoformat())
+    graph.add('status', add_status, ['time_metrics'])
+    graph.add('rankings', add_rankings, ['status'])
+    graph.add('executive_kpis', compute_executive_kpis, ['rankings', active_campaigns])
+    graph.add('actions', build_investment_actions, ['rankings'], modules=[actions_module])
+    # Every insight table comes from one roll-up pass over master_df and the cube
+    graph.add('rollups', compute_rollups, ['rankings', cube])
+    graph.add('insight_tables', build_insight_tables, ['rollups'], modules=[rollups_module])
+    return graph
+
+
+def csv_round_trip(df):
+    """``df`` as read back from CSV, the form outputs are compared in whatever their dtypes."""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def verify_against_reference(master_df, reference_path):
+    """Assert that ``master_df`` serialises to exactly the reference CSV."""
+    pd.testing.assert_frame_equal(csv_round_trip(master_df), pd.read_csv(reference_path))
+
+
+def opening_view_kpis(master_df):
+    # The dashboard's first view: its default date range (first to last post) leaves out
+    # influencers without any post
+    view = master_df
+    if {'first_post_date', 'last_post_date'} <= set(master_df.columns):
+        view = master_df[master_df['first_post_date'].notna() & master_df['last_post_date'].notna()]
+    total_revenue = view['total_revenue'].sum()
+    total_payout = view['total_payout'].sum()
+    return {
+        'total_revenue': total_revenue,
+        'overall_roas': total_revenue / total_payout if total_payout > 0 else 0,
+        'total_influencers': view['influencer_id'].nunique(),
+    }
+
+
+def write_executive_kpis(output_dir, executive_kpis, master_df):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, EXECUTIVE_KPIS_FILE)
+    def plain(kpis):
+        # numpy scalars -> plain JSON numbers
+        return {k: v.item() if isinstance(v, np.generic) else v for k, v in kpis.items()}
+
+    values = {**plain(executive_kpis), 'opening_view': plain(opening_view_kpis(master_df))}
+    with open(path + '.tmp', 'w') as f:
+        json.dump(values, f, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def save_outputs(output_dir, master_df, insights, fmt='csv', cube=None, rollups=None, campaign_payouts=None,
+                 attribution=None, executive_kpis=None):
+    write_table(master_df, output_dir, 'master_df', fmt)
+    for name in ['platform_performance', 'persona_performance']:
+        write_table(insights[name], output_dir, name, fmt, index=True)
+    if cube is not None:
+        write_table(cube, output_dir, 'tracking_cube', fmt)
+    if rollups is not None:
+        write_table(rollups, output_dir, 'rollups', fmt)
+    if campaign_payouts is not None:
+        write_table(campaign_payouts, output_dir, 'campaign_payouts', fmt)
+    for level, table in (attribution or {}).items():
+        write_table(table, output_dir, f'attribution_{level}', fmt)
+    if executive_kpis is not None:
+        # Written last, so it is never older than the master_df it summarises
+        write_executive_kpis(output_dir, executive_kpis, master_df)
+
+
+def print_summary(master_df, executive_kpis):
+    print("\n" + "="*60)
+    print("FINAL DATASET SUMMARY")
+    print("="*60)
+
+    print(f"Master DataFrame Shape: {master_df.shape}")
+    print(f"Columns: {list(master_df.columns)}")
+    print("\nExecutive KPIs:")
+    print(f"  Total Revenue: ₹{executive_kpis['total_revenue']:,.2f}")
+    print(f"  Overall ROAS: {executive_kpis['overall_roas']:.2f}x")
+    print(f"  Active Campaigns: {executive_kpis['active_campaigns']}")
+    print(f"  Best Performer: {executive_kpis['best_performer_name']} ({executive_kpis['best_performer_roas']:.2f}x)")
+    print(f"  Worst Performer: {executive_kpis['worst_performer_name']} ({executive_kpis['worst_performer_roas']:.2f}x)")
+
+    print("\nPlatform Distribution:")
+    print(master_df['platform'].value_counts())
+
+    print("\nPerformance Category Distribution:")
+    print(master_df['performance_category'].value_counts())
+
+    print("\nTop 5 ROAS Performers:")
+    print(master_df.nlargest(5, 'roas')[['name', 'platform', 'roas', 'total_revenue']].to_string(index=False))
+
+
+def main():
+    # Only the command-line run is silenced; importers (the dashboard, the tests) keep their warnings
+    warnings.filterwarnings('ignore')
+    parser = argparse.ArgumentParser(description="Build master_df and insight tables from the raw datasets.")
+    parser.add_argument('--data-dir', default='/content', help="directory holding the four raw CSVs")
+    parser.add_argument('--output-dir', default=None, help="write master_df and insight tables here")
+    parser.add_argument('--format', choices=list(FORMATS), default='csv',
+                        help="storage format for the outputs (parquet/arrow keep categorical and date dtypes)")
+    parser.add_argument('--as-of', default=None, help="reference date for days_since_last_post (YYYY-MM-DD, default now)")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="stream posts.csv and tracking.csv in chunks of this many rows (out-of-core mode)")
+    parser.add_argument('--database', default=None, metavar='PATH',
+                        help="also write master_df, the tracking cube and the roll-ups into this embedded "
+                             "database for the dashboard's SQL backend (.duckdb, or .sqlite for sqlite3)")
+    parser.add_argument('--verify', default=None, metavar='MASTER_CSV',
+                        help="fail unless the result is identical to this master_df CSV")
+    parser.add_argument('--rate-card', default=None, metavar='TABLE',
+                        help="recompute payouts from this rate card (influencer_id, basis, post_rate, order_rate) "
+                             "instead of the payouts table")
+    parser.add_argument('--rate-tiers', default=None, metavar='TABLE',
+                        help="order tiers for 'tiered' cards (influencer_id, min_orders, order_rate)")
+    parser.add_argument('--campaign-caps', default=None, metavar='TABLE',
+                        help="maximum payout per influencer within a campaign (campaign, cap); without "
+                             "--rate-card the caps apply to the payouts table's rates")
+    parser.add_argument('--attribution', choices=['none'] + ATTRIBUTION_MODELS, default='none',
+                        help="credit each conversion to the user's touches in the lookback window and use the "
+                             "attributed orders and revenue instead of the raw sums (default: raw sums)")
+    parser.add_argument('--lookback-days', type=int, default=DEFAULT_LOOKBACK_DAYS,
+                        help="attribution lookback window in days (default: %(default)s)")
+    parser.add_argument('--half-life-days', type=float, default=DEFAULT_HALF_LIFE_DAYS,
+                        help="half-life of the time_decay model in days (default: %(default)s)")
+    parser.add_argument('--cache-dir', default=None, metavar='DIR',
+                        help="keep each stage's output here, keyed by its inputs and code, and rerun only the "
+                             "stages whose inputs changed")
+    parser.add_argument('--report', default=None, metavar='JSON',
+                        help="write a per-stage run report (time, CPU, rows, memory) here")
+    parser.add_argument('--no-trace-memory', action='store_true',
+                        help="skip tracemalloc in the run report (lower overhead)")
+    parser.add_argument('--profile', nargs='+', default=(), metavar='STAGE',
+                        help="dump a cProfile of these stages as <stage>.prof")
+    parser.add_argument('--profile-dir', default='.', help="where --profile dumps go")
+    args = parser.parse_args()
+    if (args.rate_card or args.campaign_caps) and args.chunk_size:
+        parser.error("--rate-card and --campaign-caps need the in-memory path (drop --chunk-size)")
+    if args.rate_tiers and not args.rate_card:
+        parser.error("--rate-tiers needs a --rate-card with 'tiered' cards")
+    if args.attribution != 'none' and args.chunk_size:
+        parser.error("--attribution needs the in-memory path (drop --chunk-size)")
+    recorder = StageRecorder(enabled=bool(args.report), trace_memory=not args.no_trace_memory,
+                             profile=args.profile, profile_dir=args.profile_dir)
+    graph = pipeline_graph(args, recorder)
+
+    print("\nBuilding master dataset...")
+    master_df = graph.get('rankings')
+    for name, label in LOAD_LABELS.items():
+        if f'load_{name}' in graph.results:
+            print(f"✓ Loaded {len(graph.results[f'load_{name}'])} {label}")
+    if args.chunk_size:
+        print(f"✓ Streamed posts and tracking in chunks of {args.chunk_size:,} rows")
+    attribution = graph.get('attribution_tables') if args.attribution != 'none' else None
+    if attribution is not None:
+        print(f"✓ Attributed conversions with the {args.attribution} model ({args.lookback_days}-day lookback)")
+    campaign_payouts = None
+    if args.rate_card or args.campaign_caps:
+        campaign_payouts = graph.value(('payouts', 1))
+        source = args.rate_card or 'the payouts table rates'
+        print(f"✓ Computed payouts for {len(graph.value(('payouts', 0)))} influencers from {source}")
+    print(f"✓ Created master dataset with {len(master_df)} influencers")
+
+    executive_kpis = graph.get('executive_kpis')
+    invest_more_df, optimize_df, monitor_df = graph.get('actions')
+    cube = graph.value(('stream_tracking', 1) if args.chunk_size else 'tracking_cube')
+    rollups, insights = graph.get('rollups'), graph.get('insight_tables')
+    print("✓ Calculated executive KPIs, investment actions and insight tables")
+    print(f"✓ Investment actions: {len(invest_more_df)} Invest More, {len(optimize_df)} Optimize, "
+          f"{len(monitor_df)} Monitor")
+    print(f"✓ {graph.summary()}")
+
+    if args.verify:
+        verify_against_reference(master_df, args.verify)
+        print(f"✓ Output matches {args.verify}")
+    if args.output_dir:
+        recorder.run('save_outputs', save_outputs, args.output_dir, master_df, insights, args.format, cube=cube, rollups=rollups,
+            campaign_payouts=campaign_payouts, attribution=attribution, executive_kpis=executive_kpis)
+        print(f"✓ Saved outputs to {args.output_dir}")
+    if args.database:
+        recorder.run('database', write_database, args.database, master_df, cube, rollups)
+        print(f"✓ Wrote database {args.database}")
+
+    if args.report:
+        print(f"✓ Wrote run report to {recorder.write(args.report)}")
+
+    print_summary(master_df, executive_kpis)
+    print("\n✅ Data processing complete! Ready for Streamlit dashboard.")
+
+
+if __name__ == "__main__":
+    main()
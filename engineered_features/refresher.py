@@ -0,0 +1,252 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+
+# Background refresher: watches the raw dataset directory and republishes.
+# The four raw tables are polled (path, size, content hash; a file is only
+# re-hashed when its size or mtime moved, and touching it changes nothing).
+# Once a change has stayed put for ``settle`` seconds, processing_data runs in
+# a child process into a staging directory. A successful run is renamed into ``versions/<version>``
+# and only then is the CURRENT pointer file replaced (os.replace), so readers
+# see either the old snapshot or the complete new one, never a partial write.
+# A failed run leaves CURRENT alone and is not retried until the inputs change
+# again. The newest ``keep`` snapshots are kept so that sessions still reading
+# an older one are not cut off.
+#
+# publish_dir/
+#   CURRENT                 name of the live snapshot
+#   versions/<version>/     pipeline outputs + manifest.json
+
+RAW_TABLES = ['influencers', 'posts', 'tracking', 'payouts']
+CURRENT_FILE = 'CURRENT'
+VERSIONS_DIR = 'versions'
+MANIFEST_FILE = 'manifest.json'
+STAGING_PREFIX = '.staging-'
+
+_content_hashes = {}
+
+
+def content_hash(path, st):
+    # Cached on (size, mtime) so an idle poll does not read the tables again
+    stamp = (st.st_size, st.st_mtime_ns)
+    cached = _content_hashes.get(path)
+    if cached is None or cached[0] != stamp:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _content_hashes[path] = cached = (stamp, digest.hexdigest())
+    return cached[1]
+
+
+def input_fingerprint(data_dir):
+    """Hash of the raw tables' paths, sizes and contents; None while one is missing."""
+    # Imported here: storage pulls in pandas, and the dashboard imports this
+    # module before its first paint
+    from engineered_features.storage import find_table
+    stats = []
+    for name in RAW_TABLES:
+        path = find_table(data_dir, name)
+        if path is None:
+            return None
+        st = os.stat(path)
+        stats.append((os.path.basename(path), st.st_size, content_hash(os.path.abspath(path), st)))
+    return hashlib.sha1(json.dumps(stats).encode()).hexdigest()[:12]
+
+
+def current_snapshot(publish_dir):
+    """Directory of the live snapshot under ``publish_dir``, or None before the first publish."""
+    try:
+        with open(os.path.join(publish_dir, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(publish_dir, VERSIONS_DIR, version)
+    return path if version and os.path.isdir(path) else None
+
+
+def read_manifest(snapshot_dir):
+    try:
+        with open(os.path.join(snapshot_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def publish(publish_dir, staging_dir, version):
+    """Move a finished staging directory into place and point CURRENT at it."""
+    versions = os.path.join(publish_dir, VERSIONS_DIR)
+    os.replace(staging_dir, os.path.join(versions, version))
+    tmp = os.path.join(publish_dir, CURRENT_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(publish_dir, CURRENT_FILE))
+
+
+def prune(publish_dir, keep):
+    # Oldest first (versions are timestamp-prefixed); the live one always survives
+    versions = os.path.join(publish_dir, VERSIONS_DIR)
+    live = current_snapshot(publish_dir)
+    names = sorted(n for n in os.listdir(versions) if not n.startswith('.'))
+    for name in names[:max(len(names) - keep, 0)]:
+        path = os.path.join(versions, name)
+        if path != live:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+class Refresher:
+    """Polls ``data_dir`` and publishes a new snapshot of the pipeline outputs when it changes.
+
+    ``pipeline_args`` are passed through to processing_data (e.g. ``--as-of``,
+    ``--attribution linear``, ``--database dashboard.duckdb``; a relative
+    database path lands inside the snapshot).
+    """
+
+    def __init__(self, data_dir, publish_dir, pipeline_args=(), fmt='parquet', interval=30.0, settle=5.0, keep=3,
+                 log=print):
+        self.data_dir = data_dir
+        self.publish_dir = publish_dir
+        self.pipeline_args = list(pipeline_args)
+        self.fmt = fmt
+        self.interval = interval
+        self.settle = settle
+        self.keep = keep
+        self.log = log
+        self._stop = threading.Event()
+        self._seen = None          # (fingerprint, first seen at)
+        self.last_fingerprint = self._published_fingerprint()
+        os.makedirs(os.path.join(publish_dir, VERSIONS_DIR), exist_ok=True)
+
+    def _published_fingerprint(self):
+        snapshot = current_snapshot(self.publish_dir)
+        manifest = read_manifest(snapshot) if snapshot else None
+        return manifest['fingerprint'] if manifest else None
+
+    def _command(self, staging_dir):
+        args = list(self.pipeline_args)
+        for i, arg in enumerate(args):
+            # A relative --database goes inside the snapshot
+            if arg.startswith('--database='):
+                args[i] = '--database=' + self._in_snapshot(staging_dir, arg.split('=', 1)[1])
+            elif arg == '--database' and i + 1 < len(args):
+                args[i + 1] = self._in_snapshot(staging_dir, args[i + 1])
+        return [sys.executable, '-m', 'engineered_features.processing_data', '--data-dir', self.data_dir,
+                '--output-dir', staging_dir, '--format', self.fmt] + args
+
+    @staticmethod
+    def _in_snapshot(staging_dir, path):
+        return path if os.path.isabs(path) else os.path.join(staging_dir, path)
+
+    def run_pipeline(self, fingerprint):
+        """Build and publish one snapshot; returns its version, or None when the run failed."""
+        started = datetime.now()
+        # Microseconds keep the names in publish order for prune(), even within a second
+        version = f"{started.strftime('%Y%m%dT%H%M%S%f')}-{fingerprint}"
+        staging = os.path.join(self.publish_dir, VERSIONS_DIR, STAGING_PREFIX + version)
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        t0 = time.perf_counter()
+        result = subprocess.run(self._command(staging), capture_output=True, text=True)
+        seconds = round(time.perf_counter() - t0, 3)
+        if result.returncode != 0:
+            shutil.rmtree(staging, ignore_errors=True)
+            self.log(f"✗ Pipeline failed after {seconds}s (inputs {fingerprint}); keeping the current snapshot\n"
+                     f"{result.stderr.strip()[-2000:]}")
+            return None
+        if input_fingerprint(self.data_dir) != fingerprint:
+            # Inputs moved while the pipeline read them; the next poll rebuilds
+            shutil.rmtree(staging, ignore_errors=True)
+            self.log("… Inputs changed during the run; discarding it")
+            return None
+        manifest = {'version': version, 'fingerprint': fingerprint, 'data_dir': os.path.abspath(self.data_dir),
+                    'started': started.isoformat(timespec='seconds'), 'seconds': seconds,
+                    'pipeline_args': self.pipeline_args}
+        with open(os.path.join(staging, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        publish(self.publish_dir, staging, version)
+        prune(self.publish_dir, self.keep)
+        self.log(f"✓ Published snapshot {version} in {seconds}s")
+        return version
+
+    def poll_once(self, now=None):
+        """One watcher step; returns the version published by it, if any."""
+        now = time.monotonic() if now is None else now
+        fingerprint = input_fingerprint(self.data_dir)
+        if fingerprint is None or fingerprint == self.last_fingerprint:
+            self._seen = None
+            return None
+        if self._seen is None or self._seen[0] != fingerprint:
+            # New change: wait until it has been stable for ``settle`` seconds
+            self._seen = (fingerprint, now)
+            if self.settle > 0:
+                return None
+        if now - self._seen[1] < self.settle:
+            return None
+        self._seen = None
+        # Remembered even on failure, so a broken input is not rebuilt in a loop
+        self.last_fingerprint = fingerprint
+        return self.run_pipeline(fingerprint)
+
+    def run_forever(self):
+        self.log(f"Watching {self.data_dir} every {self.interval}s, publishing to {self.publish_dir}")
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as exc:  # keep watching; the next change gets a fresh attempt
+                self.log(f"✗ Refresh error: {exc!r}")
+            self._stop.wait(min(self.interval, self.settle) if self._seen else self.interval)
+
+    def start(self):
+        """Run the watcher in a daemon thread (e.g. next to the dashboard)."""
+        thread = threading.Thread(target=self.run_forever, name='pipeline-refresher', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch the raw datasets and publish versioned pipeline snapshots for the dashboard.",
+        epilog="Arguments after -- are passed to processing_data, e.g. -- --as-of 2025-09-01 --database dashboard.duckdb")
+    parser.add_argument('--data-dir', required=True, help="raw dataset directory to watch")
+    parser.add_argument('--publish-dir', required=True, help="where versions/ and the CURRENT pointer live")
+    parser.add_argument('--format', choices=['parquet', 'arrow', 'csv'], default='parquet')
+    parser.add_argument('--interval', type=float, default=30.0, help="seconds between polls (default: %(default)s)")
+    parser.add_argument('--settle', type=float, default=5.0,
+                        help="seconds a change must stay unchanged before it is processed (default: %(default)s)")
+    parser.add_argument('--keep', type=int, default=3, help="snapshots to keep (default: %(default)s)")
+    parser.add_argument('--once', action='store_true', help="publish once if the inputs changed, then exit")
+    args, pipeline_args = parser.parse_known_args()
+    pipeline_args = [a for a in pipeline_args if a != '--']
+
+    refresher = Refresher(args.data_dir, args.publish_dir, pipeline_args, args.format, args.interval,
+                          args.settle, max(args.keep, 1))
+    if args.once:
+        fingerprint = input_fingerprint(args.data_dir)
+        if fingerprint is None:
+            sys.exit(f"Missing raw tables in {args.data_dir}")
+        if fingerprint == refresher.last_fingerprint:
+            print(f"✓ Snapshot is up to date ({fingerprint})")
+        elif refresher.run_pipeline(fingerprint) is None:
+            sys.exit(1)
+        return
+    try:
+        refresher.run_forever()
+    except KeyboardInterrupt:
+        refresher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+
+# Roll-up engine: every insight table from one scan of master_df.
+# master_df is grouped once at the finest grain of the roll-up dimensions into
+# additive cells (sums, counts, and sum/count pairs for the averages); every
+# grouping set is then re-aggregated from those few cells, like a SQL
+# GROUPING SETS query. Product sets come from the tracking cube the same way.
+# The result is one long table with a ``grouping_set`` column, persisted as the
+# ``rollups`` artifact and queried with ``grouping_set()``.
+
+DIMENSIONS = ['platform', 'category', 'follower_tier', 'persona_combination']
+GROUPING_SETS = [
+    (),
+    ('platform',),
+    ('category',),
+    ('follower_tier',),
+    ('persona_combination',),
+    ('platform', 'category'),
+    ('platform', 'follower_tier'),
+    ('category', 'follower_tier'),
+]
+PRODUCT_SETS = [('product',), ('product', 'platform')]
+SUM_MEASURES = ['total_revenue', 'total_payout', 'total_orders', 'total_reach', 'total_posts']
+MEAN_MEASURES = ['roas', 'efficiency_score', 'engagement_rate']
+
+
+def set_name(dims):
+    return '+'.join(dims) if dims else 'total'
+
+
+def base_cells(master_df):
+    """The single scan: additive cells at the finest grain of the dimensions."""
+    dims = [d for d in DIMENSIONS if d in master_df.columns]
+    aggs = {c: (c, 'sum') for c in SUM_MEASURES if c in master_df.columns}
+    for c in MEAN_MEASURES:
+        if c in master_df.columns:
+            aggs[f'{c}_sum'] = (c, 'sum')
+            aggs[f'{c}_n'] = (c, 'count')
+    aggs['influencer_count'] = ('name', 'count') if 'name' in master_df.columns else (dims[0], 'size')
+    return master_df.groupby(dims, observed=True, dropna=False).agg(**aggs).reset_index()
+
+
+def _derive(frame):
+    # Ratios and averages are derived after re-aggregation, never summed
+    if {'total_revenue', 'total_payout'}.issubset(frame.columns):
+        frame['platform_roas'] = np.where(frame['total_payout'] > 0, frame['total_revenue'] / frame['total_payout'], 0)
+    if 'total_revenue' in frame.columns:
+        total = frame['total_revenue'].sum()
+        frame['revenue_share'] = np.where(total > 0, frame['total_revenue'] / total * 100, 0)
+    for c in MEAN_MEASURES:
+        if f'{c}_sum' in frame.columns:
+            frame[f'avg_{c}'] = frame[f'{c}_sum'] / frame[f'{c}_n']
+    return frame
+
+
+def _rollup(cells, dims, measures):
+    if dims:
+        frame = cells.groupby(list(dims), observed=True)[measures].sum().reset_index()
+    else:
+        frame = cells[measures].sum().to_frame().T
+    frame.insert(0, 'grouping_set', set_name(dims))
+    return _derive(frame)
+
+
+def compute_rollups(master_df, cube=None):
+    """All grouping sets of master_df (and the product sets of ``cube``) as one table."""
+    return rollups_from_cells(base_cells(master_df), cube)
+
+
+def rollups_from_cells(cells, cube=None):
+    # ``cells`` as built by base_cells, here or by a database GROUP BY
+    measures = [c for c in cells.columns if c not in DIMENSIONS]
+    frames = [_rollup(cells, dims, measures) for dims in GROUPING_SETS if set(dims).issubset(cells.columns)]
+
+    if cube is not None and len(cube):
+        product_cells = (cube.rename(columns={'source': 'platform', 'orders': 'total_orders',
+                                              'revenue': 'total_revenue'})
+                         .groupby(['product', 'platform'], observed=True)[['total_orders', 'total_revenue', 'events']]
+                         .sum().reset_index())
+        frames += [_rollup(product_cells, dims, ['total_orders', 'total_revenue', 'events']) for dims in PRODUCT_SETS]
+
+    rollups = pd.concat(frames, ignore_index=True)
+    leading = ['grouping_set'] + [d for d in DIMENSIONS + ['product'] if d in rollups.columns]
+    return rollups[leading + [c for c in rollups.columns if c not in leading]]
+
+
+def grouping_set(rollups, *dims):
+    """Rows of one grouping set, keeping only its dimension columns and populated measures."""
+    rows = rollups[rollups['grouping_set'] == set_name(dims)]
+    other_dims = [d for d in DIMENSIONS + ['product'] if d not in dims and d in rows.columns]
+    rows = rows.drop(columns=['grouping_set'] + other_dims).reset_index(drop=True)
+    if len(rows):
+        rows = rows.dropna(axis=1, how='all')
+    # Counts come back as floats from the long table (other sets leave them NaN)
+    counts = [c for c in rows.columns if c in ('influencer_count', 'events') or c.endswith('_n')]
+    return rows.astype({c: 'int64' for c in counts})
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+# Declared in-memory dtypes for the raw tables and master_df.
+# Low-cardinality strings become categoricals. ID columns become categoricals
+# too, i.e. integer codes plus a dictionary of the ID strings; the dictionary
+# is shared by every table holding the ID, so merges and groupbys on it compare
+# codes instead of strings. Counts are narrowed to int32 when they are whole
+# numbers without gaps that fit the range. Values, and so every output written
+# from them, are unchanged. The streamed (chunked) aggregates are retyped with
+# their own entries so both paths hand the merge the same dtypes.
+
+CATEGORY = 'category'
+DIMENSIONS = ['platform', 'category', 'gender', 'basis', 'source', 'campaign', 'product',
+              'follower_tier', 'performance_category', 'persona_combination', 'status']
+ID_COLUMNS = ['influencer_id', 'post_id', 'user_id']
+
+SCHEMA = {
+    'influencers': {'follower_count': 'int32'},
+    'posts': {'reach': 'int32', 'likes': 'int32', 'comments': 'int32'},
+    'tracking': {'orders': 'int32'},
+    'payouts': {'orders': 'int32'},
+    # Sums of int32 columns stay int32, as a groupby sum over the typed table leaves them
+    'posts_agg': {'total_reach': 'int32', 'total_likes': 'int32', 'total_comments': 'int32'},
+    'tracking_agg': {'total_orders': 'int32'},
+    'cube': {'orders': 'int32'},
+    'master': {c: 'int32' for c in ['follower_count', 'total_posts', 'total_reach', 'total_likes', 'total_comments',
+                                    'total_orders', 'campaigns_count', 'orders', 'days_since_last_post',
+                                    'campaign_duration', 'platform_rank', 'overall_rank']},
+}
+for _columns in SCHEMA.values():
+    _columns.update({c: CATEGORY for c in DIMENSIONS + ID_COLUMNS})
+
+
+def read_dtypes(table, columns=None):
+    """Dtypes a CSV reader can apply directly (the categoricals) for ``table``."""
+    dtypes = {c: dtype for c, dtype in SCHEMA[table].items() if dtype == CATEGORY}
+    return dtypes if columns is None else {c: d for c, d in dtypes.items() if c in columns}
+
+
+def narrow_int(series, dtype):
+    # Only lossless: whole numbers, no NaN, inside the target range
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return series
+    values = series.to_numpy()
+    info = np.iinfo(dtype)
+    if series.hasnans or (values.dtype.kind == 'f' and not np.all(np.mod(values, 1) == 0)):
+        return series
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        return series
+    return series.astype(dtype)
+
+
+def apply_schema(df, table):
+    """``df`` with the declared dtypes of ``table`` applied to the columns it has."""
+    changes = {}
+    for col, dtype in SCHEMA[table].items():
+        if col not in df.columns:
+            continue
+        if dtype == CATEGORY:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                changes[col] = df[col].astype(CATEGORY)
+        elif df[col].dtype != dtype:
+            changes[col] = narrow_int(df[col], dtype)
+    return df.assign(**changes) if changes else df
+
+
+def share_id_dictionaries(*frames):
+    """Recode every ID column onto one dictionary (sorted union of its values) per ID."""
+    frames = list(frames)
+    for col in ID_COLUMNS:
+        holders = [i for i, f in enumerate(frames) if col in f.columns]
+        if not holders:
+            continue
+        values = set()
+        for i in holders:
+            column = frames[i][col]
+            values.update(column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype)
+                          else column.dropna().unique())
+        shared = pd.CategoricalDtype(sorted(values))
+        for i in holders:
+            frames[i] = frames[i].assign(**{col: frames[i][col].astype(shared)})
+    return frames
@@ -0,0 +1,158 @@
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from engineered_features.instrumentation import StageRecorder
+
+
+# Memoized stage DAG for the pipeline.
+# A stage is a named function with declared inputs: other stages (a whole
+# output, or item ``i`` of a tuple output as ``(stage, i)``), files and plain
+# parameters. Its key hashes the stage name, its code (the source files of the
+# modules it declares), the pandas/numpy/Python versions, its parameters, the
+# size and mtime of its files and the keys of its input stages. Keys are
+# therefore known before anything runs, and they change exactly when something
+# upstream changed.
+# ``get(name)`` pulls one stage. It uses the in-memory result if there is one,
+# else the artifact cached as ``cache_dir/<stage>/<key>.pkl``, else it pulls the
+# inputs and runs the stage. When only payouts.csv changed, a rerun reads the
+# cached post and tracking aggregates and never opens the posts or tracking
+# tables.
+# Stages with ``persist=False`` are recomputed whenever they are needed. Raw
+# loads use this, because their pickles would only duplicate the raw tables.
+# Stage functions may modify an input in place (the add_* steps do); the
+# artifact is written before any consumer runs. Without a cache_dir the graph
+# only memoizes in memory, which is a plain run.
+
+CACHE_VERSION = 1
+ARTIFACT_EXT = '.pkl'
+LIBRARY_VERSIONS = {'python': sys.version.split()[0], 'pandas': pd.__version__, 'numpy': np.__version__}
+
+_source_hashes = {}
+
+
+def source_fingerprint(module):
+    # Hash of a module's source file; any edit to it invalidates the stages that declare it
+    path = module.__file__
+    if path not in _source_hashes:
+        with open(path, 'rb') as f:
+            _source_hashes[path] = hashlib.sha1(f.read()).hexdigest()[:12]
+    return _source_hashes[path]
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+
+
+def read_artifact(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def write_artifact(path, result):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=(), params=None, files=(), modules=(), persist=True, salt=None):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.params = dict(params or {})
+        self.files = [f for f in files if f]
+        # The function's own module is always part of its code version
+        self.modules = [sys.modules[fn.__module__]] + [m for m in modules if m is not sys.modules[fn.__module__]]
+        self.persist = persist
+        # Hashed but not passed to fn (e.g. today's date for a stage that defaults to "now")
+        self.salt = salt
+
+
+class StageGraph:
+    """Named pipeline stages, run on demand and cached on disk under ``cache_dir`` (None = memory only)."""
+
+    def __init__(self, cache_dir=None, recorder=None, keep=2):
+        self.cache_dir = cache_dir
+        self.recorder = recorder or StageRecorder()
+        self.keep = keep
+        self.stages = {}
+        self.results = {}
+        self.ran = []
+        self.cached = []
+        self._keys = {}
+
+    def add(self, name, fn, inputs=(), params=None, files=(), modules=(), persist=True, salt=None):
+        if name in self.stages:
+            raise ValueError(f"Stage {name!r} is already defined")
+        self.stages[name] = Stage(name, fn, inputs, params, files, modules, persist, salt)
+        return name
+
+    def key(self, name):
+        if name not in self._keys:
+            stage = self.stages[name]
+            parts = {
+                'stage': name, 'version': CACHE_VERSION, 'libraries': LIBRARY_VERSIONS,
+                'code': [source_fingerprint(m) for m in stage.modules],
+                'params': repr(sorted(stage.params.items())), 'salt': stage.salt,
+                'files': [file_fingerprint(f) for f in stage.files],
+                'inputs': [[self.key(i[0]), i[1]] if isinstance(i, tuple) else self.key(i) for i in stage.inputs],
+            }
+            self._keys[name] = hashlib.sha1(json.dumps(parts, default=str).encode()).hexdigest()[:16]
+        return self._keys[name]
+
+    def artifact_path(self, name):
+        return os.path.join(self.cache_dir, name, self.key(name) + ARTIFACT_EXT)
+
+    def value(self, spec):
+        """Output of stage ``spec``, or item ``i`` of it for ``(stage, i)``."""
+        if isinstance(spec, tuple):
+            return self.get(spec[0])[spec[1]]
+        return self.get(spec)
+
+    def get(self, name):
+        if name in self.results:
+            return self.results[name]
+        stage = self.stages[name]
+        persist = self.cache_dir is not None and stage.persist
+        path = self.artifact_path(name) if persist else None
+        result, found = None, False
+        if persist and os.path.exists(path):
+            try:
+                result, found = self.recorder.run(f'{name} (cached)', read_artifact, path), True
+            except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as exc:
+                print(f"… Ignoring unreadable cache artifact {path}: {exc!r}")
+        if found:
+            self.cached.append(name)
+        else:
+            args = [self.value(i) for i in stage.inputs]
+            # Bound here so a parameter may share a name with recorder.run's own arguments
+            result = self.recorder.run(name, functools.partial(stage.fn, **stage.params), *args)
+            self.ran.append(name)
+            if persist:
+                write_artifact(path, result)
+                self.prune(name)
+        self.results[name] = result
+        return result
+
+    def prune(self, name):
+        # Newest ``keep`` artifacts per stage, so switching back to recent inputs still hits
+        directory = os.path.join(self.cache_dir, name)
+        artifacts = sorted((e for e in os.scandir(directory) if e.name.endswith(ARTIFACT_EXT)),
+                           key=lambda e: e.stat().st_mtime_ns, reverse=True)
+        for entry in artifacts[self.keep:]:
+            os.remove(entry.path)
+
+    def summary(self):
+        if self.cache_dir is None:
+            return f"Ran {len(self.ran)} stages"
+        return f"Ran: {', '.join(self.ran) or 'nothing'}; read {len(self.cached)} from {self.cache_dir}"
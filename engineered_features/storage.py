@@ -0,0 +1,208 @@
+import argparse
+import os
+import warnings
+import pandas as pd
+
+
+# Table storage shared by the pipeline and the dashboard.
+# Tables can be kept as CSV (the original format), Parquet or Arrow IPC
+# (Feather v2). The columnar formats keep categorical and datetime dtypes, so
+# readers skip text parsing and dtype inference, and they can read a subset of
+# columns memory-mapped. pyarrow is optional: without it everything falls back
+# to CSV.
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+# Tie-break order when a table exists in several formats of the same age
+READ_PREFERENCE = ['parquet', 'arrow', 'csv']
+
+# Low-cardinality string columns stored as categoricals in columnar files
+CATEGORICAL_COLUMNS = ['platform', 'category', 'gender', 'basis', 'follower_tier', 'performance_category',
+                       'persona_combination', 'status', 'source', 'campaign', 'product']
+DATE_COLUMNS = ['date', 'first_post_date', 'last_post_date']
+
+
+def has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_format(fmt):
+    if fmt != 'csv' and not has_pyarrow():
+        warnings.warn(f"pyarrow is not installed, writing CSV instead of {fmt}")
+        return 'csv'
+    return fmt
+
+
+def table_path(directory, name, fmt):
+    return os.path.join(directory, name + FORMATS[fmt])
+
+
+def find_table(directory, name):
+    """Return the path of ``name`` in ``directory``: its most recently written format.
+
+    A copy older than another format of the same table is stale (e.g. a CSV
+    rewritten next to an earlier Parquet output), so the newest one wins and
+    columnar formats are only preferred between copies of the same age.
+    """
+    candidates = [table_path(directory, name, fmt) for fmt in READ_PREFERENCE
+                  if fmt == 'csv' or has_pyarrow()]
+    candidates = [path for path in candidates if os.path.exists(path)]
+    if not candidates:
+        return None
+    # max keeps the first of equal mtimes, i.e. the READ_PREFERENCE order
+    return max(candidates, key=lambda path: os.stat(path).st_mtime_ns)
+
+
+def format_of(path):
+    ext = os.path.splitext(str(path))[1].lower()
+    if ext == '.feather':
+        return 'arrow'
+    for fmt, fmt_ext in FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    return 'csv'
+
+
+def with_storage_dtypes(df):
+    # Dimension strings -> categoricals, date strings -> datetime64
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def write_table(df, directory, name, fmt='csv', index=False):
+    """Write ``df`` as ``directory/name.<ext>`` and return the path written."""
+    fmt = resolve_format(fmt)
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(directory, name, fmt)
+    # Written next to the target and renamed over it, so readers never see half a file
+    tmp = path + '.tmp'
+    if fmt == 'csv':
+        df.to_csv(tmp, index=index)
+        os.replace(tmp, path)
+        return path
+    if index:
+        df = df.reset_index()
+    df = with_storage_dtypes(df)
+    if fmt == 'parquet':
+        df.to_parquet(tmp, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def _raw_names(source):
+    # Raw CSV headers may carry stray whitespace; match on stripped names
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return {c.strip(): c for c in header}
+
+
+def _csv_columns(source, columns):
+    if columns is None:
+        return None
+    raw_names = _raw_names(source)
+    return [raw_names[c] for c in columns if c in raw_names]
+
+
+def read_table(source, columns=None, fmt=None, parse_dates=True, dtype=None, date_errors='raise'):
+    """Read a table from a path or file-like object, optionally only ``columns``.
+
+    Columnar files are memory-mapped when read from disk. CSV date columns are
+    parsed on load so every format comes back with the same dtypes; a malformed
+    date raises, unless ``date_errors='coerce'`` (the dashboard's reads), which
+    turns it into NaT with a warning. ``dtype`` (column -> dtype) is applied
+    while parsing CSVs and ignored for columnar files, which already store
+    categoricals.
+    """
+    fmt = fmt or format_of(getattr(source, 'name', source))
+    if fmt == 'parquet':
+        if isinstance(source, (str, os.PathLike)):
+            return pd.read_parquet(source, columns=columns, memory_map=True)
+        return pd.read_parquet(source, columns=columns)
+    if fmt == 'arrow':
+        from pyarrow import feather
+        table = feather.read_table(source, columns=columns,
+                                   memory_map=isinstance(source, (str, os.PathLike)))
+        return table.to_pandas()
+
+    if dtype:
+        raw_names = _raw_names(source)
+        dtype = {raw_names[c]: d for c, d in dtype.items() if c in raw_names}
+    df = pd.read_csv(source, usecols=_csv_columns(source, columns), dtype=dtype)
+    df.columns = df.columns.str.strip()
+    if parse_dates:
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = _parse_dates(df[col], date_errors)
+    return df
+
+
+def _parse_dates(values, errors):
+    parsed = pd.to_datetime(values, errors=errors)
+    if errors == 'coerce':
+        malformed = int((parsed.isna() & values.notna()).sum())
+        if malformed:
+            warnings.warn(f"{malformed} malformed {values.name!r} value(s) were read as missing dates")
+    return parsed
+
+
+def iter_table_chunks(path, columns, chunksize, dtype=None):
+    """Yield ``columns`` of the table at ``path`` in DataFrames of ``chunksize`` rows.
+
+    ``dtype`` is applied while parsing CSV chunks, as in ``read_table``.
+    """
+    fmt = format_of(path)
+    if fmt == 'parquet':
+        from pyarrow import parquet
+        for batch in parquet.ParquetFile(path, memory_map=True).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif fmt == 'arrow':
+        from pyarrow import feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunksize):
+            yield batch.to_pandas()
+    else:
+        if dtype:
+            raw_names = _raw_names(path)
+            dtype = {raw_names[c]: d for c, d in dtype.items() if c in raw_names}
+        for chunk in pd.read_csv(path, usecols=_csv_columns(path, columns), dtype=dtype, chunksize=chunksize):
+            chunk.columns = chunk.columns.str.strip()
+            for col in DATE_COLUMNS:
+                if col in chunk.columns:
+                    chunk[col] = pd.to_datetime(chunk[col])
+            yield chunk
+
+
+def convert_directory(src_dir, dst_dir, fmt):
+    # Convert every CSV in src_dir to fmt (e.g. the raw simulated datasets)
+    written = []
+    for filename in sorted(os.listdir(src_dir)):
+        if filename.endswith('.csv'):
+            df = read_table(os.path.join(src_dir, filename))
+            written.append(write_table(df, dst_dir, filename[:-4], fmt))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a directory of CSV tables to Parquet or Arrow IPC.")
+    parser.add_argument('src_dir')
+    parser.add_argument('dst_dir')
+    parser.add_argument('--format', choices=list(FORMATS), default='parquet')
+    args = parser.parse_args()
+    for path in convert_directory(args.src_dir, args.dst_dir, args.format):
+        print(f"✓ Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(ROOT, 'Simulated_raw_datasets')
+REFERENCE_MASTER = os.path.join(ROOT, 'engineered_features', 'master_df.csv')
+# The date the bundled master_df.csv was built for
+AS_OF = '2025-09-01'
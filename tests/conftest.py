@@ -0,0 +1,10 @@
+import pytest
+
+from engineered_features.processing_data import load_datasets
+from tests import RAW_DIR
+
+
+@pytest.fixture
+def raw_tables():
+    """The four bundled raw tables, loaded and cleaned as the pipeline does."""
+    return load_datasets(RAW_DIR)
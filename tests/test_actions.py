@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engineered_features.actions import SKETCH_ALPHA, merge_sketches, payout_sketch, sketch_quantiles
+
+QUANTILES = [0.01, 0.1, 0.3, 0.5, 0.7, 0.9, 0.99]
+
+
+@pytest.fixture
+def master_df():
+    rng = np.random.default_rng(7)
+    n = 20_000
+    return pd.DataFrame({
+        'platform': rng.choice(['Instagram', 'YouTube', 'X', 'Facebook'], n),
+        'category': rng.choice(['health', 'nutrition', 'sports'], n),
+        'follower_tier': rng.choice(['Micro', 'Macro', 'Mega'], n),
+        'performance_category': rng.choice(['High', 'Medium', 'Low'], n),
+        'total_payout': rng.lognormal(9, 1.5, n).round(2),
+    })
+
+
+def _relative_error(approx, exact):
+    return np.abs(np.asarray(approx) - exact) / exact
+
+
+def test_merged_sketches_stay_within_error_bound(master_df):
+    # Uneven slices, as chunks or shards would be
+    bounds = [0, 1_000, 7_500, 8_000, len(master_df)]
+    slices = [master_df.iloc[a:b] for a, b in zip(bounds, bounds[1:])]
+    merged = merge_sketches([payout_sketch(part) for part in slices])
+    approx = sketch_quantiles(merged, QUANTILES)
+    exact = np.quantile(master_df['total_payout'], QUANTILES)
+    assert _relative_error(approx, exact).max() <= SKETCH_ALPHA
+    # Merging loses nothing: same quantiles as one sketch of all rows
+    assert approx == sketch_quantiles(payout_sketch(master_df), QUANTILES)
+
+
+def test_merged_sketch_selections(master_df):
+    merged = merge_sketches([payout_sketch(master_df.iloc[i::4]) for i in range(4)])
+    selections = {'platform': ['YouTube', 'X'], 'follower_tier': ['Mega']}
+    rows = master_df[master_df['platform'].isin(selections['platform'])
+                     & master_df['follower_tier'].isin(selections['follower_tier'])]
+    approx = sketch_quantiles(merged, QUANTILES, selections)
+    assert _relative_error(approx, np.quantile(rows['total_payout'], QUANTILES)).max() <= SKETCH_ALPHA
+    assert sketch_quantiles(merged, QUANTILES, {'platform': ['TikTok']}) is None
+
+
+def test_merge_of_nothing_is_empty():
+    assert merge_sketches([]).empty
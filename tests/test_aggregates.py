@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from engineered_features.aggregates import stream_posts_agg, stream_tracking_agg, tracking_cube
+from engineered_features.processing_data import (
+    PIPELINE_COLUMNS, aggregate_posts, aggregate_tracking, clean_table, load_table, raw_table_path)
+from engineered_features.schema import read_dtypes
+from engineered_features.storage import read_table
+from tests import RAW_DIR
+
+# Small enough that every table spans many chunks, and not a divisor of their lengths
+CHUNK_SIZE = 7
+
+
+def _in_memory(name):
+    return clean_table(read_table(raw_table_path(RAW_DIR, name)), name)
+
+
+def test_streamed_posts_match_in_memory():
+    streamed = stream_posts_agg(raw_table_path(RAW_DIR, 'posts'), CHUNK_SIZE)
+    pd.testing.assert_frame_equal(streamed, aggregate_posts(_in_memory('posts')), check_dtype=False)
+
+
+@pytest.mark.parametrize('chunksize', [CHUNK_SIZE, 10**6])
+def test_streamed_tracking_match_in_memory(chunksize):
+    tracking = _in_memory('tracking')
+    tracking_agg, cube, active_campaigns = stream_tracking_agg(raw_table_path(RAW_DIR, 'tracking'), chunksize)
+    pd.testing.assert_frame_equal(tracking_agg, aggregate_tracking(tracking), check_dtype=False)
+    pd.testing.assert_frame_equal(cube, tracking_cube(tracking), check_dtype=False)
+    assert active_campaigns == tracking['campaign'].nunique()
+
+
+def test_typed_streams_match_typed_loads():
+    # With the declared schema the chunked path hands the merge the same dtypes as the in-memory one
+    posts_path, tracking_path = raw_table_path(RAW_DIR, 'posts'), raw_table_path(RAW_DIR, 'tracking')
+    posts = load_table(posts_path, 'posts', PIPELINE_COLUMNS['posts'])
+    tracking = load_table(tracking_path, 'tracking', PIPELINE_COLUMNS['tracking'])
+
+    streamed = stream_posts_agg(posts_path, CHUNK_SIZE, read_dtypes('posts', PIPELINE_COLUMNS['posts']))
+    pd.testing.assert_frame_equal(streamed, aggregate_posts(posts))
+    tracking_agg, cube, _ = stream_tracking_agg(tracking_path, CHUNK_SIZE,
+                                                read_dtypes('tracking', PIPELINE_COLUMNS['tracking']))
+    pd.testing.assert_frame_equal(tracking_agg, aggregate_tracking(tracking))
+    pd.testing.assert_frame_equal(cube, tracking_cube(tracking))
+
+
+def test_streamed_cube_does_not_depend_on_chunk_size():
+    path = raw_table_path(RAW_DIR, 'tracking')
+    dtype = read_dtypes('tracking', PIPELINE_COLUMNS['tracking'])
+    whole = stream_tracking_agg(path, 10**6, dtype)
+    for chunksize in [1, CHUNK_SIZE, 50]:
+        streamed = stream_tracking_agg(path, chunksize, dtype)
+        pd.testing.assert_frame_equal(streamed[0], whole[0])
+        pd.testing.assert_frame_equal(streamed[1], whole[1])
+        assert streamed[2] == whole[2]
@@ -0,0 +1,32 @@
+from dashboard.aggregations import RollupService, compute_rollups, filter_signature
+from engineered_features.actions import DEFAULT_THRESHOLDS, select_actions
+from engineered_features.processing_data import build_master_df
+from tests import AS_OF
+
+
+def test_rollups_and_actions_are_memoized_per_signature(raw_tables):
+    master_df = build_master_df(*raw_tables, as_of=AS_OF)
+    service = RollupService(max_entries=8)
+    calls = []
+
+    def actions(df, thresholds):
+        def build():
+            calls.append(thresholds)
+            return select_actions(df, thresholds)
+        return build
+
+    instagram = master_df[master_df['platform'] == 'Instagram']
+    states = [(filter_signature('master', {}), master_df), (filter_signature('master', {'platform': ['Instagram']}),
+                                                           instagram)]
+    looser = {**DEFAULT_THRESHOLDS, 'invest_min_roas': 2.0}
+    for _ in range(2):
+        for signature, df in states:
+            assert service.get(signature, df) is service.get(signature, df)
+            for thresholds in [DEFAULT_THRESHOLDS, looser]:
+                service.actions(signature, thresholds, actions(df, thresholds))
+    # One build per filter state and threshold set; flipping back is a lookup
+    assert len(calls) == 4
+    assert service.misses == 6
+
+    first = service.get(states[0][0], master_df)
+    assert first['platform'].equals(compute_rollups(master_df)['platform'])
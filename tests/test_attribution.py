@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engineered_features.attribution import ATTRIBUTION_MODELS, attribute_events
+from engineered_features.processing_data import (
+    ATTRIBUTION_COLUMNS, PIPELINE_COLUMNS, load_datasets, with_tracking_columns,
+)
+from tests import RAW_DIR
+
+
+def _events(rows):
+    return pd.DataFrame(rows, columns=['user_id', 'date', 'orders', 'revenue']).assign(
+        date=lambda df: pd.to_datetime(df['date']))
+
+
+def _reference(tracking_df, model, lookback_days, half_life_days):
+    # One conversion at a time: its touches are the same user's events from the
+    # lookback window, ordered by day and then table order, ending at the conversion
+    days = tracking_df['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    users = tracking_df['user_id'].to_numpy()
+    credit = np.zeros((len(tracking_df), 2))
+    for i, (orders, revenue) in enumerate(zip(tracking_df['orders'], tracking_df['revenue'])):
+        if orders == 0 and revenue == 0:
+            continue
+        touches = [j for j in range(len(tracking_df))
+                   if users[j] == users[i] and days[i] - lookback_days <= days[j] <= days[i]
+                   and (days[j], j) <= (days[i], i)]
+        touches.sort(key=lambda j: (days[j], j))
+        if model == 'last':
+            weights = np.eye(len(touches))[-1]
+        elif model == 'first':
+            weights = np.eye(len(touches))[0]
+        elif model == 'linear':
+            weights = np.ones(len(touches))
+        else:
+            weights = np.exp2(-(days[i] - days[touches]) / half_life_days)
+        credit[touches] += np.outer(weights / weights.sum(), [orders, revenue])
+    return credit[:, 0], credit[:, 1]
+
+
+SAME_DAY = _events([('U1', '2025-01-01', 0, 0),    # A
+                    ('U1', '2025-01-05', 2, 100),  # B, the conversion
+                    ('U1', '2025-01-05', 0, 0)])   # C, after B on the same day
+
+
+@pytest.mark.parametrize('model, expected', [
+    ('last', [0, 100, 0]),
+    ('first', [100, 0, 0]),
+    ('linear', [50, 50, 0]),
+    ('time_decay', [100 * 2 ** (-4 / 7) / (1 + 2 ** (-4 / 7)), 100 / (1 + 2 ** (-4 / 7)), 0]),
+])
+def test_same_day_touches_after_the_conversion_get_nothing(model, expected):
+    _, revenue = attribute_events(SAME_DAY, model, lookback_days=30, half_life_days=7)
+    np.testing.assert_allclose(revenue, expected)
+
+
+@pytest.mark.parametrize('lookback_days, expected', [(30, [100, 0]), (29, [0, 100])])
+def test_touches_older_than_the_lookback_are_ignored(lookback_days, expected):
+    tracking = _events([('U1', '2025-01-01', 0, 0), ('U1', '2025-01-31', 1, 100)])
+    _, revenue = attribute_events(tracking, 'first', lookback_days=lookback_days)
+    np.testing.assert_allclose(revenue, expected)
+
+
+def test_time_decay_halves_per_half_life():
+    tracking = _events([('U1', '2025-01-01', 0, 0), ('U1', '2025-01-08', 3, 300)])
+    orders, revenue = attribute_events(tracking, 'time_decay', half_life_days=7)
+    np.testing.assert_allclose(orders, [1, 2])
+    np.testing.assert_allclose(revenue, [100, 200])
+
+
+def test_users_do_not_share_credit():
+    tracking = _events([('U1', '2025-01-01', 0, 0), ('U2', '2025-01-02', 1, 100), (None, '2025-01-02', 1, 50)])
+    _, revenue = attribute_events(tracking, 'first')
+    np.testing.assert_allclose(revenue, [0, 100, 50])
+
+
+@pytest.mark.parametrize('model', ATTRIBUTION_MODELS)
+def test_models_match_reference_and_conserve_totals(model):
+    tracking = load_datasets(RAW_DIR, with_tracking_columns(PIPELINE_COLUMNS, ATTRIBUTION_COLUMNS))[2]
+    orders, revenue = attribute_events(tracking, model, lookback_days=10, half_life_days=3)
+    expected_orders, expected_revenue = _reference(tracking, model, 10, 3)
+    np.testing.assert_allclose(orders, expected_orders, atol=1e-9)
+    np.testing.assert_allclose(revenue, expected_revenue, atol=1e-6)
+    assert orders.sum() == pytest.approx(tracking['orders'].sum())
+    assert revenue.sum() == pytest.approx(tracking['revenue'].sum())
@@ -0,0 +1,55 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.exports import CHUNK_ROWS, export, frame_chunks
+
+# Empty, an exact multiple of the chunk size, and a partial last chunk
+SIZES = [0, 2 * CHUNK_ROWS, 2 * CHUNK_ROWS + 123]
+
+
+def _frame(n):
+    rng = np.random.default_rng(n)
+    revenue = rng.random(n) * 1000
+    revenue[::7] = np.nan
+    return pd.DataFrame({
+        "influencer_id": [f"INF{i:06d}" for i in range(n)],
+        "platform": pd.Categorical(rng.choice(["Instagram", "YouTube", "X"], n)),
+        "total_orders": np.arange(n, dtype=np.int64),
+        "total_revenue": revenue,
+        "first_post_date": pd.Timestamp("2025-05-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+    })
+
+
+@pytest.mark.parametrize("n", SIZES)
+@pytest.mark.parametrize("fmt", ["CSV", "CSV (gzip)"])
+def test_csv_exports_match_a_single_write(fmt, n):
+    df = _frame(n)
+    data = export(frame_chunks(df), fmt).getvalue()
+    if fmt == "CSV (gzip)":
+        data = gzip.decompress(data)
+    # Byte for byte what one to_csv call writes: one header, every row once
+    assert data.decode("utf-8") == df.to_csv(index=False)
+    back = pd.read_csv(io.BytesIO(data), parse_dates=["first_post_date"])
+    pd.testing.assert_frame_equal(back, df, check_dtype=False, check_categorical=False)
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_parquet_export_round_trips(n):
+    pytest.importorskip("pyarrow")
+    from pyarrow import parquet
+
+    df = _frame(n)
+    out = export(frame_chunks(df), "Parquet")
+    # One row group per chunk
+    assert parquet.ParquetFile(out).num_row_groups == max(-(-n // CHUNK_ROWS), 1)
+    out.seek(0)
+    back = pd.read_parquet(out)
+    if n:
+        pd.testing.assert_frame_equal(back, df, check_dtype=False)
+    else:
+        # An empty categorical has no values to type its dictionary
+        assert list(back.columns) == list(df.columns) and back.empty
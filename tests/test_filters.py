@@ -0,0 +1,79 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.filters import FILTER_COLUMNS, FilterIndex
+from engineered_features.schema import apply_schema
+from engineered_features.storage import read_table
+from tests import REFERENCE_MASTER
+
+
+def _baseline_filter(master_df, selections, d_start, d_end):
+    # The dashboard's original filtering: chained isin, then the post-window overlap
+    df = master_df.copy()
+    for col, selected in selections.items():
+        if selected and col in df.columns:
+            df = df[df[col].isin(selected)]
+    if d_start is not None and d_end is not None:
+        df["first_post_date"] = pd.to_datetime(df["first_post_date"], errors="coerce")
+        df["last_post_date"] = pd.to_datetime(df["last_post_date"], errors="coerce")
+        df = df[(df["last_post_date"] >= d_start) & (df["first_post_date"] <= d_end)]
+    return df
+
+
+def _with_gaps(master_df):
+    # Missing filter values, as in hand-edited or uploaded masters
+    df = master_df.copy()
+    df.loc[[0, 3], "platform"] = np.nan
+    df.loc[[1, 3], "category"] = np.nan
+    return df
+
+
+MASTERS = {
+    "plain": lambda df: df,
+    "categorical": lambda df: apply_schema(df, "master"),
+    "gaps": _with_gaps,
+    "categorical_gaps": lambda df: apply_schema(_with_gaps(df), "master"),
+}
+
+
+def _selections(master_df):
+    options = {col: list(master_df[col].dropna().unique()) for col in FILTER_COLUMNS if col in master_df.columns}
+    yield {}
+    for col, values in options.items():
+        yield {col: values[:1]}
+        yield {col: values[1:]}
+    yield {"platform": options["platform"][:2], "category": options["category"][1:],
+           "follower_tier": options["follower_tier"][:1]}
+    yield {"platform": ["No such platform"]}
+
+
+def _date_ranges(master_df):
+    first, last = master_df["first_post_date"], master_df["last_post_date"]
+    yield None, None
+    yield first.min(), last.max()
+    yield pd.Timestamp("2025-06-01"), pd.Timestamp("2025-06-30")
+    # Single days: a window's first day, its last day, and a day inside one
+    for day in [first.dropna().iloc[0], last.dropna().iloc[0], first.dropna().iloc[1] + pd.Timedelta(days=1)]:
+        yield day, day
+    yield pd.Timestamp("2030-01-01"), pd.Timestamp("2030-01-01")
+
+
+@pytest.mark.parametrize("variant", MASTERS)
+def test_masks_match_the_baseline_filtering(variant):
+    master_df = MASTERS[variant](read_table(REFERENCE_MASTER))
+    index = FilterIndex(master_df)
+    for selections, (d_start, d_end) in itertools.product(_selections(master_df), _date_ranges(master_df)):
+        expected = _baseline_filter(master_df, selections, d_start, d_end)
+        view = index.view(index.mask(selections, d_start, d_end))
+        assert list(view.index) == list(expected.index), (selections, d_start, d_end)
+
+
+def test_unfiltered_view_is_the_shared_master():
+    master_df = read_table(REFERENCE_MASTER)
+    index = FilterIndex(master_df)
+    # Callers treat views as read-only: an unfiltered one is master_df itself
+    assert index.view(index.mask({})) is master_df
+    assert index.view(index.mask({"platform": ["X"]})) is not master_df
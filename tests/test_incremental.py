@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from engineered_features import incremental
+from engineered_features.incremental import apply_deltas, load_state, refresh_master, save_state
+from engineered_features.processing_data import build_master_df, clean_datasets, csv_round_trip, raw_table_path
+from engineered_features.storage import read_table
+from tests import AS_OF, RAW_DIR
+
+
+def test_folded_deltas_match_full_rebuild(tmp_path):
+    # Read the way the incremental CLI reads (plain tables, no schema)
+    influencers, posts, tracking, payouts = clean_datasets(
+        *[read_table(raw_table_path(RAW_DIR, name)) for name in ['influencers', 'posts', 'tracking', 'payouts']])
+    cuts = [pd.Timestamp('2025-06-15'), pd.Timestamp('2025-07-01')]
+
+    def window(df, i):
+        start = cuts[i - 1] if i > 0 else pd.Timestamp.min
+        end = cuts[i] if i < len(cuts) else pd.Timestamp.max
+        return df[(df['date'] >= start) & (df['date'] < end)]
+
+    # A base load and two deltas, with the state saved and reloaded in between
+    for i in range(len(cuts) + 1):
+        assert len(window(posts, i)) and len(window(tracking, i))
+        state = load_state(tmp_path)
+        master_df = refresh_master(state, influencers, payouts, window(posts, i), window(tracking, i), as_of=AS_OF)
+        save_state(tmp_path, state)
+    assert sum(len(window(tracking, i)) for i in range(len(cuts) + 1)) == len(tracking)
+
+    full = build_master_df(influencers, posts, tracking, payouts, as_of=AS_OF)
+    pd.testing.assert_frame_equal(csv_round_trip(master_df), csv_round_trip(full))
+
+
+def test_reapplied_delta_is_skipped(tmp_path):
+    state_dir, deltas = tmp_path / 'state', tmp_path / 'deltas'
+    deltas.mkdir()
+    posts, tracking = read_table(raw_table_path(RAW_DIR, 'posts')), read_table(raw_table_path(RAW_DIR, 'tracking'))
+    posts.iloc[:20].to_csv(deltas / 'posts_1.csv', index=False)
+    tracking.iloc[:200].to_csv(deltas / 'tracking_1.csv', index=False)
+    tracking.iloc[200:].to_csv(deltas / 'tracking_2.csv', index=False)
+
+    apply_deltas(state_dir, RAW_DIR, deltas / 'posts_1.csv', deltas / 'tracking_1.csv', as_of=AS_OF, log=str)
+    master_df = apply_deltas(state_dir, RAW_DIR, None, deltas / 'tracking_2.csv', as_of=AS_OF, log=str)
+    # The same contents under a new name are still the same delta
+    (deltas / 'tracking_1.csv').rename(deltas / 'tracking_1_again.csv')
+    again = apply_deltas(state_dir, RAW_DIR, deltas / 'posts_1.csv', deltas / 'tracking_1_again.csv',
+                         as_of=AS_OF, log=str)
+    pd.testing.assert_frame_equal(again, master_df)
+    assert master_df['total_orders'].sum() == tracking['orders'].sum()
+    assert len(load_state(state_dir)['folded']) == 3
+
+
+def test_interrupted_save_keeps_the_previous_state(tmp_path, monkeypatch):
+    influencers, posts, tracking, payouts = clean_datasets(
+        *[read_table(raw_table_path(RAW_DIR, name)) for name in ['influencers', 'posts', 'tracking', 'payouts']])
+    state = load_state(tmp_path)
+    refresh_master(state, influencers, payouts, posts, tracking, as_of=AS_OF)
+    save_state(tmp_path, state)
+    saved = load_state(tmp_path)['master']
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    refresh_master(state, influencers, payouts, posts, tracking, as_of=AS_OF)
+    monkeypatch.setattr(incremental, 'publish', crash)
+    with pytest.raises(OSError):
+        save_state(tmp_path, state)
+    pd.testing.assert_frame_equal(load_state(tmp_path)['master'], saved)
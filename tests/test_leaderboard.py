@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.leaderboard import LEADERBOARD_COLUMNS, SORT_COLUMNS, Leaderboard
+from engineered_features.processing_data import build_master_df
+from tests import AS_OF
+
+PAGE_SIZE = 7
+
+
+def _tied_master(n=120, seed=3):
+    # Few distinct values and some gaps, so ties and NaNs cross page boundaries
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'name': [f'Influencer {i}' for i in range(n)],
+        'platform': rng.choice(['X', 'YouTube', 'Instagram'], n),
+        'category': rng.choice(['health', 'sports'], n),
+    })
+    for col in SORT_COLUMNS:
+        values = rng.integers(0, 6, n).astype(float)
+        values[rng.random(n) < 0.15] = np.nan
+        df[col] = values
+    return df
+
+
+def _masks(df):
+    rng = np.random.default_rng(0)
+    return [None, rng.random(len(df)) < 0.5, (df['platform'] == 'X').to_numpy(), np.zeros(len(df), dtype=bool)]
+
+
+def _expected_page(df, mask, col, ascending, page):
+    view = df if mask is None else df[mask]
+    ordered = view.sort_values(col, ascending=ascending, kind='stable', na_position='last')
+    return ordered[[c for c in LEADERBOARD_COLUMNS if c in df.columns]].iloc[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+
+
+@pytest.mark.parametrize('ascending', [False, True])
+@pytest.mark.parametrize('col', SORT_COLUMNS)
+def test_pages_match_a_full_stable_sort(col, ascending):
+    df = _tied_master()
+    leaderboard = Leaderboard(df)
+    for mask in _masks(df):
+        total = len(df) if mask is None else int(mask.sum())
+        # Every page, including a partial last page and one past the end
+        for page in range(total // PAGE_SIZE + 2):
+            page_df, page_total = leaderboard.page(mask, col, ascending, page, PAGE_SIZE)
+            expected = _expected_page(df, mask, col, ascending, page)
+            assert page_total == total
+            pd.testing.assert_frame_equal(page_df.reset_index(drop=True), expected.reset_index(drop=True))
+            assert list(page_df.index) == list(range(page * PAGE_SIZE, page * PAGE_SIZE + len(page_df)))
+
+
+def test_pages_of_the_bundled_master(raw_tables):
+    master_df = build_master_df(*raw_tables, as_of=AS_OF)
+    leaderboard = Leaderboard(master_df)
+    for mask in _masks(master_df):
+        for page in range(4):
+            page_df, _ = leaderboard.page(mask, 'roas', False, page, PAGE_SIZE)
+            expected = _expected_page(master_df, mask, 'roas', False, page)
+            pd.testing.assert_frame_equal(page_df.reset_index(drop=True), expected.reset_index(drop=True))
@@ -0,0 +1,43 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from engineered_features.actions import payout_sketch, sketch_quantiles
+from engineered_features.aggregates import tracking_cube
+from engineered_features.parallel import _load_shard, build_master_parallel, partition_tables
+from engineered_features.processing_data import PIPELINE_COLUMNS, build_master_df, csv_round_trip, raw_table_path
+from engineered_features.storage import read_table, write_table
+from tests import AS_OF, RAW_DIR
+
+QUANTILES = [0.1, 0.3, 0.5, 0.7, 0.9]
+
+
+def test_parallel_matches_serial(raw_tables):
+    master_df, cube, active_campaigns, sketch = build_master_parallel(RAW_DIR, workers=2, num_shards=5, as_of=AS_OF,
+                                                                      chunk_size=50)
+    tracking = raw_tables[2]
+    serial = build_master_df(*raw_tables, as_of=AS_OF)
+    # Shards keep their own category dictionaries, so compare values, not dtypes
+    pd.testing.assert_frame_equal(csv_round_trip(master_df), csv_round_trip(serial))
+    pd.testing.assert_frame_equal(csv_round_trip(cube), csv_round_trip(tracking_cube(tracking)))
+    assert active_campaigns == tracking['campaign'].nunique()
+    # The merged shard sketches hold the same bucket counts as one sketch of the whole
+    assert sketch_quantiles(sketch, QUANTILES) == sketch_quantiles(payout_sketch(serial), QUANTILES)
+
+
+def test_partition_handles_tables_without_chunks(tmp_path):
+    pytest.importorskip('pyarrow')
+    data_dir, shard_dir = tmp_path / 'raw', tmp_path / 'shards'
+    data_dir.mkdir()
+    shard_dir.mkdir()
+    for name in ['influencers', 'tracking', 'payouts']:
+        shutil.copy(raw_table_path(RAW_DIR, name), data_dir)
+    # A zero-row Parquet table is read as no batches at all
+    posts = read_table(raw_table_path(RAW_DIR, 'posts')).iloc[:0]
+    write_table(posts, data_dir, 'posts', 'parquet')
+
+    partition_tables(data_dir, shard_dir, num_shards=3)
+    for shard in range(3):
+        shard_posts = _load_shard(shard_dir, 'posts', shard)
+        assert shard_posts.empty and list(shard_posts.columns) == PIPELINE_COLUMNS['posts']
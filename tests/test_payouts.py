@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from engineered_features.processing_data import (
+    PAYOUT_ENGINE_COLUMNS, compute_payouts, load_datasets, rate_card_from_payouts,
+)
+from tests import RAW_DIR
+
+
+@pytest.fixture
+def payout_tables():
+    _, posts, tracking, payouts = load_datasets(RAW_DIR, PAYOUT_ENGINE_COLUMNS)
+    return posts, tracking, payouts
+
+
+def test_card_from_payouts_reproduces_payouts(payout_tables):
+    posts, tracking, payouts = payout_tables
+    computed, campaign_payouts = compute_payouts(posts, tracking, rate_card_from_payouts(payouts))
+    expected = payouts.assign(influencer_id=payouts['influencer_id'].astype(str), basis=payouts['basis'].astype(str))
+    pd.testing.assert_frame_equal(computed.sort_values('influencer_id', ignore_index=True),
+                                  expected.sort_values('influencer_id', ignore_index=True), check_dtype=False)
+    assert campaign_payouts['payout'].sum() == pytest.approx(payouts['total_payout'].sum())
+
+
+def test_caps_limit_each_campaign(payout_tables):
+    posts, tracking, payouts = payout_tables
+    card = rate_card_from_payouts(payouts)
+    caps = pd.DataFrame({'campaign': tracking['campaign'].dropna().unique().astype(str), 'cap': 100.0})
+    _, campaign_payouts = compute_payouts(posts, tracking, card, caps=caps)
+    capped = campaign_payouts[campaign_payouts['campaign'].notna()]
+    assert capped['payout'].max() <= 100.0
+
+
+def test_unknown_basis_is_rejected(payout_tables):
+    posts, tracking, payouts = payout_tables
+    card = rate_card_from_payouts(payouts)
+    card.loc[0, 'basis'] = 'per_click'
+    with pytest.raises(ValueError, match='per_click'):
+        compute_payouts(posts, tracking, card)
+
+
+def test_tiered_cards_need_tiers(payout_tables):
+    posts, tracking, payouts = payout_tables
+    card = rate_card_from_payouts(payouts)
+    card.loc[0, 'basis'] = 'tiered'
+    with pytest.raises(ValueError, match='tiered'):
+        compute_payouts(posts, tracking, card)
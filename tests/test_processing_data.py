@@ -0,0 +1,21 @@
+from argparse import Namespace
+
+from engineered_features import actions, stages
+from engineered_features.attribution import DEFAULT_HALF_LIFE_DAYS, DEFAULT_LOOKBACK_DAYS
+from engineered_features.processing_data import build_master_df, pipeline_graph, verify_against_reference
+from tests import AS_OF, RAW_DIR, REFERENCE_MASTER
+
+
+def test_master_df_matches_reference(raw_tables):
+    # Compared through CSV, the form the reference was written in
+    verify_against_reference(build_master_df(*raw_tables, as_of=AS_OF), REFERENCE_MASTER)
+
+
+def test_stage_keys_follow_the_modules_they_run(monkeypatch):
+    args = Namespace(data_dir=RAW_DIR, cache_dir=None, as_of=AS_OF, chunk_size=None, rate_card=None,
+                     rate_tiers=None, campaign_caps=None, attribution='none',
+                     lookback_days=DEFAULT_LOOKBACK_DAYS, half_life_days=DEFAULT_HALF_LIFE_DAYS)
+    before = pipeline_graph(args).key('actions')
+    # An edit to actions.py must invalidate the cached action tables
+    monkeypatch.setitem(stages._source_hashes, actions.__file__, 'edited')
+    assert pipeline_graph(args).key('actions') != before
@@ -0,0 +1,101 @@
+import os
+import shutil
+
+import pytest
+
+from engineered_features import refresher
+from engineered_features.refresher import (
+    CURRENT_FILE, MANIFEST_FILE, VERSIONS_DIR, Refresher, current_snapshot, read_manifest,
+)
+from tests import AS_OF, RAW_DIR
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / 'raw'
+    directory.mkdir()
+    for name in ['influencers', 'posts', 'tracking', 'payouts']:
+        shutil.copy(os.path.join(RAW_DIR, f'{name}.csv'), directory)
+    return directory
+
+
+def _refresher(data_dir, tmp_path, keep=3):
+    return Refresher(str(data_dir), str(tmp_path / 'published'), ['--as-of', AS_OF], fmt='csv', settle=0,
+                     keep=keep, log=lambda message: None)
+
+
+def _edit_payouts(data_dir, rate):
+    # A real content change: one influencer's rate
+    path = data_dir / 'payouts.csv'
+    lines = path.read_text().splitlines()
+    fields = lines[1].split(',')
+    fields[2] = str(rate)
+    lines[1] = ','.join(fields)
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def _pointer(tmp_path):
+    return (tmp_path / 'published' / CURRENT_FILE).read_text()
+
+
+def test_second_poll_and_touched_inputs_are_no_ops(data_dir, tmp_path):
+    watcher = _refresher(data_dir, tmp_path)
+    version = watcher.poll_once()
+    snapshot = current_snapshot(watcher.publish_dir)
+    assert version and snapshot.endswith(version)
+    assert os.path.exists(os.path.join(snapshot, 'master_df.csv'))
+    assert watcher.poll_once() is None
+    # Touching a table without changing it does not republish
+    st = os.stat(data_dir / 'tracking.csv')
+    os.utime(data_dir / 'tracking.csv', ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert watcher.poll_once() is None
+    # Nor does a fresh watcher over the published snapshot
+    assert _refresher(data_dir, tmp_path).poll_once() is None
+    assert os.listdir(tmp_path / 'published' / VERSIONS_DIR) == [version]
+
+
+def test_snapshot_is_complete_before_current_moves(data_dir, tmp_path, monkeypatch):
+    watcher = _refresher(data_dir, tmp_path)
+    first = watcher.poll_once()
+    run = refresher.subprocess.run
+    seen = []
+
+    def pipeline(*args, **kwargs):
+        result = run(*args, **kwargs)
+        # Outputs are written, but readers still get the previous snapshot
+        seen.append((_pointer(tmp_path).strip(), read_manifest(current_snapshot(watcher.publish_dir))))
+        return result
+
+    monkeypatch.setattr(refresher.subprocess, 'run', pipeline)
+    _edit_payouts(data_dir, 123.45)
+    second = watcher.poll_once()
+    assert seen[0][0] == first and seen[0][1]['version'] == first
+    assert _pointer(tmp_path).strip() == second
+    assert read_manifest(current_snapshot(watcher.publish_dir))['fingerprint'] == refresher.input_fingerprint(
+        str(data_dir))
+    assert not [n for n in os.listdir(tmp_path / 'published' / VERSIONS_DIR) if n.startswith('.')]
+
+
+def test_failed_run_keeps_current(data_dir, tmp_path):
+    watcher = _refresher(data_dir, tmp_path)
+    version = watcher.poll_once()
+    pointer = _pointer(tmp_path)
+    (data_dir / 'influencers.csv').write_text('not,a,table\n')
+    assert watcher.poll_once() is None
+    assert _pointer(tmp_path) == pointer
+    assert os.listdir(tmp_path / 'published' / VERSIONS_DIR) == [version]
+    # A failed input is not retried until it changes again
+    assert watcher.poll_once() is None
+
+
+def test_prune_keeps_the_newest_snapshots(data_dir, tmp_path):
+    watcher = _refresher(data_dir, tmp_path, keep=2)
+    versions = [watcher.poll_once()]
+    for rate in [101.5, 202.5]:
+        _edit_payouts(data_dir, rate)
+        versions.append(watcher.poll_once())
+    assert all(versions)
+    assert sorted(os.listdir(tmp_path / 'published' / VERSIONS_DIR)) == versions[1:]
+    assert current_snapshot(watcher.publish_dir).endswith(versions[-1])
+    for version in versions[1:]:
+        assert os.path.exists(tmp_path / 'published' / VERSIONS_DIR / version / MANIFEST_FILE)
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engineered_features.aggregates import tracking_cube
+from engineered_features.processing_data import build_insight_tables, build_master_df
+from engineered_features.rollups import (
+    GROUPING_SETS, MEAN_MEASURES, SUM_MEASURES, base_cells, compute_rollups, grouping_set, rollups_from_cells,
+)
+from tests import AS_OF
+
+
+@pytest.fixture
+def master_and_cube(raw_tables):
+    return build_master_df(*raw_tables, as_of=AS_OF), tracking_cube(raw_tables[2])
+
+
+def _direct_insight_tables(master_df, tracking_df):
+    # The per-table groupbys the roll-up engine replaced
+    platform = master_df.groupby('platform', observed=True).agg({
+        'total_revenue': 'sum', 'total_payout': 'sum', 'total_orders': 'sum', 'total_reach': 'sum', 'name': 'count',
+    }).rename(columns={'name': 'influencer_count'})
+    platform['platform_roas'] = platform['total_revenue'] / platform['total_payout']
+    platform['revenue_share'] = platform['total_revenue'] / platform['total_revenue'].sum() * 100
+    persona = master_df.groupby('persona_combination', observed=True).agg({
+        'total_posts': 'sum', 'roas': 'mean', 'total_revenue': 'sum', 'efficiency_score': 'mean', 'name': 'count',
+    }).rename(columns={'name': 'influencer_count'}).sort_values('roas', ascending=False)
+    category = master_df.groupby('category', observed=True).agg({
+        'total_revenue': 'sum', 'roas': 'mean', 'engagement_rate': 'mean', 'name': 'count',
+    }).rename(columns={'name': 'influencer_count'}).sort_values('roas', ascending=False)
+    product = tracking_df.groupby('product', observed=True).agg({'orders': 'sum', 'revenue': 'sum'}).sort_values(
+        'revenue', ascending=False)
+    return {'platform_performance': platform, 'persona_performance': persona,
+            'category_performance': category, 'product_performance': product}
+
+
+def test_insight_tables_match_direct_groupbys(raw_tables, master_and_cube):
+    master_df, cube = master_and_cube
+    insights = build_insight_tables(compute_rollups(master_df, cube))
+    for name, expected in _direct_insight_tables(master_df, raw_tables[2]).items():
+        pd.testing.assert_frame_equal(insights[name], expected, check_dtype=False, check_index_type=False,
+                                      check_categorical=False, obj=name)
+
+
+@pytest.mark.parametrize('dims', GROUPING_SETS, ids=lambda dims: '+'.join(dims) or 'total')
+def test_grouping_sets_match_direct_groupbys(master_and_cube, dims):
+    master_df = master_and_cube[0]
+    rows = grouping_set(compute_rollups(master_df), *dims)
+    if dims:
+        grouped = master_df.groupby(list(dims), observed=True)
+        expected = grouped[SUM_MEASURES].sum().join(grouped[MEAN_MEASURES].mean().add_prefix('avg_')).reset_index()
+    else:
+        expected = pd.concat([master_df[SUM_MEASURES].sum(), master_df[MEAN_MEASURES].mean().add_prefix('avg_')])
+        expected = expected.to_frame().T
+    expected['influencer_count'] = (master_df.groupby(list(dims), observed=True).size().to_numpy()
+                                    if dims else len(master_df))
+    for col in expected.columns:
+        if col in dims:
+            assert rows[col].astype(str).tolist() == expected[col].astype(str).tolist()
+        else:
+            np.testing.assert_allclose(rows[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                                       err_msg=col)
+
+
+def test_rollups_from_cells_combine_partial_cells(master_and_cube):
+    # Cells of separate slices (e.g. database GROUP BY results) roll up like cells of the whole
+    master_df, cube = master_and_cube
+    halves = [base_cells(master_df.iloc[:10]), base_cells(master_df.iloc[10:])]
+    combined = rollups_from_cells(pd.concat(halves, ignore_index=True), cube)
+    pd.testing.assert_frame_equal(build_insight_tables(combined)['persona_performance'],
+                                  build_insight_tables(compute_rollups(master_df, cube))['persona_performance'])
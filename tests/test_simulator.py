@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from benchmarks.run import load_simulator
+from tests import AS_OF
+
+simulator = load_simulator()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 997, 50_000])
+def test_vectorized_output_does_not_depend_on_chunk_size(monkeypatch, chunk_size):
+    # Small blocks, so chunks cut across several RNG streams
+    monkeypatch.setattr(simulator, 'tracking_block', 1_000)
+    params = dict(num_influencers=20, num_posts=300, events_per_post=10, seed=7, as_of=AS_OF)
+    expected = simulator.generate_vectorized(chunk_size=3_000, **params)
+    for actual, table in zip(simulator.generate_vectorized(chunk_size=chunk_size, **params), expected):
+        pd.testing.assert_frame_equal(actual, table)
+
+
+def test_loop_mode_honours_events_per_post():
+    tracking = simulator.generate_loop(num_influencers=5, num_posts=4, num_users=10, events_per_post=3)[2]
+    assert len(tracking) == 12
@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from dashboard.aggregations import compute_rollups
+from dashboard.filters import FilterIndex
+from dashboard.leaderboard import Leaderboard
+from dashboard.sql_backend import ConnectionPool, SqlBackend
+from dashboard.trends import restrict_cube
+from engineered_features import rollups as rollup_engine
+from engineered_features.actions import select_actions
+from engineered_features.aggregates import tracking_cube
+from engineered_features.database import write_database
+from engineered_features.processing_data import build_master_df, load_datasets
+from engineered_features.schema import apply_schema
+from tests import AS_OF, RAW_DIR
+
+FILTER_STATES = [
+    ({}, None, None),
+    ({'platform': ['Instagram']}, None, None),
+    ({'platform': ['Instagram', 'YouTube'], 'category': ['health', 'sports']}, None, None),
+    ({}, '2025-07-01', '2025-07-31'),
+    ({'platform': ['No such platform']}, None, None),
+]
+
+
+@pytest.fixture(scope='module')
+def dashboard_data(tmp_path_factory):
+    influencers, posts, tracking, payouts = load_datasets(RAW_DIR)
+    master_df = build_master_df(influencers, posts, tracking, payouts, as_of=AS_OF)
+    cube = tracking_cube(tracking)
+    path = write_database(tmp_path_factory.mktemp('db') / 'dashboard.sqlite', master_df, cube,
+                          rollup_engine.compute_rollups(master_df, cube))
+    # The dashboard loads master_df with the declared schema
+    master_df = apply_schema(master_df, 'master')
+    return master_df, cube, SqlBackend(ConnectionPool(path, size=2))
+
+
+def _states(dashboard_data):
+    master_df, cube, backend = dashboard_data
+    index = FilterIndex(master_df)
+    for selections, d_start, d_end in FILTER_STATES:
+        d_start, d_end = [pd.Timestamp(d) if d else None for d in (d_start, d_end)]
+        mask = index.mask(selections, d_start, d_end)
+        yield mask, index.view(mask), backend.where(selections, d_start, d_end)
+
+
+def _same(actual, expected):
+    pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_dtype=False, check_categorical=False, check_index_type=False)
+
+
+def test_kpi_totals_match(dashboard_data):
+    backend = dashboard_data[2]
+    for mask, view, where in _states(dashboard_data):
+        revenue, payout, influencers, rows = backend.totals(where)
+        assert rows == backend.count(where) == mask.sum()
+        assert revenue == pytest.approx(view['total_revenue'].sum())
+        assert payout == pytest.approx(view['total_payout'].sum())
+        assert influencers == view['influencer_id'].nunique()
+
+
+@pytest.mark.parametrize('ascending', [False, True])
+@pytest.mark.parametrize('sort_by', ['roas', 'total_revenue', 'total_orders'])
+def test_leaderboard_pages_match(dashboard_data, sort_by, ascending):
+    master_df, _, backend = dashboard_data
+    leaderboard = Leaderboard(master_df)
+    for mask, _, where in _states(dashboard_data):
+        for page in range(3):
+            page_df, total = backend.page(where, sort_by, ascending, page, page_size=10)
+            expected, expected_total = leaderboard.page(mask, sort_by, ascending, page, page_size=10)
+            assert total == expected_total
+            assert list(page_df.index) == list(expected.index)
+            _same(page_df, expected)
+
+
+def test_rollups_match(dashboard_data):
+    backend = dashboard_data[2]
+    for mask, view, where in _states(dashboard_data):
+        actual = backend.rollups(where, unfiltered=mask.all())
+        for name, expected in compute_rollups(view).items():
+            if expected is None or expected.empty:
+                assert actual[name] is None or actual[name].empty
+            else:
+                _same(actual[name], expected)
+
+
+def test_action_picks_match(dashboard_data):
+    backend = dashboard_data[2]
+    # Every table is populated for some of the filter states
+    thresholds = {'invest_min_roas': 5.0, 'optimize_max_roas': 3.0, 'optimize_payout_quantile': 0.5, 'top_n': 3}
+    for mask, view, where in _states(dashboard_data):
+        for actual, expected in zip(backend.actions(where, thresholds), select_actions(view, thresholds)):
+            assert list(actual.index) == list(expected.index)
+            if len(expected):
+                _same(actual, expected)
+
+
+@pytest.mark.parametrize('dims', [['source'], ['campaign', 'product']])
+def test_cube_slices_match(dashboard_data, dims):
+    cube, backend = dashboard_data[1:]
+    for _, view, where in _states(dashboard_data):
+        keys = ['date'] + dims
+        expected = (restrict_cube(cube, view['influencer_id'].astype(str))
+                    .groupby(keys, observed=True)[['orders', 'revenue', 'events']].sum().reset_index())
+        actual = backend.cube_view(where, dims)
+        assert len(actual) == len(expected)
+        if len(expected):
+            _same(actual.astype({d: str for d in dims}), expected.astype({d: str for d in dims}))
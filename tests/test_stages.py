@@ -0,0 +1,105 @@
+import os
+import shutil
+from argparse import Namespace
+from datetime import date
+
+import pytest
+
+from engineered_features import actions, processing_data, rollups, stages
+from engineered_features.attribution import DEFAULT_HALF_LIFE_DAYS, DEFAULT_LOOKBACK_DAYS
+from engineered_features.processing_data import pipeline_graph
+from tests import AS_OF, RAW_DIR
+
+# What a pipeline run pulls, in the order main() pulls it
+TARGETS = ['rankings', 'executive_kpis', 'actions', 'rollups', 'insight_tables']
+KPI_STAGES = ['time_metrics', 'status', 'rankings', 'executive_kpis', 'actions', 'rollups', 'insight_tables']
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / 'raw'
+    directory.mkdir()
+    for name in ['influencers', 'posts', 'tracking', 'payouts']:
+        shutil.copy(os.path.join(RAW_DIR, f'{name}.csv'), directory)
+    return directory
+
+
+def _run(data_dir, cache_dir, **overrides):
+    args = Namespace(data_dir=str(data_dir), cache_dir=str(cache_dir), as_of=AS_OF, chunk_size=None,
+                     rate_card=None, rate_tiers=None, campaign_caps=None, attribution='none',
+                     lookback_days=DEFAULT_LOOKBACK_DAYS, half_life_days=DEFAULT_HALF_LIFE_DAYS)
+    vars(args).update(overrides)
+    graph = pipeline_graph(args)
+    for name in TARGETS:
+        graph.get(name)
+    return graph
+
+
+def _touch(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_unchanged_rerun_reads_only_the_targets(data_dir, tmp_path):
+    first = _run(data_dir, tmp_path / 'cache')
+    assert {'load_posts', 'load_tracking', 'aggregate_posts', 'aggregate_tracking'} <= set(first.ran)
+    second = _run(data_dir, tmp_path / 'cache')
+    assert second.ran == []
+    assert sorted(second.cached) == sorted(TARGETS)
+    for name in TARGETS:
+        assert second.key(name) == first.key(name)
+
+
+def test_payouts_change_reuses_the_aggregates(data_dir, tmp_path):
+    _run(data_dir, tmp_path / 'cache')
+    _touch(data_dir / 'payouts.csv')
+    graph = _run(data_dir, tmp_path / 'cache')
+    # The posts and tracking tables are never opened
+    assert not {'load_posts', 'load_tracking'} & set(graph.ran)
+    assert {'aggregate_posts', 'aggregate_tracking', 'tracking_cube', 'active_campaigns'} <= set(graph.cached)
+    assert {'load_payouts', 'merge', 'primary_kpis', 'derived_features'} <= set(graph.ran)
+    assert set(KPI_STAGES) <= set(graph.ran)
+
+
+def test_param_change_reruns_downstream_only(data_dir, tmp_path):
+    _run(data_dir, tmp_path / 'cache')
+    graph = _run(data_dir, tmp_path / 'cache', as_of='2025-10-01')
+    assert 'derived_features' in graph.cached
+    assert sorted(graph.ran) == sorted(KPI_STAGES)
+
+
+def test_salt_change_reruns_the_dated_stages(data_dir, tmp_path, monkeypatch):
+    class Today(date):
+        current = date(2025, 9, 1)
+
+        @classmethod
+        def today(cls):
+            return cls.current
+
+    # Without --as-of the ages count from today, which is hashed as the salt
+    monkeypatch.setattr(processing_data, 'date', Today)
+    _run(data_dir, tmp_path / 'cache', as_of=None)
+    assert _run(data_dir, tmp_path / 'cache', as_of=None).ran == []
+    Today.current = date(2025, 9, 2)
+    graph = _run(data_dir, tmp_path / 'cache', as_of=None)
+    assert 'derived_features' in graph.cached
+    assert sorted(graph.ran) == sorted(KPI_STAGES)
+
+
+def test_code_change_reruns_the_stages_that_declare_it(data_dir, tmp_path, monkeypatch):
+    _run(data_dir, tmp_path / 'cache')
+    monkeypatch.setitem(stages._source_hashes, actions.__file__, 'edited')
+    assert _run(data_dir, tmp_path / 'cache').ran == ['actions']
+    monkeypatch.setitem(stages._source_hashes, rollups.__file__, 'edited')
+    # compute_rollups lives in rollups.py too
+    assert _run(data_dir, tmp_path / 'cache').ran == ['rollups', 'insight_tables']
+
+
+def test_prune_keeps_the_newest_artifacts(data_dir, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    keys = [_run(data_dir, cache_dir, as_of=as_of).key('time_metrics')
+            for as_of in ['2025-09-01', '2025-09-02', '2025-09-03']]
+    kept = sorted(p[:-len('.pkl')] for p in os.listdir(cache_dir / 'time_metrics'))
+    assert kept == sorted(keys[1:])
+    # Stages upstream of the change still hold their single artifact
+    assert len(os.listdir(cache_dir / 'merge')) == 1
@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+import pytest
+
+from engineered_features.storage import find_table, read_table, write_table
+
+TABLE = pd.DataFrame({'influencer_id': ['INF001', 'INF002'], 'platform': ['X', 'YouTube'], 'revenue': [1.5, 2.0]})
+
+
+def _age(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_find_table_reads_the_newest_format(tmp_path):
+    pytest.importorskip('pyarrow')
+    csv = write_table(TABLE, tmp_path, 'master_df', 'csv')
+    parquet = write_table(TABLE, tmp_path, 'master_df', 'parquet')
+    # Same age: the columnar copy is preferred
+    _age(csv, 10**18)
+    _age(parquet, 10**18)
+    assert find_table(tmp_path, 'master_df') == parquet
+    # A CSV rewritten after the Parquet output replaces it
+    _age(csv, 10**18 + 1)
+    assert find_table(tmp_path, 'master_df') == csv
+    _age(parquet, 10**18 + 2)
+    assert find_table(tmp_path, 'master_df') == parquet
+
+
+def test_formats_round_trip(tmp_path):
+    for fmt in ['csv', 'parquet', 'arrow']:
+        if fmt != 'csv':
+            pytest.importorskip('pyarrow')
+        read = read_table(write_table(TABLE, tmp_path, f'table_{fmt}', fmt))
+        pd.testing.assert_frame_equal(read, TABLE, check_dtype=False, check_categorical=False)
+
+
+def test_missing_table(tmp_path):
+    assert find_table(tmp_path, 'master_df') is None
+
+
+def test_csv_is_replaced_whole(tmp_path, monkeypatch):
+    path = write_table(TABLE, tmp_path, 'master_df', 'csv')
+
+    def crash(self, target, **kwargs):
+        with open(target, 'w') as f:
+            f.write('influencer_id,plat')
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, 'to_csv', crash)
+    with pytest.raises(OSError):
+        write_table(TABLE.iloc[:1], tmp_path, 'master_df', 'csv')
+    # The interrupted write never reached the published file
+    pd.testing.assert_frame_equal(read_table(path), TABLE)
+
+
+def test_malformed_dates_raise_unless_coerced(tmp_path):
+    path = tmp_path / 'posts.csv'
+    path.write_text('post_id,date\nPOST001,2025-07-01\nPOST002,not a date\nPOST003,\n')
+    with pytest.raises(ValueError):
+        read_table(path)
+    with pytest.warns(UserWarning, match="1 malformed 'date'"):
+        dates = read_table(path, date_errors='coerce')['date']
+    assert dates.isna().tolist() == [False, True, True]
@@ -0,0 +1,51 @@
+import io
+
+from dashboard.uploads import UploadCache
+from tests import RAW_DIR
+
+
+class Upload(io.BytesIO):
+    """Stand-in for a Streamlit UploadedFile."""
+
+    def __init__(self, path, file_id):
+        with open(path, 'rb') as f:
+            super().__init__(f.read())
+        self.name = path
+        self.file_id = file_id
+
+
+def _upload(name, file_id=None):
+    return Upload(f'{RAW_DIR}/{name}.csv', file_id or name)
+
+
+def test_uploads_are_parsed_once_per_content():
+    cache = UploadCache(max_bytes=10**9)
+    first = cache.load(_upload('posts'))
+    # The same bytes under another file id are the same content
+    assert cache.load(_upload('posts', 'posts-again')) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cap_evicts_older_uploads_but_keeps_an_oversize_one():
+    cache = UploadCache(max_bytes=1)
+    tracking, posts = _upload('tracking'), _upload('posts')
+    oversize = cache.load(tracking)
+    assert cache.load(tracking) is oversize
+    # The newest entry stays, evicting the older one
+    cache.load(posts)
+    cache.load(posts)
+    cache.load(tracking)
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_resources_follow_the_current_upload():
+    cache = UploadCache(max_bytes=10**9)
+    built = []
+    build = lambda: built.append(1) or object()
+    posts, tracking = _upload('posts'), _upload('tracking')
+    index = cache.resource(posts, 'filter_index', build)
+    assert cache.resource(posts, 'filter_index', build) is index
+    cache.resource(tracking, 'filter_index', build)
+    # Switching uploads drops the previous content's resources
+    assert cache.resource(posts, 'filter_index', build) is not index
+    assert len(built) == 3